@@ -0,0 +1,180 @@
+import cv2
+import time
+import threading
+import numpy as np
+import FrameRingFunctions as ring_f
+
+# ----------------- Configuration -----------------
+READ_TIMEOUT = 1.0      # Seconds to wait for a fresh frame before giving up
+MAX_READ_FAILURES = 30  # Consecutive cap.read() failures before the stream is closed
+
+
+
+# ----------------- Capture Functions -----------------
+def open_capture(src=0, width=None, height=None, ring_slots=None):
+    """
+    Opens a camera and starts reading frames on a background thread.
+
+    Only the most recent frame is kept ("latest frame wins"), so a slow
+    consumer always gets the freshest image instead of OpenCV's buffered backlog.
+
+    Args:
+        src (int or str): Camera index or video path passed to cv2.VideoCapture.
+        width (int or None): Requested frame width (cv2 property 3).
+        height (int or None): Requested frame height (cv2 property 4).
+        ring_slots (int or None): If set, frames are read in place into a
+            shared-memory ring (FrameRingFunctions) of this many slots (at
+            least 3) instead of a new array per frame. A frame returned by
+            read_frame() then stays valid only until the next read_frame().
+
+    Returns:
+        dict: Capture state to pass to read_frame(), capture_stats() and release_capture().
+    """
+    cap = cv2.VideoCapture(src)
+    if width is not None:
+        cap.set(3, width)
+    if height is not None:
+        cap.set(4, height)
+    # Keep the driver-side queue as short as the backend allows
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    capture = {
+        'cap': cap,
+        'lock': threading.Lock(),
+        'running': True,
+        'frame': None,
+        'timestamp': 0.0,     # time.monotonic() right after the frame was grabbed
+        'seq': 0,             # Sequence number of the frame in the slot
+        'read_seq': 0,        # Sequence number last handed to the consumer
+        'captured': 0,        # Frames grabbed from the camera
+        'dropped': 0,         # Frames overwritten before anyone read them
+        'reused': 0,          # Reads that returned an already-seen frame
+        'thread': None,
+        'ring': None,         # Shared-memory frame ring, in ring mode
+        'slot': None,         # Ring slot of the latest frame
+        'held': None,         # Ring slot returned by the last read_frame()
+    }
+    if ring_slots:
+        success, first = cap.read()
+        if success:
+            capture['ring'] = ring_f.create_frame_ring(max(ring_slots, 3), first.shape, first.dtype)
+    # Reader and consumer share one lock; the condition signals a fresh frame
+    capture['new_frame'] = threading.Condition(capture['lock'])
+
+    thread = threading.Thread(target=_capture_loop, args=(capture,), daemon=True)
+    capture['thread'] = thread
+    thread.start()
+    return capture
+
+
+def _capture_loop(capture):
+    """Background reader: grabs frames and overwrites the single slot."""
+    cap = capture['cap']
+    ring = capture['ring']
+    failures = 0
+    while capture['running']:
+        slot = ring_f.acquire_slot(ring) if ring is not None else None
+        if slot is not None:
+            dst = ring['frames'][slot]
+            success, img = cap.read(dst)
+            if success and img is not dst and not np.shares_memory(img, dst):
+                np.copyto(dst, img)   # Driver changed the buffer; keep the frame in the ring
+                img = dst
+        else:
+            success, img = cap.read()
+        now = time.monotonic()
+        if not success:
+            ring_f.release_slot(ring, slot)
+            failures += 1
+            if failures >= MAX_READ_FAILURES:
+                break
+            continue
+        failures = 0
+
+        with capture['new_frame']:
+            if capture['frame'] is not None and capture['seq'] > capture['read_seq']:
+                capture['dropped'] += 1
+            if slot is not None:
+                # The previous latest slot is free again unless the consumer holds it
+                if capture['slot'] is not None and capture['slot'] != capture['held']:
+                    ring_f.release_slot(ring, capture['slot'])
+                capture['slot'] = slot
+                img = ring['frames'][slot]
+            capture['frame'] = img
+            capture['timestamp'] = now
+            capture['seq'] += 1
+            capture['captured'] += 1
+            capture['new_frame'].notify_all()
+
+    with capture['new_frame']:
+        capture['running'] = False
+        capture['new_frame'].notify_all()
+
+
+def read_frame(capture, timeout=READ_TIMEOUT, wait_new=True):
+    """
+    Returns the latest captured frame.
+
+    Args:
+        capture (dict): State from open_capture().
+        timeout (float): Max seconds to wait for a frame newer than the last one read.
+        wait_new (bool): If False, return the current slot immediately even if already seen.
+
+    Returns:
+        tuple:
+            success (bool): False once the stream has ended or timed out with no frame.
+            img (numpy.ndarray or None): Latest BGR frame.
+            timestamp (float): time.monotonic() at capture.
+            seq (int): Frame sequence number.
+    """
+    with capture['new_frame']:
+        if wait_new:
+            capture['new_frame'].wait_for(
+                lambda: capture['seq'] > capture['read_seq'] or not capture['running'],
+                timeout
+            )
+        if capture['frame'] is None:
+            return False, None, 0.0, 0
+        if capture['seq'] == capture['read_seq']:
+            if not capture['running']:
+                return False, None, capture['timestamp'], capture['seq']
+            capture['reused'] += 1
+        capture['read_seq'] = capture['seq']
+        if capture['ring'] is not None and capture['slot'] != capture['held']:
+            # The consumer is done with the frame it held before; the slot is
+            # recycled unless it is still the latest one
+            previous, capture['held'] = capture['held'], capture['slot']
+            if previous is not None:
+                ring_f.release_slot(capture['ring'], previous)
+        return True, capture['frame'], capture['timestamp'], capture['seq']
+
+
+def capture_stats(capture):
+    """
+    Returns counters describing how the consumer keeps up with the camera.
+
+    Returns:
+        dict: captured, dropped, reused, seq and age (seconds since the latest frame).
+    """
+    with capture['lock']:
+        age = time.monotonic() - capture['timestamp'] if capture['seq'] else 0.0
+        return {
+            'captured': capture['captured'],
+            'dropped': capture['dropped'],
+            'reused': capture['reused'],
+            'seq': capture['seq'],
+            'age': age,
+        }
+
+
+def release_capture(capture):
+    """Stops the reader thread and releases the camera."""
+    with capture['new_frame']:
+        capture['running'] = False
+        capture['new_frame'].notify_all()
+    if capture['thread'] is not None:
+        capture['thread'].join(timeout=READ_TIMEOUT)
+    capture['cap'].release()
+    if capture['ring'] is not None:
+        capture['frame'] = None
+        ring_f.close_frame_ring(capture['ring'])
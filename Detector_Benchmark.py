@@ -0,0 +1,85 @@
+import argparse
+import ast
+import time
+import cv2
+import numpy as np
+import MouseFunctions
+import HandTrackingFunctions as htf
+import ProfilerFunctions as prof
+import ReplayFunctions as replay_f
+
+parser = argparse.ArgumentParser(description="Run hand detectors through the full gesture pipeline and compare them.")
+parser.add_argument("detectors", nargs="*", default=["synthetic"],
+                    help="Detector configurations as name[:key=value,...], e.g. synthetic:hands=2 "
+                         "trace:trace=hands.npz mediapipe:model_complexity=0")
+parser.add_argument("--frames", type=int, default=1000, help="Frames per configuration")
+parser.add_argument("--mode", choices=["mouse", "paint"], default="mouse")
+parser.add_argument("--video", help="Frames for image detectors (default: blank frames)")
+parser.add_argument("--size", default="640x480", help="Frame size WxH when no video is given")
+parser.add_argument("--skip", type=int, default=1, help="Detector interval, as htf.SKIP_INTERVAL")
+args = parser.parse_args()
+
+
+def parse_config(text):
+    """'name:key=value,...' -> (name, options); values are Python literals or strings."""
+    name, _, rest = text.partition(":")
+    options = {}
+    for item in filter(None, rest.split(",")):
+        key, _, value = item.partition("=")
+        try:
+            options[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            options[key] = value
+    return name, options
+
+
+def load_frames(count):
+    """Up to count BGR frames from --video, or one blank frame of --size."""
+    if args.video is None:
+        w, h = (int(v) for v in args.size.split("x"))
+        return [np.zeros((h, w, 3), np.uint8)]
+    cap = cv2.VideoCapture(args.video)
+    frames = []
+    while len(frames) < count:
+        success, img = cap.read()
+        if not success:
+            break
+        frames.append(img)
+    cap.release()
+    if not frames:
+        raise SystemExit(f"No frames read from {args.video}")
+    return frames
+
+
+frames = load_frames(args.frames)
+hcam, wcam = frames[0].shape[:2]
+print(f"{'detector':<40} {'frames/s':>9} {'p50 ms':>7} {'p95 ms':>7} {'hands':>6} {'events':>7}")
+
+for text in args.detectors:
+    name, options = parse_config(text)
+    if name == "synthetic":
+        options.setdefault("frame_size", (wcam, hcam))
+    htf.set_detector(name, **options)
+    replay = replay_f.start_replay((wcam, hcam), args.mode.upper())
+    prof.enable_profiler(False)
+    prof.enable_profiler(True)
+
+    frame_ms = np.empty(args.frames)
+    t_start = time.perf_counter()
+    for i in range(args.frames):
+        t0 = time.perf_counter()
+        img = frames[i % len(frames)]
+        timestamp = i / 30.0   # Gesture timing as for a 30 fps camera
+        lm_array, hand_types, _ = htf.track_landmarks(img, timestamp, interval=args.skip)
+        replay_f.replay_frame(replay, lm_array, hand_types, timestamp, img)
+        prof.end_frame()
+        frame_ms[i] = (time.perf_counter() - t0) * 1000
+
+    elapsed = time.perf_counter() - t_start
+    p50, p95 = np.percentile(frame_ms, (50, 95))
+    print(f"{text:<40} {args.frames / elapsed:9.0f} {p50:7.3f} {p95:7.3f} {replay['hands']:6d} "
+          f"{len(MouseFunctions.recorded_events):7d}")
+    stages = ", ".join(f"{stage} {s['p50']:.3f}" for stage, s in prof.stage_stats().items())
+    print(f"    p50 ms per stage (last {prof.PROFILE_WINDOW} frames): {stages}")
+
+prof.enable_profiler(False)
@@ -0,0 +1,109 @@
+import math
+import time
+
+# ----------------- Configuration -----------------
+# One-Euro parameters per mode (positions in screen pixels, time in seconds):
+#   min_cutoff: cutoff (Hz) when the hand is still; lower = less jitter, more lag
+#   beta:       how fast the cutoff rises with speed; higher = less lag on fast moves
+#   d_cutoff:   cutoff (Hz) for the speed estimate itself
+#   lead:       seconds to extrapolate along the filtered velocity (capture-to-display latency)
+FILTER_PARAMS = {
+    "MOUSE": {'min_cutoff': 1.0, 'beta': 0.015, 'd_cutoff': 1.0, 'lead': 0.02},
+    "PAINT": {'min_cutoff': 0.8, 'beta': 0.01, 'd_cutoff': 1.0, 'lead': 0.0},
+}
+
+# Internal state
+_filters = {}  # (mode, hand key) -> filter state
+
+
+
+# ----------------- One-Euro Filter -----------------
+def create_filter(min_cutoff=1.0, beta=0.015, d_cutoff=1.0, lead=0.0):
+    """
+    Creates the state for one 2D One-Euro filter.
+
+    The cutoff frequency adapts to speed: slow, precise moves are smoothed
+    heavily while fast moves pass through with little lag.
+
+    Returns:
+        dict: Filter state for filter_point().
+    """
+    return {
+        'min_cutoff': min_cutoff,
+        'beta': beta,
+        'd_cutoff': d_cutoff,
+        'lead': lead,
+        'x': None, 'y': None,      # Last filtered position
+        'dx': 0.0, 'dy': 0.0,      # Last filtered velocity (px/s)
+        't': None,                 # Timestamp of the last sample
+    }
+
+
+def _alpha(cutoff, dt):
+    """Smoothing factor of a first-order low-pass at `cutoff` Hz for step dt."""
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+def filter_point(f, x, y, t):
+    """
+    Filters one sample.
+
+    Args:
+        f (dict): State from create_filter().
+        x, y (float): Raw position.
+        t (float): Sample timestamp in seconds (capture time when available).
+
+    Returns:
+        tuple: (x, y) filtered and, if the filter has a lead, extrapolated.
+    """
+    if f['x'] is None:
+        f['x'], f['y'], f['t'] = x, y, t
+        return x, y
+
+    dt = t - f['t']
+    if dt <= 0:
+        # Same frame delivered twice: keep the previous output
+        return f['x'] + f['dx'] * f['lead'], f['y'] + f['dy'] * f['lead']
+
+    # Low-passed velocity
+    a_d = _alpha(f['d_cutoff'], dt)
+    dx = a_d * (x - f['x']) / dt + (1 - a_d) * f['dx']
+    dy = a_d * (y - f['y']) / dt + (1 - a_d) * f['dy']
+
+    # Speed-dependent cutoff for the position
+    cutoff = f['min_cutoff'] + f['beta'] * math.hypot(dx, dy)
+    a = _alpha(cutoff, dt)
+    fx = a * x + (1 - a) * f['x']
+    fy = a * y + (1 - a) * f['y']
+
+    f['x'], f['y'], f['dx'], f['dy'], f['t'] = fx, fy, dx, dy, t
+    return fx + dx * f['lead'], fy + dy * f['lead']
+
+
+# ----------------- Per-hand Filters -----------------
+def smooth_point(x, y, t=None, mode="MOUSE", hand=0):
+    """
+    Filters a position with the per-hand filter for a mode.
+
+    Args:
+        x, y (float): Raw position in screen pixels.
+        t (float or None): Capture timestamp; defaults to time.monotonic().
+        mode (str): Key into FILTER_PARAMS.
+        hand (hashable): Hand identifier, so each hand keeps its own state.
+
+    Returns:
+        tuple: (x, y) filtered position.
+    """
+    key = (mode, hand)
+    f = _filters.get(key)
+    if f is None:
+        f = _filters[key] = create_filter(**FILTER_PARAMS[mode])
+    return filter_point(f, x, y, time.monotonic() if t is None else t)
+
+
+def reset_filters(mode=None, hand=None):
+    """Drops filter state, for all filters or only those matching mode and/or hand."""
+    for key in list(_filters):
+        if (mode is None or key[0] == mode) and (hand is None or key[1] == hand):
+            del _filters[key]
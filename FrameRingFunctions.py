@@ -0,0 +1,97 @@
+import sys
+import threading
+from collections import deque
+from multiprocessing import shared_memory
+import numpy as np
+
+# ----------------- Configuration -----------------
+FRAME_RING_SLOTS = 3    # Writing + latest + held by the consumer
+
+
+
+# ----------------- Frame Ring -----------------
+def create_frame_ring(slots, shape, dtype=np.uint8):
+    """
+    Allocates a ring of frame slots in shared memory.
+
+    Stages exchange slot indices instead of arrays: a producer takes a free
+    slot, writes the frame into it in place, passes the index on, and the
+    last consumer releases it. After setup nothing is allocated or pickled per
+    frame, and worker processes see the same memory via attach_frame_ring().
+
+    Args:
+        slots (int): Number of frames in the ring.
+        shape (tuple): Frame shape, e.g. (480, 640, 3).
+        dtype: Frame dtype.
+
+    Returns:
+        dict: Ring state; ring['frames'][slot] is the frame in a slot.
+    """
+    shape = tuple(int(v) for v in shape)
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    shm = shared_memory.SharedMemory(create=True, size=slots * nbytes)
+    return {
+        'shm': shm,
+        'owner': True,
+        'spec': {'name': shm.name, 'slots': slots, 'shape': shape, 'dtype': np.dtype(dtype).str},
+        'frames': np.ndarray((slots,) + shape, dtype, buffer=shm.buf),
+        'free': deque(range(slots)),
+        'lock': threading.Lock(),
+    }
+
+
+def attach_frame_ring(spec):
+    """
+    Opens a ring created in another process.
+
+    Args:
+        spec (dict): ring['spec'] of the owner (picklable).
+
+    Returns:
+        dict: Ring state without a free list (only the owner hands out slots).
+    """
+    # Workers share the owner's resource tracker, which already tracks the
+    # block; the owner alone unlinks it (or the tracker does if the owner dies)
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=spec['name'], track=False)
+    else:
+        shm = shared_memory.SharedMemory(name=spec['name'])
+    return {
+        'shm': shm,
+        'owner': False,
+        'spec': spec,
+        'frames': np.ndarray((spec['slots'],) + tuple(spec['shape']), np.dtype(spec['dtype']), buffer=shm.buf),
+        'free': deque(),
+        'lock': threading.Lock(),
+    }
+
+
+def acquire_slot(ring):
+    """Takes a free slot index, or returns None when every slot is in use."""
+    with ring['lock']:
+        return ring['free'].popleft() if ring['free'] else None
+
+
+def release_slot(ring, slot):
+    """Returns a slot to the free list."""
+    if slot is None:
+        return
+    with ring['lock']:
+        ring['free'].append(slot)
+
+
+def free_slots(ring):
+    """Number of slots currently free."""
+    with ring['lock']:
+        return len(ring['free'])
+
+
+def close_frame_ring(ring):
+    """Detaches from the ring; the owner also frees the shared memory."""
+    ring['frames'] = None
+    try:
+        ring['shm'].close()
+    except BufferError:
+        pass  # A caller still holds a frame view; the mapping goes away with the process
+    if ring['owner']:
+        ring['shm'].unlink()
@@ -0,0 +1,187 @@
+import time
+import HandTrackingFunctions as htf
+
+# ----------------- Configuration -----------------
+# Thresholds are in camera pixels, times in seconds of capture time
+CLICK_PAIR = (4, 6)              # Thumb tip - index PIP
+DRAG_PAIR = (4, 12)              # Thumb tip - middle tip
+CLICK_THRESHOLD = 35             # Distance for click
+CLICK_HOLD_TIME = 0.1            # Seconds to hold pinch before clicking
+DRAG_THRESHOLD = 35              # Distance for drag
+DRAG_HOLD_TIME = 0.5             # Seconds to hold pinch before dragging
+DOUBLE_CLICK_MAX_INTERVAL = 0.5  # Max seconds between the two clicks of a double-click
+SCROLL_SMOOTHING = 4             # Higher = smoother but less responsive
+SCROLL_THRESHOLD = 2             # Minimum pixel movement to trigger scroll
+SCROLL_SPEED = 100               # Scroll units per pixel of (smoothed) movement
+
+# Event types
+CLICK = "click"
+DOUBLE_CLICK = "double_click"    # Replaces the click of the second pinch of a pair
+DRAG_START = "drag_start"
+DRAG_END = "drag_end"
+SCROLL = "scroll"
+
+# Internal state
+_engines = {}  # hand key -> engine state
+
+
+
+# ----------------- Gesture Engine -----------------
+def create_gesture_engine(hand=0, **params):
+    """
+    Creates the state for one hand's gesture engine.
+
+    The engine only sees landmarks and capture timestamps, so feeding it the
+    same frames (e.g. from a trace) always gives the same events, and a late
+    frame cannot shorten or stretch a hold.
+
+    Args:
+        hand (hashable): Hand identifier copied into every event.
+        **params: Overrides for the module thresholds, by lower-case name
+            (e.g. click_hold_time=0.2).
+
+    Returns:
+        dict: Engine state for update_gestures().
+    """
+    return {
+        'hand': hand,
+        'click_threshold': params.get('click_threshold', CLICK_THRESHOLD),
+        'click_hold_time': params.get('click_hold_time', CLICK_HOLD_TIME),
+        'drag_threshold': params.get('drag_threshold', DRAG_THRESHOLD),
+        'drag_hold_time': params.get('drag_hold_time', DRAG_HOLD_TIME),
+        'double_click_max_interval': params.get('double_click_max_interval', DOUBLE_CLICK_MAX_INTERVAL),
+        'scroll_smoothing': params.get('scroll_smoothing', SCROLL_SMOOTHING),
+        'scroll_threshold': params.get('scroll_threshold', SCROLL_THRESHOLD),
+        'scroll_speed': params.get('scroll_speed', SCROLL_SPEED),
+        'click_start': None,     # Capture time the click pinch began, None when open
+        'clicked': False,        # Click already fired for the current pinch
+        'last_click': None,      # Capture time of the last click (double-click window)
+        'drag_start': None,      # Capture time the drag pinch began, None when open
+        'dragging': False,
+        'scroll_y': None,        # Previous scroll height, None outside the scroll pose
+        't': None,               # Timestamp of the last update
+    }
+
+
+def _event(engine, kind, t, pos, **data):
+    event = {'type': kind, 't': t, 'hand': engine['hand'], 'pos': pos}
+    event.update(data)
+    return event
+
+
+def update_gestures(engine, lm, t, fingers, geo=None):
+    """
+    Advances a gesture engine by one frame.
+
+    Gestures follow the mouse mode poses: with the index finger up, a held
+    thumb-index pinch clicks (a second one within the interval while the middle
+    finger is up double-clicks), a held thumb-middle pinch drags, and index +
+    middle up with the thumb down scrolls. Lowering the index finger or losing
+    the hand ends a drag.
+
+    Args:
+        engine (dict): State from create_gesture_engine().
+        lm (numpy.ndarray or list): One hand's landmarks; may be empty.
+        t (float or None): Capture timestamp in seconds; defaults to time.monotonic().
+        fingers (list): [thumb, index, middle, ring, pinky] up flags.
+        geo (dict or None): frame_geometry() of lm, if already computed.
+
+    Returns:
+        list: Events as dicts with 'type', 't', 'hand', 'pos' (camera x, y)
+            and, for scroll, 'amount'. Empty when nothing happened.
+    """
+    events = []
+    if t is None:
+        t = time.monotonic()
+    if engine['t'] is not None and t < engine['t']:
+        t = engine['t']   # Never let time run backwards
+    engine['t'] = t
+
+    if len(lm) == 0 or not fingers[1]:
+        if engine['dragging']:
+            events.append(_event(engine, DRAG_END, t, None))
+        engine['click_start'] = engine['drag_start'] = engine['scroll_y'] = None
+        engine['clicked'] = engine['dragging'] = False
+        return events
+
+    if geo is None:
+        geo = htf.frame_geometry(lm)
+
+    # Click / double-click
+    click_length, click_info = htf.geometry_distance(geo, *CLICK_PAIR)
+    if click_length < engine['click_threshold']:
+        if engine['click_start'] is None:
+            engine['click_start'] = t
+        elif not engine['clicked'] and t - engine['click_start'] >= engine['click_hold_time']:
+            pos = (click_info[4], click_info[5])
+            last = engine['last_click']
+            if fingers[2] and last is not None and t - last <= engine['double_click_max_interval']:
+                events.append(_event(engine, DOUBLE_CLICK, t, pos))
+                engine['last_click'] = None   # No triple-click
+            else:
+                events.append(_event(engine, CLICK, t, pos))
+                engine['last_click'] = t
+            engine['clicked'] = True
+    else:
+        engine['click_start'] = None
+        engine['clicked'] = False
+
+    # Drag
+    drag_length, drag_info = htf.geometry_distance(geo, *DRAG_PAIR)
+    if drag_length < engine['drag_threshold']:
+        if engine['drag_start'] is None:
+            engine['drag_start'] = t
+        elif not engine['dragging'] and t - engine['drag_start'] >= engine['drag_hold_time']:
+            events.append(_event(engine, DRAG_START, t, (drag_info[4], drag_info[5])))
+            engine['dragging'] = True
+    else:
+        if engine['dragging']:
+            events.append(_event(engine, DRAG_END, t, (drag_info[4], drag_info[5])))
+        engine['drag_start'] = None
+        engine['dragging'] = False
+
+    # Scroll
+    if fingers[2] and not fingers[0]:
+        x_index, y_index = htf.landmark_xy(lm, 8)
+        x_middle, y_middle = htf.landmark_xy(lm, 12)
+        avg_x, avg_y = (x_index + x_middle) / 2, (y_index + y_middle) / 2
+        if engine['scroll_y'] is not None:
+            delta = (engine['scroll_y'] - avg_y) / engine['scroll_smoothing']
+            if abs(delta) >= engine['scroll_threshold'] / engine['scroll_smoothing']:
+                events.append(_event(engine, SCROLL, t, (int(avg_x), int(avg_y)),
+                                     amount=int(delta * engine['scroll_speed'])))
+        engine['scroll_y'] = avg_y
+    else:
+        engine['scroll_y'] = None
+    return events
+
+
+# ----------------- Per-hand Engines -----------------
+def gesture_events(lm, t, fingers, geo=None, hand=0):
+    """
+    Runs the gesture engine kept for a hand (created on first use).
+
+    Returns:
+        list: Events from update_gestures().
+    """
+    engine = _engines.get(hand)
+    if engine is None:
+        engine = _engines[hand] = create_gesture_engine(hand)
+    return update_gestures(engine, lm, t, fingers, geo)
+
+
+def reset_gestures(hand=None):
+    """
+    Drops engine state for one hand or all hands.
+
+    Returns:
+        list: DRAG_END events for drags that were still held, so the caller
+            can release the button.
+    """
+    events = []
+    for key in list(_engines):
+        if hand is None or key == hand:
+            engine = _engines.pop(key)
+            if engine['dragging']:
+                events.append(_event(engine, DRAG_END, engine['t'], None))
+    return events
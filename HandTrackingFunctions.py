@@ -1,28 +1,406 @@
 import cv2
-import mediapipe as mp
-import time
+import threading
 import math
+from types import SimpleNamespace
+import numpy as np
+import ProfilerFunctions as prof
+import TraceFunctions as tracef
+import TemplateFunctions as tmpl
 
-# Initialize MediaPipe hands once
-_mp_hands = mp.solutions.hands
-_hands = _mp_hands.Hands(
-    static_image_mode=False,
-    max_num_hands=2,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
-_mp_draw = mp.solutions.drawing_utils
+# Hand detector backends (see set_detector). The default, MediaPipe, is imported
+# and built on first use (or by warm_up_hands), not at import; configure_hands
+# rebuilds it when settings change
+HANDS_CONFIG = {
+    'static_image_mode': False,
+    'max_num_hands': 2,
+    'model_complexity': 1,          # 0 = lite model (faster), 1 = full model
+    'min_detection_confidence': 0.5,
+    'min_tracking_confidence': 0.5,
+}
+_mp = None                         # mediapipe module once imported
+_detector = None                   # Active detector once built (see set_detector)
+_detector_lock = threading.Lock()  # Guards building and running it (warm-up thread vs. main loop)
+_rebuild = {'config': None}       # MediaPipe settings being built in the background (configure_hands)
+_hands_overrides = {}             # Settings changed by configure_hands, applied on top of HANDS_CONFIG
 _tip_ids = [4, 8, 12, 16, 20]  # Indices of thumb, index, middle, ring, and pinky tips
+# Bones drawn by draw_hand_landmarks (MediaPipe's HAND_CONNECTIONS, without importing it)
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),            # Thumb
+    (0, 5), (5, 6), (6, 7), (7, 8),            # Index
+    (5, 9), (9, 10), (10, 11), (11, 12),       # Middle
+    (9, 13), (13, 14), (14, 15), (15, 16),     # Ring
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),  # Pinky and palm edge
+)
+_buffers = {}  # Reusable preprocessing arrays (see _buffer)
+
+# ROI tracking: crop inference to a window around the previous frame's hands
+ROI_PADDING = 0.5              # Window grows by this fraction of the bbox size on each side
+ROI_MIN_SIZE = 160             # Minimum window side in pixels
+ROI_RECENTER_MARGIN = 0.15     # Move the window only when a hand gets this close to its edge
+ROI_FULL_FRAME_INTERVAL = 30   # Force a full-frame search every N frames to pick up new hands
+_roi_state = {'window': None, 'frames': 0}
+
+# Angle-based finger states with hysteresis (see fingers_up_batch)
+_finger_joints = np.arange(1, 21).reshape(5, 4)  # Base-to-tip landmark ids per finger, thumb first
+FINGER_BEND_UP = np.array([35, 60, 60, 60, 60], np.float32)    # Total bend (deg) below which a finger turns up
+FINGER_BEND_DOWN = np.array([55, 90, 90, 90, 90], np.float32)  # Total bend (deg) above which a finger turns down
+_finger_state = {}  # hand key -> last [thumb..pinky] booleans
+
+# Per-frame geometry cache (see frame_geometry)
+GEOMETRY_MATRIX_PAIRS = 4  # Distinct pairs requested before the full 21x21 matrix is computed
+
+# Stable hand ids across frames (see track_hand_ids)
+HAND_MATCH_MAX_DIST = 150       # Max wrist movement (px) between frames for the same hand
+HAND_MATCH_LABEL_PENALTY = 80   # Extra cost (px) for matching across different handedness
+HAND_MAX_MISSED = 5             # Frames a lost hand keeps its id before it is dropped
+_hand_tracks = {'tracks': {}, 'next_id': 0}  # id -> {'wrist', 'label', 'missed'}
+HAND_ROLES = {"Right": "CURSOR", "Left": "PALETTE"}  # Default roles for assign_hand_roles
+
+# Skip-frame inference: detect every few frames and extrapolate in between (see track_landmarks)
+SKIP_INTERVAL = 2          # Run the detector at least every N frames (1 = every frame)
+SKIP_MAX_ERROR = 6.0       # Detect early when the expected extrapolation error (px) exceeds this
+SKIP_MAX_PREDICT = 0.1     # Never extrapolate further than this many seconds
+SKIP_VELOCITY_EMA = 0.5    # Weight of the newest velocity measurement
+_skip_state = {'lm': None, 'vel': None, 't': None, 'types': [], 'since': 0, 'error': 0.0}
+
+# Synthetic detector: a scripted hand cycling through the mouse mode poses
+SYNTHETIC_PERIOD = 120     # Frames per pose cycle
+SYNTHETIC_FPS = 30.0       # Frames per second of timestamps given to the synthetic and trace detectors
+SYNTHETIC_HAND_SIZE = 0.22 # One unit of _synthetic_hand as a fraction of the frame height
+SYNTHETIC_CURL_DEG = 75    # Bend at each of a curled finger's two middle joints
+# Open right hand as seen in the (mirrored) preview, wrist at the origin, y up the fingers
+_synthetic_hand = np.array([
+    [0.0, 0.0],
+    [-0.35, -0.15], [-0.55, -0.35], [-0.7, -0.5], [-0.85, -0.62],   # Thumb
+    [-0.25, -0.8], [-0.28, -1.1], [-0.3, -1.3], [-0.32, -1.48],     # Index
+    [0.0, -0.85], [0.0, -1.2], [0.0, -1.42], [0.0, -1.6],           # Middle
+    [0.22, -0.8], [0.25, -1.1], [0.27, -1.3], [0.28, -1.45],        # Ring
+    [0.42, -0.7], [0.48, -0.92], [0.52, -1.07], [0.55, -1.2],       # Pinky
+], np.float32)
+# (share of the cycle, curled fingers thumb first, thumb tip on the index PIP)
+_synthetic_poses = (
+    (0.5, (0, 0, 1, 1, 1), False),    # Point: cursor moves, brush draws
+    (0.15, (0, 0, 1, 1, 1), True),    # Pinch: click
+    (0.2, (1, 0, 0, 1, 1), False),    # Index + middle with the thumb down: scroll
+    (0.15, (0, 0, 0, 0, 0), False),   # Open hand
+)
+# Hands per count: (handedness, center x as a fraction of the width, sway amplitude)
+_synthetic_layout = {
+    1: [("Right", 0.5, 0.25)],
+    2: [("Right", 0.68, 0.12), ("Left", 0.3, 0.12)],
+}
+
+
+
+# ----------------- Hand Detectors -----------------
+# A detector is a dict like the mouse backends: process(img_rgb, timestamp)
+# returns a MediaPipe-style results object (multi_hand_landmarks with
+# normalized x, y, z, multi_handedness). Detectors with 'image' False ignore the
+# frame, follow the timestamp instead (the call count when it is None) and
+# report landmarks already in the coordinates of the displayed (mirrored) view.
+def _mediapipe_detector(**settings):
+    """MediaPipe Hands; settings override hands_config() keys (model_complexity, confidences, ...)."""
+    config = hands_config()
+    config.update(settings)
+    hands = _mediapipe().solutions.hands.Hands(**config)
+    return {'name': 'mediapipe', 'image': True, 'config': config,
+            'process': lambda img_rgb, timestamp=None: hands.process(img_rgb), 'close': hands.close}
+
+
+def _trace_detector(trace, loop=True):
+    """
+    Replays a landmark trace.
 
+    With timestamps, the recorded frame at the same time since the first call
+    is returned, so frames skipped by the caller are skipped in the trace too;
+    without, one recorded frame per call.
 
+    Args:
+        trace (str or dict): Trace file from main.py's 'r' key, or load_trace() output.
+        loop (bool): Start over at the end; otherwise report no hands from then on.
+    """
+    if isinstance(trace, str):
+        trace = tracef.load_trace(trace)
+    n = tracef.trace_length(trace)
+    w, h = (float(v) for v in trace['frame_size'])
+    scale = np.array([w, h, w], np.float32)
+    times = trace['timestamps'] - trace['timestamps'][0] if n else trace['timestamps']
+    # Frame period appended so a looped replay does not show the last frame twice
+    duration = float(times[-1]) + 1.0 / SYNTHETIC_FPS if n else 0.0
+    state = {'calls': 0, 't0': None}
+
+    def process(img_rgb, timestamp=None):
+        if timestamp is None:
+            i = state['calls']
+        else:
+            if state['t0'] is None:
+                state['t0'] = timestamp
+            t = timestamp - state['t0']
+            cycles = int(t // duration) if duration > 0 else 0
+            # Latest recorded frame at or before t (1 ms slack for rounding)
+            i = cycles * n + int(np.searchsorted(times, t - cycles * duration + 1e-3, side='right')) - 1
+        state['calls'] += 1
+        if n == 0 or (i >= n and not loop):
+            return _make_results(np.empty((0, 21, 3), np.float32), [])
+        _, lm_array, hand_types = tracef.trace_frame(trace, max(i, 0) % n)
+        return _make_results(lm_array / scale, hand_types)
+
+    return {'name': 'trace', 'image': False, 'process': process, 'close': lambda: None,
+            'frame_size': (int(w), int(h))}
 
-def find_hands(img, draw=True):
+
+def _synthetic_detector(frame_size=(640, 480), hands=1, period=SYNTHETIC_PERIOD, jitter=0.0, seed=0):
+    """
+    Generated hands that point, click, scroll and open in a fixed cycle while
+    sweeping across the frame. The pose follows the timestamp (frame
+    timestamp * SYNTHETIC_FPS), or the call count when none is given, so the
+    same frame always yields the same landmarks and skipped frames do not
+    slow the motion down.
+
+    Args:
+        frame_size (tuple): (width, height) the landmarks are generated for.
+        hands (int): 1 (right hand) or 2 (right and left, half a cycle apart).
+        period (int): Frames per pose cycle.
+        jitter (float): Std. dev. of Gaussian landmark noise in pixels.
+        seed (int): Noise seed.
+    """
+    w, h = frame_size
+    layout = _synthetic_layout[hands]
+    scale = np.array([w, h, w], np.float32)
+    state = {'calls': 0}
+
+    def process(img_rgb, timestamp=None):
+        i = state['calls'] if timestamp is None else timestamp * SYNTHETIC_FPS
+        state['calls'] += 1
+        lm_array = np.stack([
+            _synthetic_landmarks(i + k * period / 2, w, h, label, center, sway, period)
+            for k, (label, center, sway) in enumerate(layout)
+        ])
+        if jitter:
+            # Noise seeded by the frame, so it does not depend on which frames were skipped
+            rng = np.random.default_rng((seed, int(round(i))))
+            lm_array[..., :2] += rng.normal(0.0, jitter, lm_array[..., :2].shape)
+        return _make_results(lm_array / scale, [label for label, _, _ in layout])
+
+    return {'name': 'synthetic', 'image': False, 'process': process, 'close': lambda: None,
+            'frame_size': (w, h)}
+
+
+def _synthetic_landmarks(i, w, h, label, center, sway, period):
+    """(21, 3) pixel landmarks of one synthetic hand at frame i (may be fractional)."""
+    phase = (i % period) / period
+    for share, curled, pinch in _synthetic_poses:
+        if phase < share:
+            break
+        phase -= share
+    pts = _synthetic_hand.copy()
+    for finger, curl in enumerate(curled):
+        if not curl:
+            continue
+        chain = pts[_finger_joints[finger]]
+        bones = np.diff(chain, axis=0)
+        for k in (1, 2):   # Bend at the two joints finger_bend_angles measures
+            a = math.radians(SYNTHETIC_CURL_DEG * k)
+            bx, by = bones[k]
+            chain[k + 1] = chain[k] + (bx * math.cos(a) - by * math.sin(a), bx * math.sin(a) + by * math.cos(a))
+        pts[_finger_joints[finger]] = chain
+    if pinch:
+        pts[4] = pts[6] + (0.05, 0.0)
+        pts[3] = (pts[2] + pts[4]) / 2
+    if label == "Left":
+        pts[:, 0] = -pts[:, 0]
+
+    # Slow sideways sweep for the cursor, faster bob for scrolling
+    t = 2 * math.pi * i / period
+    wrist_x = w * (center + sway * math.sin(t / 2))
+    wrist_y = h * (0.8 + 0.07 * math.sin(3 * t))
+    size = SYNTHETIC_HAND_SIZE * h
+    lm = np.zeros((21, 3), np.float32)
+    lm[:, 0] = wrist_x + pts[:, 0] * size
+    lm[:, 1] = wrist_y + pts[:, 1] * size
+    return lm
+
+
+def _make_results(lm_norm, hand_types):
+    """Wraps normalized (n_hands, 21, 3) landmarks in a MediaPipe-style results object."""
+    if not len(lm_norm):
+        return SimpleNamespace(multi_hand_landmarks=None, multi_handedness=None)
+    return SimpleNamespace(
+        multi_hand_landmarks=[
+            SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in hand.tolist()])
+            for hand in lm_norm
+        ],
+        multi_handedness=[
+            SimpleNamespace(classification=[SimpleNamespace(index=i, score=1.0, label=label)])
+            for i, label in enumerate(hand_types)
+        ],
+    )
+
+
+_detectors = {
+    'mediapipe': _mediapipe_detector,
+    'trace': _trace_detector,
+    'synthetic': _synthetic_detector,
+}
+
+
+def set_detector(name, **options):
+    """
+    Selects the hand detector behind find_hands() and track_landmarks().
+
+    Everything downstream (landmarks, fingers, gestures, painting) runs
+    unchanged, so 'trace' and 'synthetic' benchmark those stages without a
+    camera, and 'mediapipe' configurations can be compared on the same input.
+
+    Args:
+        name (str): 'mediapipe' (default), 'trace' (replays a landmark trace) or
+            'synthetic' (deterministic generated hands).
+        **options: Passed to the detector factory, e.g. model_complexity=0 for
+            'mediapipe', trace='hands.npz' for 'trace', hands=2 for 'synthetic'.
+
+    Returns:
+        dict: The active detector.
+    """
+    global _detector
+    detector = _detectors[name](**options)
+    with _detector_lock:
+        _rebuild['config'] = None
+        if _detector is not None:
+            _detector['close']()
+        _detector = detector
+    reset_roi()
+    reset_skip_state()
+    return detector
+
+
+def configure_hands(background=False, **settings):
+    """
+    Changes MediaPipe Hands settings (keys of HANDS_CONFIG, e.g. model_complexity=0).
+
+    A running MediaPipe detector is rebuilt only when a value actually changes,
+    so this can be called every frame. A rebuilt detector starts without
+    tracking history. Other detectors keep running; the settings apply the next
+    time MediaPipe is built. HANDS_CONFIG itself is left as configured; see
+    hands_config() for the settings in effect.
+
+    Args:
+        background (bool): Build the new model on a daemon thread and swap it in
+            when ready; the current one keeps serving frames meanwhile, so the
+            rebuild does not stall the calling (vision) loop.
+        **settings: HANDS_CONFIG keys to change.
+
+    Returns:
+        bool: True if a rebuild was done (or started, with background).
+    """
+    global _detector
+    with _detector_lock:
+        _hands_overrides.update(settings)
+        if _detector is None or _detector['name'] != 'mediapipe':
+            return False
+        config = dict(_detector['config'], **settings)
+        pending = _rebuild['config']
+        if config == (_detector['config'] if pending is None else pending):
+            return False
+        if background:
+            _rebuild['config'] = config
+        else:
+            _rebuild['config'] = None
+            _detector['close']()
+            _detector = _mediapipe_detector(**config)
+    if background:
+        threading.Thread(target=_swap_in_detector, args=(config,), daemon=True).start()
+    else:
+        reset_roi()
+    return True
+
+
+def _swap_in_detector(config):
+    """Builds a MediaPipe detector off the calling thread and activates it unless superseded."""
+    global _detector
+    detector = _mediapipe_detector(**config)
+    with _detector_lock:
+        current = _rebuild['config'] == config and _detector is not None and _detector['name'] == 'mediapipe'
+        if current:
+            _rebuild['config'] = None
+            _detector['close']()
+            _detector, detector = detector, None
+    if detector is not None:
+        detector['close']()  # A newer configuration or another detector took over
+    else:
+        reset_roi()
+
+
+def hands_config():
+    """MediaPipe Hands settings in effect: HANDS_CONFIG with configure_hands() changes applied."""
+    return dict(HANDS_CONFIG, **_hands_overrides)
+
+
+def _mediapipe():
+    """Imports mediapipe on first use (it takes a second or more)."""
+    global _mp
+    if _mp is None:
+        import mediapipe
+        _mp = mediapipe
+    return _mp
+
+
+def _get_detector():
+    """Returns the active detector, building MediaPipe on first use. Call with _detector_lock held."""
+    global _detector
+    if _detector is None:
+        _detector = _mediapipe_detector()
+    return _detector
+
+
+def warm_up_hands(shape=(480, 640, 3), background=True):
+    """
+    Imports MediaPipe, builds Hands and runs it once on a blank frame, so the
+    first real frame does not pay for graph setup. Detectors that ignore the
+    frame are left untouched.
+
+    Args:
+        shape (tuple): Frame shape to warm up with (the camera's).
+        background (bool): Run on a daemon thread (e.g. while the camera opens);
+            find_hands() waits for it if called before it finishes.
+
+    Returns:
+        threading.Thread or None: The warm-up thread when background is True.
+    """
+    def warm_up():
+        with _detector_lock:
+            detector = _get_detector()
+            if detector['image']:
+                detector['process'](np.zeros(shape, np.uint8), None)
+        prof.startup_mark("model_ready")
+
+    if not background:
+        warm_up()
+        return None
+    thread = threading.Thread(target=warm_up, daemon=True)
+    thread.start()
+    return thread
+
+
+def find_hands(img, draw=True, track_roi=False, scale=1.0, mirror=False, timestamp=None):
     """
     Detects hand landmarks in a BGR image and optionally draws them.
     
     Args:
         img (numpy.ndarray): Input BGR image.
         draw (bool): If True, draw landmarks and connections on img.
+        track_roi (bool): If True, run inference only on a window around the
+            hands found in the previous frame. Landmarks are mapped back to
+            full-frame coordinates; after a miss the next frame searches the full image.
+        scale (float): Inference input is resized by this factor (< 1 is faster;
+            landmarks are normalized, so results are unchanged in form).
+        mirror (bool): img is the unflipped camera frame; landmark x and
+            handedness are mirrored so results match a flipped frame, without
+            flipping the image. Nothing is drawn (img is not the mirrored view);
+            use draw_hand_landmarks() on a mirror_frame() preview instead.
+            track_roi, scale and mirror only apply to detectors that look at
+            the image (see set_detector).
+        timestamp (float or None): Capture time; detectors that ignore the
+            image (trace, synthetic) take their frame from it.
     
     Returns:
         tuple:
@@ -30,16 +408,298 @@ def find_hands(img, draw=True):
             results (mediapipe.framework.formats.landmark_pb2.NormalizedLandmarkList):
                 Raw landmark detection results for further processing.
     """
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    results = _hands.process(img_rgb)
-    if draw and results.multi_hand_landmarks:
+    t = prof.tic()
+    with _detector_lock:
+        detector = _get_detector()
+        if not detector['image']:
+            results = detector['process'](None, timestamp)
+    if not detector['image']:
+        prof.toc("process", t)
+        if draw and not mirror and results.multi_hand_landmarks:
+            draw_hand_landmarks(img, find_landmarks(img, results)[0])
+        return img, results
+
+    window = _next_roi_window(img) if track_roi else None
+    src = img[window[1]:window[3], window[0]:window[2]] if window is not None else img
+    # Converted and resized into reused buffers: no per-frame allocation
+    img_rgb = cv2.cvtColor(src, cv2.COLOR_BGR2RGB, dst=_buffer('rgb', src.shape, np.uint8))
+    if scale < 1.0:
+        h, w = src.shape[:2]
+        size = (max(int(w * scale), 1), max(int(h * scale), 1))
+        img_rgb = cv2.resize(img_rgb, size, dst=_buffer('rgb_scaled', (size[1], size[0], 3), np.uint8),
+                             interpolation=cv2.INTER_AREA)
+    t = prof.toc("cvtColor", t)
+    with _detector_lock:
+        results = _get_detector()['process'](img_rgb, timestamp)
+    prof.toc("process", t)
+
+    if window is not None and results.multi_hand_landmarks:
+        _map_roi_landmarks(results, window, img.shape)
+    if track_roi:
+        _update_roi_window(results, img.shape)   # In the coordinates of img
+    if mirror:
+        _mirror_results(results)
+
+    if draw and not mirror and results.multi_hand_landmarks:
         for hand_lms in results.multi_hand_landmarks:
-            _mp_draw.draw_landmarks(
-                img, hand_lms, _mp_hands.HAND_CONNECTIONS
+            _mediapipe().solutions.drawing_utils.draw_landmarks(
+                img, hand_lms, _mediapipe().solutions.hands.HAND_CONNECTIONS
             )
     return img, results
 
 
+def _buffer(name, shape, dtype):
+    """Reusable array for preprocessing; reallocated only when the shape changes."""
+    buf = _buffers.get(name)
+    if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+        buf = _buffers[name] = np.empty(shape, dtype)
+    return buf
+
+
+def mirror_frame(img):
+    """
+    Flips a frame horizontally into a reused buffer.
+
+    The result is overwritten by the next call, so use it before then
+    (e.g. as the preview of the current frame).
+    """
+    return cv2.flip(img, 1, dst=_buffer('mirror', img.shape, img.dtype))
+
+
+def _mirror_results(results):
+    """Mirrors landmark x and swaps handedness, as if the frame had been flipped."""
+    for hand in results.multi_hand_landmarks or []:
+        for lm in hand.landmark:
+            lm.x = 1.0 - lm.x
+    for hand_hm in results.multi_handedness or []:
+        c = hand_hm.classification[0]
+        c.label = "Left" if c.label == "Right" else "Right"
+
+
+def draw_hand_landmarks(img, lm_array):
+    """
+    Draws hand connections and landmarks from a landmark array.
+
+    Works for any (n_hands, 21, 3) array, including mirrored or extrapolated
+    landmarks that have no MediaPipe results to draw from.
+    """
+    for hand in np.asarray(lm_array)[..., :2].astype(int):
+        for a, b in HAND_CONNECTIONS:
+            cv2.line(img, (int(hand[a][0]), int(hand[a][1])), (int(hand[b][0]), int(hand[b][1])),
+                     (224, 224, 224), 2)
+        for x, y in hand:
+            cv2.circle(img, (int(x), int(y)), 4, (0, 0, 255), cv2.FILLED)
+
+
+def reset_roi():
+    """Forget the tracked window so the next find_hands() searches the full frame."""
+    _roi_state['window'] = None
+    _roi_state['frames'] = 0
+
+
+def _next_roi_window(img):
+    """Returns the crop window for this frame, or None for a full-frame search."""
+    _roi_state['frames'] += 1
+    if _roi_state['frames'] >= ROI_FULL_FRAME_INTERVAL:
+        _roi_state['frames'] = 0
+        return None
+    window = _roi_state['window']
+    if window is None:
+        return None
+    h, w = img.shape[:2]
+    if window[2] - window[0] >= w and window[3] - window[1] >= h:
+        return None
+    return window
+
+
+def _map_roi_landmarks(results, window, shape):
+    """Rewrites normalized crop coordinates as normalized full-frame coordinates."""
+    x0, y0, x1, y1 = window
+    h, w = shape[:2]
+    sx, sy = (x1 - x0) / w, (y1 - y0) / h
+    ox, oy = x0 / w, y0 / h
+    for hand in results.multi_hand_landmarks:
+        for lm in hand.landmark:
+            lm.x = lm.x * sx + ox
+            lm.y = lm.y * sy + oy
+            lm.z = lm.z * sx
+
+
+def _update_roi_window(results, shape):
+    """Keeps the crop window around all detected hands, or drops it after a miss."""
+    if not results.multi_hand_landmarks:
+        _roi_state['window'] = None
+        return
+
+    h, w = shape[:2]
+    xs = [lm.x for hand in results.multi_hand_landmarks for lm in hand.landmark]
+    ys = [lm.y for hand in results.multi_hand_landmarks for lm in hand.landmark]
+    xmin, xmax = min(xs) * w, max(xs) * w
+    ymin, ymax = min(ys) * h, max(ys) * h
+
+    # Keep the current window while the hands sit comfortably inside it, so
+    # MediaPipe's own frame-to-frame tracking sees a stable crop offset.
+    window = _roi_state['window']
+    if window is not None:
+        wx0, wy0, wx1, wy1 = window
+        mx = (wx1 - wx0) * ROI_RECENTER_MARGIN
+        my = (wy1 - wy0) * ROI_RECENTER_MARGIN
+        if (xmin >= wx0 + mx and xmax <= wx1 - mx and
+                ymin >= wy0 + my and ymax <= wy1 - my):
+            return
+
+    bw, bh = xmax - xmin, ymax - ymin
+    side_x = max(bw * (1 + 2 * ROI_PADDING), ROI_MIN_SIZE)
+    side_y = max(bh * (1 + 2 * ROI_PADDING), ROI_MIN_SIZE)
+    cx, cy = (xmin + xmax) / 2, (ymin + ymax) / 2
+    x0 = int(max(0, cx - side_x / 2))
+    y0 = int(max(0, cy - side_y / 2))
+    x1 = int(min(w, cx + side_x / 2))
+    y1 = int(min(h, cy + side_y / 2))
+    _roi_state['window'] = (x0, y0, x1, y1)
+
+
+# Extract landmark arrays for all hands
+def find_landmarks(img, results, drawLM=False, drawBBox=False):
+    """
+    Extracts sub-pixel landmark coordinates for all detected hands as one array.
+
+    Args:
+        img (numpy.ndarray): Input BGR image (for scale and drawing).
+        results: Output from find_hands(), containing multi_hand_landmarks.
+        drawLM (bool): If True, draw small circles at each landmark.
+        drawBBox (bool): If True, draw each hand's bounding box.
+
+    Returns:
+        tuple:
+            lm_array (numpy.ndarray): (n_hands, 21, 3) float32 of pixel x, y and z
+                (z uses the same scale as x, as in MediaPipe).
+            bboxes (numpy.ndarray): (n_hands, 4) float32 of xmin, ymin, xmax, ymax.
+    """
+    hands = results.multi_hand_landmarks or []
+    lm_array = np.empty((len(hands), 21, 3), np.float32)
+    for i, hand in enumerate(hands):
+        lm_array[i] = np.fromiter(
+            (v for lm in hand.landmark for v in (lm.x, lm.y, lm.z)),
+            np.float32, count=63
+        ).reshape(21, 3)
+    h, w = img.shape[:2]
+    lm_array *= np.array([w, h, w], np.float32)
+    bboxes = landmarks_bbox(lm_array)
+
+    if drawLM:
+        for x, y in lm_array[..., :2].reshape(-1, 2).astype(int):
+            cv2.circle(img, (int(x), int(y)), 5, (255, 0, 255), cv2.FILLED)
+    if drawBBox:
+        for xmin, ymin, xmax, ymax in bboxes.astype(int):
+            cv2.rectangle(img, (int(xmin) - 20, int(ymin) - 20),
+                          (int(xmax) + 20, int(ymax) + 20), (0, 255, 0), 2)
+    return lm_array, bboxes
+
+
+def landmarks_bbox(lm_array):
+    """
+    Bounding boxes of one or more hands.
+
+    Args:
+        lm_array (numpy.ndarray): (21, 3) or (n_hands, 21, 3) landmark array.
+
+    Returns:
+        numpy.ndarray: (4,) or (n_hands, 4) of xmin, ymin, xmax, ymax.
+    """
+    xy = lm_array[..., :2]
+    return np.concatenate((xy.min(axis=-2), xy.max(axis=-2)), axis=-1)
+
+
+def landmark_xy(lm_list, idx):
+    """
+    Returns (x, y) of one landmark from either representation:
+    an lm_list of [id, x, y] rows or a (21, 3) landmark array.
+    """
+    if isinstance(lm_list, np.ndarray):
+        return lm_list[idx, 0], lm_list[idx, 1]
+    return lm_list[idx][1], lm_list[idx][2]
+
+
+def to_lm_list(hand_array):
+    """Converts one (21, 3) landmark array to the [id, x, y] integer lm_list format."""
+    xy = hand_array[:, :2].astype(int)
+    return np.column_stack((np.arange(len(xy)), xy)).tolist()
+
+
+def track_landmarks(img, timestamp, interval=SKIP_INTERVAL, draw=False, track_roi=False, scale=1.0,
+                    mirror=False):
+    """
+    Landmarks for every frame while running the detector only on some of them.
+
+    The detector runs every `interval` frames, earlier when the expected
+    extrapolation error passes SKIP_MAX_ERROR, and on every frame while no hand
+    is found. In between, each landmark moves along its velocity measured
+    between the last two detections, so cursor updates keep the camera rate.
+
+    Args:
+        img (numpy.ndarray): BGR frame.
+        timestamp (float): Capture time of the frame in seconds.
+        interval (int): Detect at least every N frames (1 = always).
+        draw (bool): Draw landmarks (detected frames only).
+        track_roi, scale, mirror: Passed to find_hands() (with mirror, nothing is drawn).
+
+    Returns:
+        tuple:
+            lm_array (numpy.ndarray): (n_hands, 21, 3) pixel landmarks.
+            hand_types (list of str): Handedness per hand.
+            detected (bool): True if the detector ran on this frame.
+    """
+    st = _skip_state
+    if st['lm'] is not None and len(st['lm']) and st['since'] + 1 < interval:
+        t = prof.tic()
+        dt = min(timestamp - st['t'], SKIP_MAX_PREDICT)
+        if st['error'] * (st['since'] + 1) <= SKIP_MAX_ERROR and dt >= 0:
+            st['since'] += 1
+            lm_array = st['lm'] + st['vel'] * dt
+            prof.toc("predict", t)
+            return lm_array, list(st['types']), False
+
+    img, results = find_hands(img, draw=draw, track_roi=track_roi, scale=scale, mirror=mirror,
+                              timestamp=timestamp)
+    t = prof.tic()
+    lm_array, _ = find_landmarks(img, results, drawLM=draw and not mirror)
+    hand_types = get_hand_types(results)
+    _update_skip_state(lm_array, hand_types, timestamp)
+    prof.toc("landmarks", t)
+    return lm_array, hand_types, True
+
+
+def _update_skip_state(lm_array, hand_types, timestamp):
+    """Measures landmark velocities and the extrapolation error at a detection."""
+    st = _skip_state
+    prev, prev_t = st['lm'], st['t']
+    vel = np.zeros_like(lm_array)
+    error = 0.0
+    if prev is not None and len(prev) == len(lm_array) and len(lm_array) and timestamp > prev_t:
+        if len(lm_array) == 2:
+            # Keep hands paired by wrist, MediaPipe may swap their order
+            straight = np.abs(prev[:, 0, :2] - lm_array[:, 0, :2]).sum()
+            swapped = np.abs(prev[::-1, 0, :2] - lm_array[:, 0, :2]).sum()
+            if swapped < straight:
+                prev = prev[::-1]
+                st['vel'] = st['vel'][::-1]
+        dt = timestamp - prev_t
+        # Error of one extrapolated frame, scaled to a single frame step
+        predicted = prev + st['vel'] * dt
+        error = float(np.abs(predicted[..., :2] - lm_array[..., :2]).mean()) / max(st['since'] + 1, 1)
+        measured = (lm_array - prev) / dt
+        vel = SKIP_VELOCITY_EMA * measured + (1 - SKIP_VELOCITY_EMA) * st['vel']
+    elif len(lm_array):
+        error = float('inf')     # New or lost hand: detect again next frame
+    st.update(lm=lm_array, vel=vel, t=timestamp, types=list(hand_types), since=0, error=error)
+
+
+def reset_skip_state():
+    """Forgets the last detection, so the next track_landmarks() call runs the detector."""
+    _skip_state.update(lm=None, vel=None, t=None, types=[], since=0, error=0.0)
+
+
 # Extract pixel coordinates for one hand
 def find_positions(img, results, hand_no=0, drawLM=True, drawBBox=True):
     """
@@ -56,24 +716,18 @@ def find_positions(img, results, hand_no=0, drawLM=True, drawBBox=True):
             lm_list (list of [id, x, y]): Pixel coordinates of each landmark.
             bbox (tuple): (xmin, ymin, xmax, ymax) bounding box of the hand.
     """
-    lm_list, x_list, y_list = [], [], []
-    if not results.multi_hand_landmarks or hand_no >= len(results.multi_hand_landmarks):
+    all_lm_lists, all_bboxes = find_positions_multi(img, results, drawLM=False, drawBBox=False)
+    if hand_no >= len(all_lm_lists):
         return [], ()
-    hand = results.multi_hand_landmarks[hand_no]
-    h, w, _ = img.shape
-    for idx, lm in enumerate(hand.landmark):
-        x, y = int(lm.x * w), int(lm.y * h)  # put into pixel scale
-        lm_list.append([idx, x, y])
-        x_list.append(x)
-        y_list.append(y)
-        if drawLM:
+    lm_list, bbox = all_lm_lists[hand_no], all_bboxes[hand_no]
+    if drawLM:
+        for _, x, y in lm_list:
             cv2.circle(img, (x, y), 5, (255, 0, 255), cv2.FILLED)
-    xmin, xmax = min(x_list), max(x_list)
-    ymin, ymax = min(y_list), max(y_list)
+    xmin, ymin, xmax, ymax = bbox
     if drawBBox:
         cv2.rectangle(img, (xmin - 20, ymin - 20),
                       (xmax + 20, ymax + 20), (0, 255, 0), 2)
-    return lm_list, (xmin, ymin, xmax, ymax)
+    return lm_list, bbox
 
 
 
@@ -86,33 +740,18 @@ def find_positions_multi(img, results, drawLM=True, drawBBox=True):
         all_lm_lists: List of lm_list for each hand.
         all_bboxes:   List of bbox tuples for each hand.
     """
-    all_lm_lists = []
-    all_bboxes  = []
-
-    if not results.multi_hand_landmarks:
-        return all_lm_lists, all_bboxes
+    lm_array, _ = find_landmarks(img, results)
+    all_lm_lists = [to_lm_list(hand) for hand in lm_array]
+    all_bboxes = [tuple(landmarks_bbox(hand[:, :2].astype(int)).tolist()) for hand in lm_array]
 
-    h, w, _ = img.shape
-    for hand in results.multi_hand_landmarks:
-        lm_list, x_list, y_list = [], [], []
-        for idx, lm in enumerate(hand.landmark):
-            px, py = int(lm.x * w), int(lm.y * h)
-            lm_list.append([idx, px, py])
-            x_list.append(px)
-            y_list.append(py)
-            if drawLM:
+    for lm_list, (xmin, ymin, xmax, ymax) in zip(all_lm_lists, all_bboxes):
+        if drawLM:
+            for _, px, py in lm_list:
                 cv2.circle(img, (px, py), 5, (255, 0, 255), cv2.FILLED)
-
-        xmin, xmax = min(x_list), max(x_list)
-        ymin, ymax = min(y_list), max(y_list)
-        bbox = (xmin, ymin, xmax, ymax)
         if drawBBox:
             cv2.rectangle(img, (xmin - 20, ymin - 20),
                           (xmax + 20, ymax + 20), (0, 255, 0), 2)
 
-        all_lm_lists.append(lm_list)
-        all_bboxes.append(bbox)
-
     return all_lm_lists, all_bboxes
 
 
@@ -122,21 +761,23 @@ def fingers_up_single(lm_list, hand_type="Right"):
     Determines which fingers are raised for a single hand.
     Returns [thumb, index, middle, ring, pinky].
     """
-    if not lm_list or len(lm_list) <= max(_tip_ids):
+    if len(lm_list) <= max(_tip_ids):
         return [0, 0, 0, 0, 0]
 
     fingers = []
 
     # Thumb: compare x based on hand side
+    thumb_x = landmark_xy(lm_list, _tip_ids[0])[0]
+    thumb_ip_x = landmark_xy(lm_list, _tip_ids[0] - 1)[0]
     if hand_type == "Left":
-        fingers.append(1 if lm_list[_tip_ids[0]][1] > lm_list[_tip_ids[0] - 1][1] else 0)
+        fingers.append(1 if thumb_x > thumb_ip_x else 0)
     else:
-        fingers.append(1 if lm_list[_tip_ids[0]][1] < lm_list[_tip_ids[0] - 1][1] else 0)
+        fingers.append(1 if thumb_x < thumb_ip_x else 0)
 
     # Other fingers: tip y < pip y → finger is up
     for i in range(1, 5):
-        tip_y = lm_list[_tip_ids[i]][2]
-        pip_y = lm_list[_tip_ids[i] - 2][2]
+        tip_y = landmark_xy(lm_list, _tip_ids[i])[1]
+        pip_y = landmark_xy(lm_list, _tip_ids[i] - 2)[1]
         fingers.append(1 if tip_y < pip_y else 0)
 
     return fingers
@@ -150,7 +791,7 @@ def fingers_up(all_hands_lm, hand_types=None, mode="first"):
     mode="all"   → returns list of lists.
     """
     # No hands detected
-    if not all_hands_lm:
+    if len(all_hands_lm) == 0:
         return [] if mode == "all" else [0, 0, 0, 0, 0]
 
     n_hands = len(all_hands_lm)
@@ -172,12 +813,71 @@ def fingers_up(all_hands_lm, hand_types=None, mode="first"):
 
 
 
+# Determine raised fingers for all hands from joint angles
+def finger_bend_angles(lm_array):
+    """
+    Total bend of each finger in degrees, for all hands in one pass.
+
+    The bend is the sum of the angles between consecutive bones at the two
+    middle joints (PIP and DIP; MCP and IP for the thumb). A straight finger is near 0.
+
+    Args:
+        lm_array (numpy.ndarray): (n_hands, 21, 3) output from find_landmarks().
+
+    Returns:
+        numpy.ndarray: (n_hands, 5) float32 bend angles, thumb first.
+    """
+    pts = lm_array[:, _finger_joints]                   # (n, 5, 4, 3)
+    bones = np.diff(pts, axis=2)                        # (n, 5, 3, 3)
+    a, b = bones[:, :, :-1], bones[:, :, 1:]            # Consecutive bone pairs
+    cos = (a * b).sum(-1) / (np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1) + 1e-6)
+    return np.degrees(np.arccos(np.clip(cos, -1.0, 1.0))).sum(-1)
+
+
+def fingers_up_batch(lm_array, hand_keys=None, state=None):
+    """
+    Determines raised fingers for all hands at once using joint angles.
+
+    A finger turns up when its bend drops below FINGER_BEND_UP and turns down
+    when it exceeds FINGER_BEND_DOWN; in between it keeps its previous state,
+    which stops the flicker of the tip-vs-PIP comparison near the threshold.
+    Angles do not depend on hand orientation, so no hand types are needed.
+
+    Args:
+        lm_array (numpy.ndarray): (n_hands, 21, 3) output from find_landmarks().
+        hand_keys (list or None): Key per hand for carrying state across frames
+            (defaults to the hand index).
+        state (dict or None): Hysteresis state; defaults to the module-level state.
+
+    Returns:
+        list of lists: [thumb, index, middle, ring, pinky] per hand, like fingers_up(mode="all").
+    """
+    if state is None:
+        state = _finger_state
+    if len(lm_array) == 0:
+        state.clear()
+        return []
+    if hand_keys is None:
+        hand_keys = range(len(lm_array))
+
+    bend = finger_bend_angles(lm_array)
+    up_now = bend < FINGER_BEND_UP
+    down_now = bend > FINGER_BEND_DOWN
+    prev = np.array([state.get(key, up_now[i]) for i, key in enumerate(hand_keys)])
+    fingers = up_now | (prev & ~down_now)
+
+    state.clear()
+    state.update(zip(hand_keys, fingers))
+    return fingers.astype(int).tolist()
+
+
 def find_distance(lm_list, p1, p2, img=None, draw=True, r=15, t=3):
     """
     Computes Euclidean distance between two landmark points and optionally visualizes it.
     
     Args:
-        lm_list (list of [id, x, y]): Output from find_positions().
+        lm_list (list of [id, x, y] or numpy.ndarray): Output from find_positions(),
+            or one (21, 3) hand from find_landmarks().
         p1, p2 (int): Landmark IDs to measure between.
         img (numpy.ndarray or None): Image for drawing (optional).
         draw (bool): If True and img provided, draw line & circles.
@@ -189,12 +889,13 @@ def find_distance(lm_list, p1, p2, img=None, draw=True, r=15, t=3):
             length (float): Euclidean distance between the two points.
             info (list): [x1, y1, x2, y2, cx, cy] coordinates of measurement.
     """
-    if not lm_list:
+    if len(lm_list) == 0:
         return 0, []
-    x1, y1 = lm_list[p1][1], lm_list[p1][2]
-    x2, y2 = lm_list[p2][1], lm_list[p2][2]
+    fx1, fy1 = landmark_xy(lm_list, p1)
+    fx2, fy2 = landmark_xy(lm_list, p2)
+    length = math.hypot(fx2 - fx1, fy2 - fy1)
+    x1, y1, x2, y2 = int(fx1), int(fy1), int(fx2), int(fy2)
     cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
-    length = math.hypot(x2 - x1, y2 - y1)
     if draw and img is not None:
         cv2.line(img, (x1, y1), (x2, y2), (255, 0, 255), t)
         cv2.circle(img, (x1, y1), r, (255, 0, 255), cv2.FILLED)
@@ -203,18 +904,112 @@ def find_distance(lm_list, p1, p2, img=None, draw=True, r=15, t=3):
     return length, [x1, y1, x2, y2, cx, cy]
 
 
-def classify_gesture(fingers):
+# Per-frame landmark geometry
+def frame_geometry(lm_list):
+    """
+    Creates a per-frame geometry cache for one hand.
+
+    Distances and midpoints are computed lazily and memoized, so the click,
+    drag and scroll logic can ask for the same pairs without recomputing them.
+    Once GEOMETRY_MATRIX_PAIRS distinct pairs are requested, the full 21x21
+    distance matrix is computed in one vectorized step. Create a new cache for
+    every frame; nothing carries over.
+
+    Args:
+        lm_list (list of [id, x, y] or numpy.ndarray): One hand from
+            find_positions() or find_landmarks(); may be empty.
+
+    Returns:
+        dict: Geometry cache for geometry_distance(), geometry_midpoint()
+            and geometry_matrix().
+    """
+    if len(lm_list) == 0:
+        pts = None
+    elif isinstance(lm_list, np.ndarray):
+        pts = lm_list[:, :2].astype(np.float32)
+    else:
+        pts = np.array([row[1:3] for row in lm_list], np.float32)
+    return {'pts': pts, 'dist': {}, 'info': {}, 'matrix': None}
+
+
+def geometry_matrix(geo):
+    """Full pairwise distance matrix (21x21) of the hand, computed once per frame."""
+    if geo['matrix'] is None and geo['pts'] is not None:
+        diff = geo['pts'][:, None, :] - geo['pts'][None, :, :]
+        geo['matrix'] = np.sqrt((diff * diff).sum(-1))
+    return geo['matrix']
+
+
+def geometry_midpoint(geo, p1, p2):
+    """Sub-pixel midpoint (x, y) between two landmarks, or None without a hand."""
+    if geo['pts'] is None:
+        return None
+    cx, cy = (geo['pts'][p1] + geo['pts'][p2]) / 2
+    return float(cx), float(cy)
+
+
+def geometry_distance(geo, p1, p2, img=None, draw=False, r=15, t=3):
+    """
+    Cached equivalent of find_distance() for a frame_geometry() cache.
+
+    Returns:
+        tuple:
+            length (float): Euclidean distance between the two points.
+            info (list): [x1, y1, x2, y2, cx, cy] coordinates of measurement.
+    """
+    if geo['pts'] is None:
+        return 0, []
+    key = (p1, p2) if p1 <= p2 else (p2, p1)
+    length = geo['dist'].get(key)
+    if length is None:
+        if geo['matrix'] is None and len(geo['dist']) + 1 >= GEOMETRY_MATRIX_PAIRS:
+            geometry_matrix(geo)
+        if geo['matrix'] is not None:
+            length = float(geo['matrix'][p1, p2])
+        else:
+            dx, dy = geo['pts'][p2] - geo['pts'][p1]
+            length = math.hypot(dx, dy)
+        geo['dist'][key] = length
+
+    info = geo['info'].get((p1, p2))
+    if info is None:
+        x1, y1 = int(geo['pts'][p1][0]), int(geo['pts'][p1][1])
+        x2, y2 = int(geo['pts'][p2][0]), int(geo['pts'][p2][1])
+        info = [x1, y1, x2, y2, (x1 + x2) // 2, (y1 + y2) // 2]
+        geo['info'][(p1, p2)] = info
+
+    if draw and img is not None:
+        x1, y1, x2, y2, cx, cy = info
+        cv2.line(img, (x1, y1), (x2, y2), (255, 0, 255), t)
+        cv2.circle(img, (x1, y1), r, (255, 0, 255), cv2.FILLED)
+        cv2.circle(img, (x2, y2), r, (255, 0, 255), cv2.FILLED)
+        cv2.circle(img, (cx, cy), r, (0, 0, 255), cv2.FILLED)
+    return length, info
+
+
+def classify_gesture(fingers, lm=None, hand_type=None, library=None):
     """
     Classifies common static hand gestures based on finger states.
+
+    With a template library (TemplateFunctions) and the hand's landmarks, the
+    nearest recorded template wins when it is close enough; otherwise the
+    finger pattern decides.
     
     Args:
         fingers (list of int): Output from fingers_up().
+        lm (numpy.ndarray or None): (21, 3) landmarks of the same hand.
+        hand_type (str or None): "Left" or "Right" (left hands are mirrored for matching).
+        library (dict or None): Template library from TemplateFunctions.
     
     Returns:
         str: Name of detected gesture.
     """
     if not fingers:
         return "No Hand"
+    if library is not None and lm is not None and len(lm):
+        name = tmpl.classify_templates(library, lm, None if hand_type is None else [hand_type])[0]
+        if name is not None:
+            return name
     patterns = {
         (0,0,0,0,0): "Fist",
         (1,1,1,1,1): "Open Hand",
@@ -227,6 +1022,25 @@ def classify_gesture(fingers):
     return patterns.get(tuple(fingers), f"Custom ({sum(fingers)} up)")
 
 
+def classify_gestures(lm_array, fingers_all, hand_types=None, library=None):
+    """
+    classify_gesture() for all hands of a frame, matching templates in one pass.
+
+    Args:
+        lm_array (numpy.ndarray): (n_hands, 21, 3) output from find_landmarks().
+        fingers_all (list): Finger states per hand, e.g. from fingers_up_batch().
+        hand_types (list of str or None): Handedness per hand.
+        library (dict or None): Template library from TemplateFunctions.
+
+    Returns:
+        list of str: Gesture name per hand.
+    """
+    names = [None] * len(fingers_all)
+    if library is not None and len(lm_array):
+        names = tmpl.classify_templates(library, lm_array, hand_types)
+    return [name or classify_gesture(fingers) for name, fingers in zip(names, fingers_all)]
+
+
 def get_hand_types(results):
     """
     Returns detected hand types (Left/Right) for all hands in a frame.
@@ -243,3 +1057,92 @@ def get_hand_types(results):
             original = hand_hm.classification[0].label
             types.append(original)    
     return types
+
+
+
+def track_hand_ids(lm_array, hand_types=None, state=None):
+    """
+    Gives each detected hand an id that stays the same across frames.
+
+    MediaPipe may list the hands in a different order every frame. Hands are
+    matched to the previous frame's hands by wrist distance, with a penalty for
+    a handedness change; pairs are taken cheapest first, which is exact for the
+    two hands MediaPipe reports. Unmatched hands get new ids, and a hand that
+    disappears keeps its id for HAND_MAX_MISSED frames.
+
+    Args:
+        lm_array (numpy.ndarray): (n_hands, 21, 3) output from find_landmarks().
+        hand_types (list or None): Labels from get_hand_types(), same order.
+        state (dict or None): Tracker state; defaults to the module-level state.
+
+    Returns:
+        list of int: Id per hand in lm_array order.
+    """
+    if state is None:
+        state = _hand_tracks
+    tracks = state['tracks']
+    n = len(lm_array)
+    labels = list(hand_types or []) + [None] * (n - len(hand_types or []))
+    ids = [None] * n
+
+    if n and tracks:
+        track_ids = list(tracks)
+        wrists = np.asarray(lm_array)[:, 0, :2]
+        prev = np.array([tracks[tid]['wrist'] for tid in track_ids], np.float32)
+        cost = np.sqrt(((wrists[:, None, :] - prev[None, :, :]) ** 2).sum(-1))
+        for i in range(n):
+            for j, tid in enumerate(track_ids):
+                if labels[i] is not None and tracks[tid]['label'] not in (None, labels[i]):
+                    cost[i, j] += HAND_MATCH_LABEL_PENALTY
+        used = set()
+        for flat in np.argsort(cost, axis=None):
+            i, j = divmod(int(flat), len(track_ids))
+            if cost[i, j] > HAND_MATCH_MAX_DIST:
+                break
+            if ids[i] is None and j not in used:
+                ids[i] = track_ids[j]
+                used.add(j)
+
+    for i in range(n):
+        if ids[i] is None:
+            ids[i] = state['next_id']
+            state['next_id'] += 1
+        tracks[ids[i]] = {'wrist': tuple(float(v) for v in lm_array[i][0][:2]),
+                          'label': labels[i], 'missed': 0}
+
+    seen = set(ids)
+    for tid in list(tracks):
+        if tid not in seen:
+            tracks[tid]['missed'] += 1
+            if tracks[tid]['missed'] > HAND_MAX_MISSED:
+                del tracks[tid]
+    return ids
+
+
+def reset_hand_ids(state=None):
+    """Forgets all tracked hands; the next hands get fresh ids."""
+    if state is None:
+        state = _hand_tracks
+    state['tracks'].clear()
+
+
+def assign_hand_roles(hand_types, roles=HAND_ROLES):
+    """
+    Picks which hand plays which role.
+
+    Args:
+        hand_types (list): Labels from get_hand_types().
+        roles (dict): Handedness label -> role name, e.g. {"Right": "CURSOR", "Left": "PALETTE"}.
+
+    Returns:
+        dict: role -> index into the frame's hands. With a single hand, that
+            hand takes every role, so one-handed use keeps working.
+    """
+    if len(hand_types) == 1:
+        return {role: 0 for role in roles.values()}
+    assigned = {}
+    for i, label in enumerate(hand_types):
+        role = roles.get(label)
+        if role is not None and role not in assigned:
+            assigned[role] = i
+    return assigned
@@ -2,6 +2,7 @@ import cv2
 import mediapipe as mp
 import time
 import HandTrackingFunctions
+import TemplateFunctions
 import math
 
 cap = cv2.VideoCapture(0)
@@ -11,6 +12,9 @@ mpHands = mp.solutions.hands
 hands = mpHands.Hands()
 mpDraw = mp.solutions.drawing_utils
 
+# Recorded gesture templates ('t' adds the first hand's pose, 'w' saves them)
+templates = TemplateFunctions.load_templates()
+
 pTime = 0
 cTime = 0
 
@@ -24,6 +28,7 @@ while True:
         img, results, drawBBox=False
     )
     hand_types = HandTrackingFunctions.get_hand_types(results)
+    lm_array, _ = HandTrackingFunctions.find_landmarks(img, results)
 
     # Draw detected hand types
     if hand_types:
@@ -39,9 +44,9 @@ while True:
     if mode == "first":
         fingers_states = [fingers_states]
 
-    for lm_list, fingers, hand_type in zip(all_lm_lists, fingers_states, hand_types):
-        # 1. Classify gesture
-        gesture_name = HandTrackingFunctions.classify_gesture(fingers)
+    for lm_list, fingers, hand_type, lm in zip(all_lm_lists, fingers_states, hand_types, lm_array):
+        # 1. Classify gesture (recorded templates first, then finger pattern)
+        gesture_name = HandTrackingFunctions.classify_gesture(fingers, lm, hand_type, templates)
 
         # 2. Draw gesture label near wrist (landmark 0)
         if lm_list:
@@ -61,7 +66,8 @@ while True:
                         
     for lm_list in all_lm_lists:
         if len(lm_list) > 8:  # ensure both landmarks exist
-            length, info = HandTrackingFunctions.find_distance(lm_list, 4, 8, img=img, draw=True)
+            geo = HandTrackingFunctions.frame_geometry(lm_list)
+            length, info = HandTrackingFunctions.geometry_distance(geo, 4, 8, img=img, draw=True)
 
             # Display distance value on screen
             cv2.putText(
@@ -81,8 +87,16 @@ while True:
     cv2.putText(img, str(int(fps)), (10, 70), cv2.FONT_HERSHEY_PLAIN, 3,(255, 0, 255), 3)
 
     cv2.imshow("Image", img)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+    key = cv2.waitKey(1) & 0xFF
+    if key == ord('q'):
         break
+    elif key == ord('t') and len(lm_array):
+        name = input("Template name: ").strip()
+        if name:
+            TemplateFunctions.add_template(templates, name, lm_array[:1], hand_types[:1])
+    elif key == ord('w'):
+        TemplateFunctions.save_templates(templates)
+        print(f"Saved {len(templates['labels'])} templates to {TemplateFunctions.TEMPLATE_FILE}")
 
 cap.release()           
 cv2.destroyAllWindows() 
\ No newline at end of file
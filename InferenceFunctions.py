@@ -0,0 +1,250 @@
+import os
+import queue
+import time
+import multiprocessing
+from collections import deque
+import numpy as np
+import HandTrackingFunctions as htf
+import FrameRingFunctions as ring_f
+
+# ----------------- Configuration -----------------
+INFERENCE_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Leave one core for capture and gestures
+INFERENCE_QUEUE_SIZE = 2    # Frames waiting per worker before submit_frame() blocks
+RESULT_TIMEOUT = 5.0        # Seconds to wait for a frame's result before giving up on it
+SUBMIT_TIMEOUT = 5.0        # Seconds submit_frame() waits on a full worker before trying the next
+SUBMIT_POLL = 0.1           # Interval for checking that a worker being waited on is still alive
+
+
+
+# ----------------- Worker Process -----------------
+def _inference_worker(jobs, results, config, ring_spec, mirror):
+    """
+    Runs one Hands instance: (seq, timestamp, frame) jobs in, landmark results
+    out. With a frame ring, frame is a slot index instead of an image.
+    """
+    htf.configure_hands(**config)
+    ring = ring_f.attach_frame_ring(ring_spec) if ring_spec is not None else None
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        seq, timestamp, frame = job
+        img = ring['frames'][frame] if ring is not None else frame
+        try:
+            _, res = htf.find_hands(img, draw=False, mirror=mirror)
+            lm_array, _ = htf.find_landmarks(img, res)
+            results.put((seq, timestamp, lm_array, htf.get_hand_types(res), None))
+        except Exception as e:
+            results.put((seq, timestamp, np.empty((0, 21, 3), np.float32), [], repr(e)))
+
+
+# ----------------- Inference Pool -----------------
+def start_inference_pool(workers=INFERENCE_WORKERS, hands_config=None, queue_size=INFERENCE_QUEUE_SIZE, ring=None,
+                         mirror=False):
+    """
+    Starts worker processes that each run their own MediaPipe Hands.
+
+    Frames are handed out round-robin and results come back in submission
+    order, so the gesture stage sees frames in sequence. Each worker only sees
+    every n-th frame, so MediaPipe's tracking has larger gaps to bridge; this
+    suits recorded video and multiple streams more than a live cursor.
+
+    Args:
+        workers (int): Number of processes.
+        hands_config (dict or None): Hands settings; defaults to htf.hands_config().
+        queue_size (int): Jobs queued per worker before submit_frame() blocks.
+        ring (dict or None): Frame ring from FrameRingFunctions; frames are then
+            submitted as slot indices and never copied to the workers.
+        mirror (bool): Return landmarks as if the frames were flipped
+            horizontally (see htf.find_hands), without flipping them.
+
+    Returns:
+        dict: Pool state for submit_frame(), get_results() and stop_inference_pool().
+    """
+    # MediaPipe starts its own threads, which do not survive fork(); spawn fresh interpreters
+    ctx = multiprocessing.get_context("spawn")
+    config = htf.hands_config() if hands_config is None else dict(hands_config)
+    results = ctx.Queue()
+    jobs = [ctx.Queue(maxsize=queue_size) for _ in range(workers)]
+    ring_spec = ring['spec'] if ring is not None else None
+    procs = [ctx.Process(target=_inference_worker, args=(q, results, config, ring_spec, mirror), daemon=True)
+             for q in jobs]
+    for p in procs:
+        p.start()
+    return {
+        'procs': procs,
+        'jobs': jobs,
+        'results': results,
+        'next_worker': 0,
+        'dead': set(),        # Workers that exited; they get no more frames
+        'assigned': {},       # seq -> worker, until the frame's result arrives
+        'ring': ring,
+        'slots': {},          # seq -> ring slot, released once the worker's result for it arrives
+        'order': deque(),     # Submitted sequence numbers, oldest first
+        'pending': {},        # seq -> result that arrived ahead of its turn
+        'completed': 0,
+        'errors': 0,
+    }
+
+
+def submit_frame(pool, seq, timestamp, img=None, slot=None, timeout=SUBMIT_TIMEOUT):
+    """
+    Queues a frame on the next live worker (blocks while that worker is full).
+
+    A worker found dead is retired (see _retire_worker); one still full after
+    timeout seconds is skipped for this frame, so a crashed or stuck worker
+    cannot hang the caller.
+
+    Args:
+        pool (dict): From start_inference_pool().
+        seq (int): Increasing frame sequence number.
+        timestamp (float): Capture time, passed through to the result.
+        img (numpy.ndarray or None): BGR frame (copied to the worker).
+        slot (int or None): Ring slot holding the frame instead of img; the
+            pool releases it once the frame's result is returned, or when a
+            frame given up on finally reports back (a worker may still be reading it).
+        timeout (float): Max seconds to wait on one full worker.
+
+    Returns:
+        bool: False if no worker took the frame; the slot then stays with the caller.
+    """
+    job = (seq, timestamp, img if slot is None else slot)
+    for _ in range(len(pool['jobs'])):
+        i = pool['next_worker']
+        pool['next_worker'] = (i + 1) % len(pool['jobs'])
+        if i in pool['dead'] or not _put_job(pool, i, job, timeout):
+            continue
+        if slot is not None:
+            pool['slots'][seq] = slot
+        pool['assigned'][seq] = i
+        pool['order'].append(seq)
+        return True
+    return False
+
+
+def _put_job(pool, i, job, timeout):
+    """Puts a job on worker i's queue; False if the worker died or stayed full for timeout seconds."""
+    deadline = time.monotonic() + timeout
+    while pool['procs'][i].is_alive():
+        try:
+            pool['jobs'][i].put(job, timeout=max(0.0, min(SUBMIT_POLL, deadline - time.monotonic())))
+            return True
+        except queue.Full:
+            if time.monotonic() >= deadline:
+                return False
+    _retire_worker(pool, i)
+    return False
+
+
+def _retire_worker(pool, i):
+    """
+    Takes a dead worker out of the rotation and gives up on the frames it
+    still held; their ring slots are free at once, since nothing reads them any more.
+    """
+    _drain_results(pool)   # Results it sent before dying still count
+    pool['dead'].add(i)
+    lost = [seq for seq, worker in pool['assigned'].items() if worker == i]
+    for seq in lost:
+        del pool['assigned'][seq]
+        if seq in pool['order']:
+            pool['order'].remove(seq)
+            pool['errors'] += 1
+        _release_frame(pool, seq)
+    print(f"Inference worker {i} exited; dropped {len(lost)} of its frames")
+
+
+def _check_workers(pool):
+    """Retires workers that exited."""
+    for i, p in enumerate(pool['procs']):
+        if i not in pool['dead'] and not p.is_alive():
+            _retire_worker(pool, i)
+
+
+def _drain_results(pool):
+    """Stores every result that has arrived, without blocking."""
+    while True:
+        try:
+            _store_result(pool, pool['results'].get_nowait())
+        except queue.Empty:
+            break
+
+
+def _store_result(pool, result):
+    seq, timestamp, lm_array, hand_types, error = result
+    pool['assigned'].pop(seq, None)
+    if error is not None:
+        pool['errors'] += 1
+        print(f"Inference worker error on frame {seq}: {error}")
+    if seq in pool['order']:
+        pool['pending'][seq] = (seq, timestamp, lm_array, hand_types)
+    else:
+        _release_frame(pool, seq)   # Late result of a frame given up on: its slot is free now
+
+
+def get_results(pool, wait=False, timeout=RESULT_TIMEOUT):
+    """
+    Returns finished frames in submission order.
+
+    Args:
+        pool (dict): From start_inference_pool().
+        wait (bool): Block until at least the oldest submitted frame is done.
+            With nothing in flight but frames given up on still out, block
+            until one of them reports back and frees its ring slot.
+        timeout (float): Max seconds to block; a frame that takes longer is
+            skipped, but its ring slot stays reserved until its result arrives.
+
+    Returns:
+        list of tuples: (seq, timestamp, lm_array, hand_types) per frame, like
+            track_landmarks() output plus the frame's sequence and time.
+    """
+    _drain_results(pool)
+
+    if wait and pool['order'] and pool['order'][0] not in pool['pending']:
+        try:
+            while pool['order'] and pool['order'][0] not in pool['pending']:
+                _store_result(pool, pool['results'].get(timeout=timeout))
+        except queue.Empty:
+            _check_workers(pool)   # Frames of a worker that exited are dropped with it
+            if pool['order'] and pool['order'][0] not in pool['pending']:
+                pool['order'].popleft()   # Lost frame: don't hold back the ones after it
+                pool['errors'] += 1
+    elif wait and not pool['order'] and pool['slots']:
+        try:
+            _store_result(pool, pool['results'].get(timeout=timeout))
+        except queue.Empty:
+            pass
+
+    ready = []
+    while pool['order'] and pool['order'][0] in pool['pending']:
+        seq = pool['order'].popleft()
+        ready.append(pool['pending'].pop(seq))
+        _release_frame(pool, seq)
+    pool['completed'] += len(ready)
+    return ready
+
+
+def _release_frame(pool, seq):
+    slot = pool['slots'].pop(seq, None)
+    if slot is not None:
+        ring_f.release_slot(pool['ring'], slot)
+
+
+def pool_in_flight(pool):
+    """Number of submitted frames whose results have not been returned yet."""
+    return len(pool['order'])
+
+
+def stop_inference_pool(pool, timeout=2.0):
+    """Stops the workers; frames still queued are discarded and their ring slots released."""
+    for q in pool['jobs']:
+        try:
+            q.put_nowait(None)
+        except queue.Full:
+            pass
+    for p in pool['procs']:
+        p.join(timeout)
+        if p.is_alive():
+            p.terminate()
+    for seq in list(pool['slots']):
+        _release_frame(pool, seq)
+    pool['assigned'].clear()
@@ -1,39 +1,376 @@
+import sys
 import time
+import threading
+from collections import deque
 import numpy as np
-import autopy
 import cv2
-import pyautogui
+import ProfilerFunctions as prof
+import FilterFunctions as filt
+import GestureFunctions as gest
 
-# Global smoothing and frame reduction settings
-SMOOTHING = 8
+# Global frame reduction (cursor smoothing: FilterFunctions.FILTER_PARAMS["MOUSE"],
+# click/drag/scroll thresholds: GestureFunctions)
 FRAME_R = 150
-CLICK_THRESHOLD = 35      # Distance for click (thumb-index)
-CLICK_HOLD_TIME = 0.1     # Seconds to hold pinch before clicking
-DRAG_THRESHOLD = 35       # Distance for drag (thumb-index)
-DRAG_HOLD_TIME = 0.5      # Seconds to hold pinch before dragging
-DOUBLE_CLICK_MAX_INTERVAL = 0.5  # max seconds between two clicks
-SCROLL_SMOOTHING   = 4      # Higher = smoother but less responsive
-SCROLL_THRESHOLD   = 2      # Minimum pixel movement to trigger scroll
-SCROLL_SPEED       = 100    # Multiplier for scroll amount per movement
 
 # Internal state
 prev_loc = {'x': 0, 'y': 0}
-click_state = {'timer_started': False, 'start_time': 0, 'clicked': False}
-drag_state = {'timer_started': False, 'start_time': 0, 'dragging': False}
-double_click_state = {'last_click_time': 0.0}
-scroll_state = {'prev_y': None, 'last_time': 0.0}
-    
-def move_cursor(img, x_raw, y_raw, cam_size, screen_size,FRAME_R=FRAME_R, SMOOTHING=SMOOTHING):
+
+# Backend settings
+NULL_SCREEN_SIZE = (1920, 1080)   # Screen size reported when no desktop is attached
+WHEEL_DELTA = 120                 # Scroll units per wheel notch (GestureFunctions.SCROLL_SPEED uses this scale)
+_scroll_remainder = 0.0           # Scroll units not yet sent as a whole notch (see scroll)
+null_counts = {'move': 0, 'click': 0, 'toggle': 0, 'scroll': 0}
+recorded_events = []              # (time.monotonic(), op, args) from the recording backend
+
+# Injection worker settings (see start_injection_worker)
+INJECT_QUEUE_SIZE = 64        # Max pending events before the vision loop has to wait
+INJECT_LATENCY_WINDOW = 256   # Rolling samples of enqueue-to-done latency
+_injector = None              # Worker state while running
+
+
+# ----------------- Input Backends -----------------
+# A backend is a dict of callables: move(x, y), click(button), toggle(button, down),
+# scroll(notches) and screen_size(). Buttons are 'left', 'middle' or 'right';
+# scroll() converts scroll units to whole wheel notches before any backend sees them.
+# Backend libraries are imported when their backend is built, not at import.
+def _pyautogui():
+    """Imports pyautogui on first use with its per-call sleep disabled."""
+    import pyautogui
+    pyautogui.PAUSE = 0   # Default is 0.1 s after every call, which stalls the vision loop
+    return pyautogui
+
+
+def _pyautogui_scroll(notches):
+    """Scrolls by wheel notches via pyautogui, whose unit is a wheel delta on Windows and a notch elsewhere."""
+    _pyautogui().scroll(notches * WHEEL_DELTA if sys.platform == "win32" else notches)
+
+
+def _autopy_backend():
+    """Injects events into the desktop through autopy (scroll via pyautogui)."""
+    import autopy
+    buttons = {'left': autopy.mouse.Button.LEFT, 'middle': autopy.mouse.Button.MIDDLE,
+               'right': autopy.mouse.Button.RIGHT}
+    return {
+        'name': 'autopy',
+        'move': autopy.mouse.move,
+        'click': lambda button: autopy.mouse.click(buttons[button]),
+        'toggle': lambda button, down: autopy.mouse.toggle(buttons[button], down),
+        'scroll': _pyautogui_scroll,
+        'screen_size': autopy.screen.size,
+    }
+
+
+def _pyautogui_backend():
+    """Injects events through pyautogui with PAUSE disabled."""
+    pag = _pyautogui()
+    return {
+        'name': 'pyautogui',
+        'move': lambda x, y: pag.moveTo(x, y),
+        'click': lambda button: pag.click(button=button),
+        'toggle': lambda button, down: (pag.mouseDown if down else pag.mouseUp)(button=button),
+        'scroll': _pyautogui_scroll,
+        'screen_size': lambda: tuple(pag.size()),
+    }
+
+
+def _x11_backend():
+    """Injects events straight into the X server through XTest (needs python-xlib)."""
+    from Xlib import X, display
+    from Xlib.ext import xtest
+
+    disp = display.Display()
+    screen = disp.screen()
+    buttons = {'left': 1, 'middle': 2, 'right': 3}
+
+    def move(x, y):
+        xtest.fake_input(disp, X.MotionNotify, x=int(x), y=int(y))
+        disp.flush()
+
+    def toggle(button, down):
+        xtest.fake_input(disp, X.ButtonPress if down else X.ButtonRelease, buttons[button])
+        disp.flush()
+
+    def click(button):
+        toggle(button, True)
+        toggle(button, False)
+
+    def scroll(notches):
+        wheel = 4 if notches > 0 else 5   # Button 4 scrolls up, 5 down
+        for _ in range(abs(notches)):
+            xtest.fake_input(disp, X.ButtonPress, wheel)
+            xtest.fake_input(disp, X.ButtonRelease, wheel)
+        disp.flush()
+
+    return {
+        'name': 'x11',
+        'move': move,
+        'click': click,
+        'toggle': toggle,
+        'scroll': scroll,
+        'screen_size': lambda: (screen.width_in_pixels, screen.height_in_pixels),
+    }
+
+
+def _uinput_backend(screen_size=None):
+    """
+    Injects events through a virtual absolute pointer in /dev/uinput (needs
+    python-evdev and write access to /dev/uinput). Works without a display
+    server connection, so the screen size has to be given or defaults to NULL_SCREEN_SIZE.
+    """
+    from evdev import UInput, AbsInfo, ecodes as ec
+
+    w, h = screen_size or NULL_SCREEN_SIZE
+    device = UInput({
+        ec.EV_KEY: [ec.BTN_LEFT, ec.BTN_RIGHT, ec.BTN_MIDDLE],
+        ec.EV_ABS: [(ec.ABS_X, AbsInfo(0, 0, int(w) - 1, 0, 0, 0)),
+                    (ec.ABS_Y, AbsInfo(0, 0, int(h) - 1, 0, 0, 0))],
+        ec.EV_REL: [ec.REL_WHEEL],
+    }, name="hand-tracking-mouse")
+    buttons = {'left': ec.BTN_LEFT, 'middle': ec.BTN_MIDDLE, 'right': ec.BTN_RIGHT}
+
+    def move(x, y):
+        device.write(ec.EV_ABS, ec.ABS_X, int(x))
+        device.write(ec.EV_ABS, ec.ABS_Y, int(y))
+        device.syn()
+
+    def toggle(button, down):
+        device.write(ec.EV_KEY, buttons[button], 1 if down else 0)
+        device.syn()
+
+    def click(button):
+        toggle(button, True)
+        toggle(button, False)
+
+    def scroll(notches):
+        device.write(ec.EV_REL, ec.REL_WHEEL, notches)
+        device.syn()
+
+    return {
+        'name': 'uinput',
+        'move': move,
+        'click': click,
+        'toggle': toggle,
+        'scroll': scroll,
+        'screen_size': lambda: (w, h),
+    }
+
+
+def _null_backend():
+    """Drops every event and only counts it in null_counts."""
+    def counter(op):
+        def inject(*args):
+            null_counts[op] += 1
+        return inject
+
+    return {
+        'name': 'null',
+        'move': counter('move'),
+        'click': counter('click'),
+        'toggle': counter('toggle'),
+        'scroll': counter('scroll'),
+        'screen_size': lambda: NULL_SCREEN_SIZE,
+    }
+
+
+def _recording_backend():
+    """Appends every event with its time to recorded_events (for tests and benchmarks)."""
+    def recorder(op):
+        def inject(*args):
+            recorded_events.append((time.monotonic(), op, args))
+        return inject
+
+    return {
+        'name': 'recording',
+        'move': recorder('move'),
+        'click': recorder('click'),
+        'toggle': recorder('toggle'),
+        'scroll': recorder('scroll'),
+        'screen_size': lambda: NULL_SCREEN_SIZE,
+    }
+
+
+_mouse_backends = {
+    'autopy': _autopy_backend,
+    'pyautogui': _pyautogui_backend,
+    'x11': _x11_backend,
+    'uinput': _uinput_backend,
+    'null': _null_backend,
+    'recording': _recording_backend,
+}
+_backend = None   # Active backend; the autopy default is built on first use
+
+
+def _active_backend():
+    """Returns the active backend, building the autopy default on first use."""
+    global _backend
+    if _backend is None:
+        _backend = _autopy_backend()
+    return _backend
+
+
+def set_mouse_backend(name, **options):
+    """
+    Selects how mouse events are injected.
+
+    Args:
+        name (str): 'autopy' (default), 'pyautogui' (PAUSE disabled),
+            'x11' (XTest), 'uinput' (virtual device), 'null' (counts only) or
+            'recording' (keeps events in recorded_events).
+        **options: Passed to the backend factory (e.g. screen_size for 'uinput').
+
+    Returns:
+        dict: The active backend.
+    """
+    global _backend
+    _backend = _mouse_backends[name](**options)
+    return _backend
+
+
+def save_screenshot(path):
+    """Saves a screenshot of the desktop to path."""
+    _pyautogui().screenshot(path)
+
+
+def _inject(op, *args):
+    """
+    Sends one event through the active backend, timed as the 'inject' stage.
+    While the injection worker runs, the event is queued instead.
+    """
+    t = prof.tic()
+    if _injector is not None:
+        _post_injection(_injector, op, args)
+    else:
+        _active_backend()[op](*args)
+    prof.toc("inject", t)
+
+
+# ----------------- Injection Worker -----------------
+def start_injection_worker(maxsize=INJECT_QUEUE_SIZE):
+    """
+    Moves OS input injection onto a background thread fed by a bounded queue.
+
+    Consecutive pending moves collapse into the newest one, and a full queue
+    makes room by dropping its oldest move, so the newest cursor target is
+    never lost. Clicks, toggles and scrolls are never dropped and keep their order.
+    """
+    global _injector
+    if _injector is not None:
+        return
+    state = {
+        'pending': deque(),         # (op, args, enqueue time)
+        'cond': threading.Condition(),
+        'maxsize': maxsize,
+        'running': True,
+        'coalesced': 0,             # Moves replaced by a newer move before injection
+        'dropped': 0,               # Moves discarded because the queue was full
+        'injected': 0,
+        'latency': np.zeros(INJECT_LATENCY_WINDOW, np.float32),  # ms, ring buffer
+    }
+    state['thread'] = threading.Thread(target=_injection_loop, args=(state,), daemon=True)
+    state['thread'].start()
+    _injector = state
+
+
+def stop_injection_worker(timeout=1.0):
+    """Injects what is still queued, then stops the worker."""
+    global _injector
+    state = _injector
+    if state is None:
+        return
+    _injector = None
+    with state['cond']:
+        state['running'] = False
+        state['cond'].notify_all()
+    state['thread'].join(timeout)
+
+
+def _post_injection(state, op, args):
+    """Queues an event, collapsing moves and keeping the queue bounded."""
+    now = time.monotonic()
+    with state['cond']:
+        pending = state['pending']
+        if op == 'move' and pending and pending[-1][0] == 'move':
+            pending[-1] = (op, args, now)
+            state['coalesced'] += 1
+            return
+        if len(pending) >= state['maxsize']:
+            # Make room by dropping the oldest queued move (never the new
+            # event, so the latest cursor target always gets through), else wait
+            for i, item in enumerate(pending):
+                if item[0] == 'move':
+                    del pending[i]
+                    state['dropped'] += 1
+                    break
+            else:
+                state['cond'].wait_for(lambda: len(pending) < state['maxsize'])
+        pending.append((op, args, now))
+        state['cond'].notify_all()
+
+
+def _injection_loop(state):
+    """Worker thread: injects queued events in order."""
+    pending = state['pending']
+    while True:
+        with state['cond']:
+            state['cond'].wait_for(lambda: pending or not state['running'])
+            if not pending:
+                return
+            op, args, queued_at = pending.popleft()
+            state['cond'].notify_all()
+        try:
+            _active_backend()[op](*args)
+        except Exception as e:
+            print(f"Input injection failed ({op}): {e}")
+        with state['cond']:
+            state['latency'][state['injected'] % INJECT_LATENCY_WINDOW] = \
+                (time.monotonic() - queued_at) * 1000.0
+            state['injected'] += 1
+
+
+def injection_stats():
+    """
+    Reports the injection worker's queue and latency.
+
+    Returns:
+        dict or None: depth, injected, coalesced, dropped and latency p50/p95/max
+            in ms, or None if the worker is not running.
+    """
+    state = _injector
+    if state is None:
+        return None
+    with state['cond']:
+        n = min(state['injected'], INJECT_LATENCY_WINDOW)
+        samples = state['latency'][:n].copy()
+        stats = {
+            'depth': len(state['pending']),
+            'injected': state['injected'],
+            'coalesced': state['coalesced'],
+            'dropped': state['dropped'],
+        }
+    if n:
+        p50, p95 = np.percentile(samples, (50, 95))
+        stats.update({'p50_ms': float(p50), 'p95_ms': float(p95), 'max_ms': float(samples.max())})
+    return stats
+
+
+def screen_size():
+    """Returns (width, height) of the display as seen by the active backend."""
+    return _active_backend()['screen_size']()
+
+
+# ----------------- Mouse Functions -----------------
+def move_cursor(img, x_raw, y_raw, cam_size, screen_size, FRAME_R=FRAME_R, timestamp=None, hand=0):
     """
     Move the mouse cursor smoothly to mapped screen coordinates.
 
     Args:
-        x_raw (int): Raw x from camera.
-        y_raw (int): Raw y from camera.
+        x_raw (float): Raw x from camera.
+        y_raw (float): Raw y from camera.
         cam_size (tuple): (width, height) of camera frame.
         screen_size (tuple): (width, height) of display.
+        timestamp (float or None): Capture time of the frame, for the One-Euro filter.
+        hand (hashable): Hand identifier; each hand has its own filter state.
     """
-    global prev_loc
     wcam, hcam = cam_size
     wSCR, hSCR = screen_size
 
@@ -44,134 +381,64 @@ def move_cursor(img, x_raw, y_raw, cam_size, screen_size,FRAME_R=FRAME_R, SMOOTH
     x_mapped = np.interp(x_raw, (FRAME_R, wcam - FRAME_R), (0, wSCR))
     y_mapped = np.interp(y_raw, (FRAME_R, hcam - FRAME_R), (0, hSCR))
 
-    # Smooth movement
-    x_smooth = prev_loc['x'] + (x_mapped - prev_loc['x']) / SMOOTHING
-    y_smooth = prev_loc['y'] + (y_mapped - prev_loc['y']) / SMOOTHING
+    # Adaptive smoothing; the prediction may overshoot, so keep it on screen
+    x_smooth, y_smooth = filt.smooth_point(x_mapped, y_mapped, timestamp, "MOUSE", hand)
+    x_smooth = min(max(x_smooth, 0), wSCR - 1)
+    y_smooth = min(max(y_smooth, 0), hSCR - 1)
 
-    autopy.mouse.move(x_smooth, y_smooth)
+    _inject('move', x_smooth, y_smooth)
+    prof.startup_mark("first_cursor_move")
     prev_loc['x'], prev_loc['y'] = x_smooth, y_smooth
-    cv2.circle(img, (x_raw, y_raw), 15, (255, 0, 255), cv2.FILLED)
+    cv2.circle(img, (int(x_raw), int(y_raw)), 15, (255, 0, 255), cv2.FILLED)
 
 
-def click_mouse(img, Click_distance,Click_line, button=autopy.mouse.Button.LEFT,CLICK_THRESHOLD=CLICK_THRESHOLD,CLICK_HOLD_TIME=CLICK_HOLD_TIME):
+def scroll(amount):
     """
-    Perform a click when pinch (thumb-index) is held below threshold.
-
-    Args:
-        distance (float): Current distance between thumb and index tips.
-        button: autopy mouse button to click (default LEFT).
-    """
-    global click_state
-    now = time.time()
-
-    if Click_distance < CLICK_THRESHOLD:
-        if not click_state['timer_started']:
-            click_state['timer_started'] = True
-            click_state['start_time'] = now
-        elif not click_state['clicked'] and (now - click_state['start_time']) >= CLICK_HOLD_TIME:
-            autopy.mouse.click(button)
-            cv2.circle(img, (Click_line[4], Click_line[5]), 15, (0, 255, 0), cv2.FILLED)
-            click_state['clicked'] = True
-    else:
-        # Reset when fingers open
-        click_state['timer_started'] = False
-        click_state['clicked'] = False
+    Scrolls by amount in scroll units (WHEEL_DELTA per notch, positive = up).
 
+    Every backend gets whole notches, so a gesture scrolls the same distance
+    whichever backend is active; the part of amount short of a notch is kept
+    and added to the next call.
 
-def drag_mouse(img,Drag_distance,Drag_line, button=autopy.mouse.Button.LEFT):
+    Returns:
+        int: Notches sent (0 while less than one has accumulated).
     """
-    Press, hold, and release drag when pinch (thumb-index) is held then released.
-
-    Args:
-        distance (float): Current distance between thumb and middle tips.
-        button: autopy mouse button to use for drag (default LEFT).
-    """
-    global drag_state
-    now = time.time()
-
-    if Drag_distance < DRAG_THRESHOLD:
-        if not drag_state['timer_started']:
-            drag_state['timer_started'] = True
-            drag_state['start_time'] = now
-        elif not drag_state['dragging'] and (now - drag_state['start_time']) >= DRAG_HOLD_TIME:
-            autopy.mouse.toggle(button, True)   # Press and hold
-            cv2.circle(img, (Drag_line[4], Drag_line[5]), 15, (0, 255, 255), cv2.FILLED)
-            drag_state['dragging'] = True
-    else:
-        if drag_state['dragging']:
-            autopy.mouse.toggle(button, False)  # Release
-        # Reset after release
-        drag_state['timer_started'] = False
-        drag_state['dragging'] = False
+    global _scroll_remainder
+    _scroll_remainder += amount
+    notches = int(_scroll_remainder / WHEEL_DELTA)   # Towards zero, so the sign is kept
+    if notches:
+        _scroll_remainder -= notches * WHEEL_DELTA
+        _inject('scroll', notches)
+    return notches
 
 
-def double_click_mouse(img, Click_distance, Click_line,button=autopy.mouse.Button.LEFT,threshold=CLICK_THRESHOLD,hold_time=CLICK_HOLD_TIME,max_interval=DOUBLE_CLICK_MAX_INTERVAL):
+def handle_gesture_events(img, events, button='left'):
     """
-    Performs a double-click when two pinch-clicks occur within `max_interval` seconds.
-    Uses the same pinch gesture as click_mouse.
+    Injects GestureFunctions events and draws their feedback.
 
     Args:
-        img (ndarray):       The frame for drawing feedback.
-        distance (float):    Distance between thumb and index tips.
-        click_line (tuple):  Coordinates from find_distance.
-        button:              autopy mouse button to use.
-        threshold (int):     Pinch distance threshold.
-        hold_time (float):   Seconds to hold pinch before first click.
-        max_interval (float):Max time between two clicks.
-    """
-    global double_click_state
-    now = time.time()
-
-    # First, attempt a single click with hold-time
-    click_mouse(img, Click_distance, Click_line, button, threshold, hold_time)
-
-    # If a click just occurred 
-    if click_state['clicked']:
-        # If previous click was within interval, fire double-click
-        if now - double_click_state['last_click_time'] <= max_interval:
-            autopy.mouse.click(button)
-            cv2.circle(img, (Click_line[4], Click_line[5]), 20, (0, 165, 255), cv2.FILLED)
-            # Reset to avoid triple-click
-            double_click_state['last_click_time'] = 0.0
-        else:
-            # Record this click time for double-click detection
-            double_click_state['last_click_time'] = now
-
-
-def scroll_mouse(img, x_index, y_index, x_middle, y_middle, smoothing=SCROLL_SMOOTHING, threshold=SCROLL_THRESHOLD, speed=SCROLL_SPEED):
+        img (ndarray): Frame for drawing feedback.
+        events (list): Events from GestureFunctions.gesture_events().
+        button (str): Mouse button for clicks and drags: 'left', 'middle' or 'right'.
     """
-    Scrolls vertically when index and middle fingers are up.
-    The scroll amount is determined by the average vertical movement
-    of the two fingertips between frames.
-
-    Args:
-        img (ndarray):          Frame for optional feedback (not used here).
-        y_index (int):          Current y of index fingertip.
-        y_middle (int):         Current y of middle fingertip.
-        smoothing (int):        Factor to smooth out rapid jitter.
-        threshold (int):        Min pixel delta to trigger scroll.
-        speed (float):          Scroll units per pixel movement.
-    """
-    global scroll_state
-    now = time.time()
-    avg_y = (y_index + y_middle) / 2
-    avg_x = (x_index + x_middle) / 2
-
-    # Initialize previous y on first call
-    if scroll_state['prev_y'] is None:
-        scroll_state['prev_y'] = avg_y
-        return
-
-    # Compute movement delta
-    delta = scroll_state['prev_y'] - avg_y
-    # Smooth jitter by scaling down
-    delta_smooth = delta / smoothing
-
-    # Only scroll if movement is significant
-    if abs(delta_smooth) >= threshold / smoothing:
-        # autopy.scroll uses (horizontal, vertical)
-        pyautogui.scroll(int(delta_smooth * speed))
-        cv2.circle(img, (int(avg_x), int(avg_y)), 20, (120, 165, 255), cv2.FILLED)
-        scroll_state['last_time'] = now
-
-    scroll_state['prev_y'] = avg_y
\ No newline at end of file
+    for event in events:
+        kind, pos = event['type'], event['pos']
+        if kind == gest.CLICK:
+            _inject('click', button)
+            feedback = (15, (0, 255, 0))
+        elif kind == gest.DOUBLE_CLICK:
+            _inject('click', button)   # Second click of the pair
+            feedback = (20, (0, 165, 255))
+        elif kind == gest.DRAG_START:
+            _inject('toggle', button, True)   # Press and hold
+            feedback = (15, (0, 255, 255))
+        elif kind == gest.DRAG_END:
+            _inject('toggle', button, False)  # Release
+            feedback = None
+        elif kind == gest.SCROLL:
+            scroll(event['amount'])
+            feedback = (20, (120, 165, 255))
+        else:
+            continue
+        if feedback is not None and pos is not None and img is not None:
+            cv2.circle(img, (int(pos[0]), int(pos[1])), feedback[0], feedback[1], cv2.FILLED)
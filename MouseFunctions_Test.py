@@ -2,11 +2,12 @@ import cv2
 import time
 import HandTrackingFunctions as htf
 import MouseFunctions
+import GestureFunctions as gest
 import numpy as np
 
 # Camera and screen settings
 wcam, hcam = 648, 488
-screen_size = MouseFunctions.autopy.screen.size()
+screen_size = MouseFunctions.screen_size()
 
 cap = cv2.VideoCapture(0)
 cap.set(3, wcam)
@@ -23,31 +24,16 @@ while True:
     lm_list, bbox = htf.find_positions(img, results, drawBBox=False)
     hand_types = htf.get_hand_types(results)
     fingers = htf.fingers_up([lm_list],hand_types)
-    click_length, click_line = htf.find_distance(lm_list, 4, 6, img, draw=False)
-    drag_length, drag_line = htf.find_distance(lm_list, 4, 12, img, draw=False)
+    geo = htf.frame_geometry(lm_list)
 
-    if len(lm_list) != 0:
-        # Get finger-tip coords
+    if len(lm_list) != 0 and fingers[1] == 1:
+        # Move cursor with the index finger tip
         x_index, y_index = lm_list[8][1:]
-        x_middle, y_middle = lm_list[12][1:]
+        MouseFunctions.move_cursor(img,x_index, y_index, (wcam, hcam), screen_size)
 
-        if fingers[1] == 1:
-            # Move cursor
-            MouseFunctions.move_cursor(img,x_index, y_index, (wcam, hcam), screen_size)
-
-            # Left Click
-            MouseFunctions.click_mouse(img,click_length,click_line)
-
-            # Drag
-            MouseFunctions.drag_mouse(img,drag_length,drag_line)
-
-            if fingers[2] == 1:
-                # Double Click
-                MouseFunctions.double_click_mouse(img,click_length,click_line)
-
-                if fingers[0] == 0:
-                    # Scroll
-                    MouseFunctions.scroll_mouse(img,x_index, y_index, x_middle, y_middle)
+    # Click, double click, drag and scroll from the gesture engine
+    events = gest.gesture_events(lm_list, time.monotonic(), fingers, geo)
+    MouseFunctions.handle_gesture_events(img, events)
 
     cv2.imshow("Live Test", img)
     if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -1,25 +1,27 @@
 # Virtual Painter & Mouse - Functional Version (Non-OOP)
 import cv2
-import time
 import HandTrackingFunctions as htf
 import MouseFunctions
+import FilterFunctions as filt
+import GestureFunctions as gest
+import StrokeFunctions as sf
 import numpy as np
 import tkinter as tk
 from tkinter import Canvas
 import threading
-import time
+import queue
 
 # ----------------- Configuration -----------------
-wcam, hcam = 640, 480           # Camera resolution
+wcam, hcam = 640, 480           # Camera resolution (updated from the frames by set_frame_size)
 FRAME_R = 150                   # Margin for reduced frame
-SMOOTHING = 7                   # Smoothing factor
-screen_size = screen_w, screen_h = MouseFunctions.autopy.screen.size()
+screen_size = screen_w, screen_h = MouseFunctions.screen_size()
 screen_w, screen_h = int(screen_w), int(screen_h)
 
 # Canvas and drawing settings
 mode = "MOUSE"  # Default mode: MOUSE or PAINT
 
 draw_color = (255, 0, 255)  # Default purple
+tool = "BRUSH"              # BRUSH, ERASER (removes whole strokes) or LASSO (selects strokes)
 brush_thickness = 7
 eraser_thickness = 50
 
@@ -27,12 +29,31 @@ img_canvas = np.zeros((screen_h, screen_w, 3), np.uint8)
 header_height = 150
 prev_loc = {'x': 0, 'y': 0}
 
+# Stroke history (undo/redo and re-rendering)
+screen_strokes = sf.create_stroke_store()   # Strokes drawn on the screen overlay
+canvas_strokes = sf.create_stroke_store()   # Strokes drawn on img_canvas
+selected_strokes = []                       # Screen stroke ids picked with the lasso
+SELECTION_COLOR = (255, 255, 255)           # Highlight for selected strokes
+
 # screen overlay
 overlay_root = None
 overlay_canvas = None
 overlay_active = False
 overlay_thread = None
 
+# Retained overlay raster: strokes are rasterized here and only changed
+# regions are pushed to the window (black = transparent)
+OVERLAY_MAX_FPS = 30            # Cap on window refreshes per second
+overlay_raster = None           # (screen_h, screen_w, 3) BGR layer
+overlay_image = None            # tk.PhotoImage showing the raster
+overlay_dirty = None            # (x0, y0, x1, y1) region changed since the last refresh
+
+# The vision loop never touches Tk: it posts commands that the Tk thread
+# drains once per display frame
+OVERLAY_READY_TIMEOUT = 2.0       # Max seconds setup_screen_overlay(wait=True) waits for the window
+overlay_commands = queue.SimpleQueue()
+overlay_ready = threading.Event()
+
 
 # Selection panel setup
 mode_selector = {
@@ -47,18 +68,34 @@ color_palette = {
     "BLUE": ((445, 50, 495, 100), (255, 0, 0)),
     "YELLOW": ((515, 50, 565, 100), (0, 255, 255)),
     "PINK": ((585, 50, 635, 100), (255, 0, 255)),
-    "ERASER": ((155, 110, 255, 130), (0, 0, 0))
+    "ERASER": ((155, 110, 255, 130), (0, 0, 0)),
+    "LASSO": ((265, 110, 365, 130), SELECTION_COLOR)
 }
+tool_labels = {"ERASER": "ERASE", "LASSO": "LASSO"}  # Palette entries that are tools, not colors
+
+# Pre-rendered header: one sprite per (mode, draw_color, tool) state, and a
+# per-pixel map of which button lies under each header pixel
+_panel_cache = {}           # (mode, draw_color, tool) -> (header_height, wcam, 3) BGR sprite
+_panel_labels = None        # (header_height, wcam) int16, 0 = no button, i = _panel_label_names[i]
+_panel_label_names = [None] # Index -> ("MODE" | "COLOR", name)
 
 
 
 # ----------------- Screen Overlay Functions -----------------
-def setup_screen_overlay(screen_w, screen_h):
-    """Initialize screen overlay - call once at startup"""
-    global overlay_root, overlay_canvas, overlay_thread
+def setup_screen_overlay(screen_w, screen_h, wait=False):
+    """
+    Initialize screen overlay - call once at startup.
+
+    The window is built on its own thread; commands posted before it is up
+    are queued and applied on its first tick, so by default this returns at
+    once. With wait=True it blocks until the window exists (up to
+    OVERLAY_READY_TIMEOUT).
+    """
+    global overlay_thread, overlay_raster
+    overlay_raster = np.zeros((screen_h, screen_w, 3), np.uint8)
     
     def create_overlay():
-        global overlay_root, overlay_canvas
+        global overlay_root, overlay_canvas, overlay_image
         overlay_root = tk.Tk()
         
         # Make transparent and always on top
@@ -79,84 +116,213 @@ def setup_screen_overlay(screen_w, screen_h):
             highlightthickness=0
         )
         overlay_canvas.pack()
+
+        # One image item holds every stroke; it never grows
+        overlay_image = tk.PhotoImage(width=screen_w, height=screen_h)
+        overlay_canvas.create_image(0, 0, anchor=tk.NW, image=overlay_image)
+        overlay_root.after(0, _overlay_tick)
         
         overlay_root.withdraw()  # Start hidden
+        overlay_ready.set()
         overlay_root.mainloop()
+        overlay_root.destroy()
     
     # Start overlay in background thread
     overlay_thread = threading.Thread(target=create_overlay, daemon=True)
     overlay_thread.start()
-    time.sleep(0.5)  # Wait for initialization
+    if wait:
+        overlay_ready.wait(OVERLAY_READY_TIMEOUT)
+
+def _post_overlay(*command):
+    """Queues a command for the Tk thread; never blocks."""
+    if overlay_thread is not None:
+        overlay_commands.put(command)
 
 def show_screen_overlay():
     """Show the screen overlay for drawing"""
-    global overlay_root, overlay_active
+    global overlay_active
     overlay_active = True
-    if overlay_root:
-        try:
-            overlay_root.deiconify()
-            overlay_root.attributes('-topmost', True)
-        except:
-            pass
+    _post_overlay('show')
 
 def hide_screen_overlay():
     """Hide the screen overlay"""
-    global overlay_root, overlay_active
+    global overlay_active
     overlay_active = False
-    if overlay_root:
-        try:
-            overlay_root.withdraw()
-        except:
-            pass
+    _post_overlay('hide')
 
 def draw_on_screen(x1, y1, x2, y2, color=(255, 0, 255), width=7):
-    """Draw line on screen overlay"""
-    global overlay_canvas, overlay_active, overlay_root
-    if overlay_canvas and overlay_active:
-        try:
-            # Convert BGR to hex
-            hex_color = f"#{color[2]:02x}{color[1]:02x}{color[0]:02x}"
-            
-            overlay_canvas.create_line(
-                x1, y1, x2, y2,
-                fill=hex_color,
-                width=width,
-                capstyle=tk.ROUND,
-                smooth=True
-            )
-            overlay_root.update()
-        except:
-            pass
+    """Draw line on screen overlay (rasterized and shown on the next Tk tick)"""
+    if overlay_active:
+        _post_overlay('draw', int(x1), int(y1), int(x2), int(y2), color, width)
 
 def clear_screen_drawings():
-    """Clear all drawings from screen"""
-    global overlay_canvas, overlay_root
-    if overlay_canvas:
-        try:
-            overlay_canvas.delete("all")
-            overlay_root.update()
-        except:
-            pass
+    """Clear all drawings from screen (undoable)"""
+    sf.clear_strokes(screen_strokes)
+    _post_overlay('clear')
+
+def _refresh_screen_strokes(ids):
+    """
+    Sends the Tk thread a snapshot of the visible strokes around the given
+    ones (removed, restored or re-highlighted), so only that area of the
+    raster is re-rendered and pushed
+    """
+    region = sf.strokes_bounds(screen_strokes, ids)
+    if region is None:
+        return
+    h, w = overlay_raster.shape[:2] if overlay_raster is not None else (screen_h, screen_w)
+    region = sf.clip_region(region, w, h)
+    if region is None:
+        return
+    selected = set(selected_strokes)
+    polylines = [(sf.stroke_points(st).copy(),
+                  SELECTION_COLOR if st['id'] in selected else st['color'],
+                  st['width'])
+                 for st in sf.strokes_in_region(screen_strokes, region)]
+    _post_overlay('region', region, polylines)
+
+def erase_strokes_at(x, y, radius=None):
+    """Remove every screen stroke under (x, y) as one undoable step (radius: eraser_thickness / 2)"""
+    radius = eraser_thickness / 2 if radius is None else radius
+    hits = sf.hit_test(screen_strokes, x, y, radius)
+    if hits:
+        sf.remove_strokes(screen_strokes, hits)
+        selected_strokes[:] = [sid for sid in selected_strokes if sid not in hits]
+        _refresh_screen_strokes(hits)
+    return hits
+
+def select_strokes(polygon):
+    """Select the screen strokes inside a lasso outline and highlight them"""
+    previous = list(selected_strokes)
+    selected_strokes[:] = sf.lasso_select(screen_strokes, polygon)
+    _refresh_screen_strokes(previous + selected_strokes)
+    return selected_strokes
+
+def delete_selected_strokes():
+    """Remove the lasso selection (undoable)"""
+    removed = sf.remove_strokes(screen_strokes, selected_strokes)
+    selected_strokes.clear()
+    if removed:
+        _refresh_screen_strokes(removed)
+    return removed
+
+def _step_screen_history(step):
+    """Applies sf.undo or sf.redo to the screen strokes, dropping the selection, and re-renders what changed"""
+    previous = list(selected_strokes)
+    selected_strokes.clear()
+    changed = step(screen_strokes)
+    _refresh_screen_strokes(changed + previous)
+    return bool(changed)
+
+def undo_screen_drawing():
+    """Undo the last stroke (or clear) on the screen overlay"""
+    return _step_screen_history(sf.undo)
+
+def redo_screen_drawing():
+    """Redo the last undone stroke on the screen overlay"""
+    return _step_screen_history(sf.redo)
 
 def close_screen_overlay():
     """Close screen overlay completely"""
-    global overlay_root, overlay_active
+    global overlay_active
     overlay_active = False
-    if overlay_root:
+    _post_overlay('close')
+    if overlay_thread is not None:
+        overlay_thread.join(OVERLAY_READY_TIMEOUT)
+
+
+def _mark_dirty(x0, y0, x1, y1):
+    """Grows the dirty region (Tk thread only)."""
+    global overlay_dirty
+    h, w = overlay_raster.shape[:2]
+    x0, y0 = max(0, int(x0)), max(0, int(y0))
+    x1, y1 = min(w, int(x1) + 1), min(h, int(y1) + 1)
+    if x0 >= x1 or y0 >= y1:
+        return
+    if overlay_dirty is None:
+        overlay_dirty = (x0, y0, x1, y1)
+    else:
+        dx0, dy0, dx1, dy1 = overlay_dirty
+        overlay_dirty = (min(dx0, x0), min(dy0, y0), max(dx1, x1), max(dy1, y1))
+
+
+def _drain_overlay_commands():
+    """
+    Takes every pending command and coalesces them: only the last show/hide
+    counts, and a clear drops the draws queued before it.
+
+    Returns:
+        tuple: (visible, clear, draws, close) where visible is True/False/None
+            and draws are the 'draw' and 'region' commands in order.
+    """
+    visible, clear, close, draws = None, False, False, []
+    while True:
         try:
-            overlay_root.quit()
-            overlay_root.destroy()
-        except:
-            pass
+            command = overlay_commands.get_nowait()
+        except queue.Empty:
+            break
+        kind = command[0]
+        if kind in ('draw', 'region'):
+            draws.append(command)
+        elif kind == 'clear':
+            clear, draws = True, []
+        elif kind == 'show':
+            visible = True
+        elif kind == 'hide':
+            visible = False
+        elif kind == 'close':
+            close = True
+    return visible, clear, draws, close
+
+
+def _overlay_tick():
+    """Tk-thread tick: applies queued commands and pushes the dirty region."""
+    global overlay_dirty
+    visible, clear, draws, close = _drain_overlay_commands()
+    if close:
+        overlay_root.quit()
+        return
+
+    h, w = overlay_raster.shape[:2]
+    if clear:
+        overlay_raster[:] = 0
+        _mark_dirty(0, 0, w - 1, h - 1)
+    for command in draws:
+        if command[0] == 'region':
+            # Re-render one area from a snapshot of the strokes in it
+            (x0, y0, x1, y1), polylines = command[1:]
+            sf.draw_polylines(overlay_raster[y0:y1, x0:x1], polylines, (x0, y0))
+            _mark_dirty(x0, y0, x1 - 1, y1 - 1)
+            continue
+        x1, y1, x2, y2, color, width = command[1:]
+        cv2.line(overlay_raster, (x1, y1), (x2, y2), color, width)
+        r = width // 2 + 1
+        _mark_dirty(min(x1, x2) - r, min(y1, y2) - r, max(x1, x2) + r, max(y1, y2) + r)
+
+    try:
+        if visible is True:
+            overlay_root.deiconify()
+            overlay_root.attributes('-topmost', True)
+        elif visible is False:
+            overlay_root.withdraw()
 
-def handle_screen_drawing(lm_list, fingers, draw_color, prev_loc, wcam, hcam, screen_w, screen_h):
-    """Handle drawing on screen overlay"""
-    global overlay_active
-    if not lm_list or not overlay_active:
+        if overlay_dirty is not None:
+            x0, y0, x1, y1 = overlay_dirty
+            overlay_dirty = None
+            patch = cv2.cvtColor(overlay_raster[y0:y1, x0:x1], cv2.COLOR_BGR2RGB)
+            ppm = f"P6 {x1 - x0} {y1 - y0} 255 ".encode() + patch.tobytes()
+            overlay_image.tk.call(overlay_image.name, 'put', ppm, '-format', 'ppm', '-to', x0, y0)
+    except tk.TclError as e:
+        print(f"Overlay update failed: {e}")
+
+    overlay_root.after(int(1000 / OVERLAY_MAX_FPS), _overlay_tick)
+
+def handle_screen_drawing(lm_list, fingers, draw_color, prev_loc, wcam, hcam, screen_w, screen_h, timestamp=None, hand=0):
+    """Handle drawing on screen overlay (timestamp: capture time for the One-Euro filter)"""
+    if len(lm_list) == 0 or not overlay_active:
         return prev_loc
     
     # Get finger position
-    x_raw, y_raw = lm_list[8][1], lm_list[8][2]
+    x_raw, y_raw = htf.landmark_xy(lm_list, 8)
     
     # Skip header area
     if y_raw < 150:
@@ -167,139 +333,200 @@ def handle_screen_drawing(lm_list, fingers, draw_color, prev_loc, wcam, hcam, sc
     y_screen = np.interp(y_raw, (150, hcam - 150), (0, screen_h))
     
     # Smooth movement
-    SMOOTHING = 7
-    x_smooth = prev_loc.get('x', x_screen) + (x_screen - prev_loc.get('x', x_screen)) / SMOOTHING
-    y_smooth = prev_loc.get('y', y_screen) + (y_screen - prev_loc.get('y', y_screen)) / SMOOTHING
+    x_smooth, y_smooth = filt.smooth_point(x_screen, y_screen, timestamp, "PAINT", hand)
     
     prev_loc.update({'x': x_smooth, 'y': y_smooth})
     
     # Drawing gesture (index up, middle down)
-    if fingers[1] == 1 and fingers[2] == 0:
+    if fingers[1] == 1 and fingers[2] == 0 and tool == "LASSO":
+        # Lasso: collect the outline, select on release
+        prev_loc.setdefault('lasso', []).append((x_smooth, y_smooth))
+    elif fingers[1] == 1 and fingers[2] == 0 and draw_color == (0, 0, 0):
+        # Object eraser: drop whole strokes under the fingertip
+        erase_strokes_at(x_smooth, y_smooth)
+    elif fingers[1] == 1 and fingers[2] == 0:
+        thickness = brush_thickness
         if 'last_x' in prev_loc and 'last_y' in prev_loc:
             # Draw line from last position to current
-            thickness = 50 if draw_color == (0, 0, 0) else 7  # Thicker eraser
             draw_on_screen(
                 prev_loc['last_x'], prev_loc['last_y'],
                 x_smooth, y_smooth,
                 color=draw_color,
                 width=thickness
             )
+        if screen_strokes['active'] is None:
+            sf.begin_stroke(screen_strokes, draw_color, thickness)
+        sf.add_point(screen_strokes, x_smooth, y_smooth)
         
         prev_loc['last_x'] = x_smooth
         prev_loc['last_y'] = y_smooth
     else:
         # Reset when not drawing
-        prev_loc.pop('last_x', None)
-        prev_loc.pop('last_y', None)
+        release_screen_drawing(prev_loc)
     
     return prev_loc
 
 
+def release_screen_drawing(prev_loc):
+    """Ends the current screen stroke or lasso, e.g. when the drawing hand changes."""
+    sf.end_stroke(screen_strokes)
+    prev_loc.pop('last_x', None)
+    prev_loc.pop('last_y', None)
+    lasso = prev_loc.pop('lasso', None)
+    if lasso:
+        select_strokes(lasso)
+    return prev_loc
+
+
 
 # ----------------- Functions -----------------
-def draw_selection_panel(img):
-    """Draw the selection panel on the image"""
-    global mode, draw_color
-    
-    # Draw header background
-    cv2.rectangle(img, (0, 0), (wcam, header_height), (50, 50, 50), cv2.FILLED)
-    
+def set_frame_size(w, h):
+    """Sets the camera frame size used for mapping and the header (cheap if unchanged)."""
+    global wcam, hcam, _panel_labels
+    if (w, h) != (wcam, hcam):
+        wcam, hcam = w, h
+        _panel_cache.clear()
+        _panel_labels = None
+        del _panel_label_names[1:]
+
+
+def _render_selection_panel():
+    """Renders the header for the current mode, color and tool into a new sprite."""
+    sprite = np.empty((header_height, wcam, 3), np.uint8)
+    sprite[:] = (50, 50, 50)
+
     # Draw mode selector
     for mode_name, coords in mode_selector.items():
         x1, y1, x2, y2 = coords
         color = (0, 255, 0) if mode == mode_name else (100, 100, 100)
-        cv2.rectangle(img, (x1, y1), (x2, y2), color, cv2.FILLED)
-        cv2.putText(img, mode_name, (x1 + 10, y1 + 30), cv2.FONT_HERSHEY_PLAIN, 1.5, (255, 255, 255), 2)
-    
+        cv2.rectangle(sprite, (x1, y1), (x2, y2), color, cv2.FILLED)
+        cv2.putText(sprite, mode_name, (x1 + 10, y1 + 30), cv2.FONT_HERSHEY_PLAIN, 1.5, (255, 255, 255), 2)
+
     # Draw color palette (only when in PAINT mode)
     if mode == "PAINT":
         for color_name, (coords, color_bgr) in color_palette.items():
             x1, y1, x2, y2 = coords
-            if color_name == "ERASER":
-                cv2.rectangle(img, (x1, y1), (x2, y2), (100, 100, 100), cv2.FILLED)
-                cv2.putText(img, "ERASE", (x1 + 10, y1 + 15), cv2.FONT_HERSHEY_PLAIN, 1, (255, 255, 255), 1)
+            if color_name in tool_labels:
+                button = (0, 200, 0) if tool == color_name else (100, 100, 100)
+                cv2.rectangle(sprite, (x1, y1), (x2, y2), button, cv2.FILLED)
+                cv2.putText(sprite, tool_labels[color_name], (x1 + 10, y1 + 15), cv2.FONT_HERSHEY_PLAIN, 1, (255, 255, 255), 1)
             else:
-                cv2.rectangle(img, (x1, y1), (x2, y2), color_bgr, cv2.FILLED)
-    
+                cv2.rectangle(sprite, (x1, y1), (x2, y2), color_bgr, cv2.FILLED)
+
         # Show current drawing color indicator
-        cv2.circle(img, (25, 25), 15, draw_color, cv2.FILLED)
+        cv2.circle(sprite, (25, 25), 15, draw_color, cv2.FILLED)
+    return sprite
+
 
+def draw_selection_panel(img):
+    """
+    Draw the selection panel on the image.
+
+    The header is rendered once per (mode, color, tool) state and cached; each
+    frame only copies the cached sprite over the top of the image. The header
+    background is opaque, so the copy is the whole composite.
+    """
+    key = (mode, tuple(draw_color), tool)
+    sprite = _panel_cache.get(key)
+    if sprite is None:
+        sprite = _panel_cache[key] = _render_selection_panel()
+    h = min(header_height, img.shape[0])
+    w = min(wcam, img.shape[1])
+    img[:h, :w] = sprite[:h, :w]
+
+
+def _selection_label_map():
+    """Builds (once) the per-pixel map of header buttons used by check_selection_click()."""
+    global _panel_labels
+    if _panel_labels is None:
+        labels = np.zeros((header_height, wcam), np.int16)
+        buttons = [("MODE", name, coords) for name, coords in mode_selector.items()]
+        buttons += [("COLOR", name, coords) for name, (coords, _) in color_palette.items()]
+        for kind, name, (x1, y1, x2, y2) in buttons:
+            _panel_label_names.append((kind, name))
+            labels[y1:y2 + 1, x1:x2 + 1] = len(_panel_label_names) - 1
+        _panel_labels = labels
+    return _panel_labels
 
 
 def check_selection_click(x, y):
     """Check if click is in selection panel and handle selection"""
-    global mode, draw_color
-    
-    if y < header_height:  # Click in header area
-        # Check mode selector
-        for mode_name, coords in mode_selector.items():
-            x1, y1, x2, y2 = coords
-            if x1 <= x <= x2 and y1 <= y <= y2:
-                mode = mode_name
-                print(f"Mode changed to: {mode}")
-                return True
-        
-        # Check color palette (only in PAINT mode)
-        if mode == "PAINT":
-            for color_name, (coords, color_bgr) in color_palette.items():
-                x1, y1, x2, y2 = coords
-                if x1 <= x <= x2 and y1 <= y <= y2:
-                    if color_name == "ERASER":
-                        draw_color = (0, 0, 0)
-                    else:
-                        draw_color = color_bgr
-                    print(f"Color changed to: {color_name}")
-                    return True
-    return False
-
-
-
-
-def handle_mouse_mode(img, lm_list, fingers, click_length, click_line, drag_length, drag_line):
-    """Handle mouse functionality"""
-    if len(lm_list) != 0:
-        x_index, y_index = lm_list[8][1:]
-        x_middle, y_middle = lm_list[12][1:]
-        
-        # Check if clicking in selection area
-        # if check_selection_click(x_index, y_index):
-        #     return
-        
-        if fingers[1] == 1:
-            # Move cursor
-            MouseFunctions.move_cursor(img, x_index, y_index, (wcam, hcam), screen_size)
-            
-            # Left Click
-            MouseFunctions.click_mouse(img, click_length, click_line)
-            
-            # Drag
-            MouseFunctions.drag_mouse(img, drag_length, drag_line)
-            
-            if fingers[2] == 1:
-                # Double Click
-                MouseFunctions.double_click_mouse(img, click_length, click_line)
-                
-                if fingers[0] == 0:
-                    # Scroll
-                    MouseFunctions.scroll_mouse(img, x_index, y_index, x_middle, y_middle)
-
-
-
-def handle_paint_mode(img, lm_list, fingers, img_canvas= img_canvas, prev_loc = prev_loc, FRAME_R =FRAME_R,
-                      wcam = wcam, hcam = hcam, screen_w = screen_w, screen_h = screen_h,
-                      draw_color = draw_color, brush_thickness = brush_thickness, eraser_thickness = eraser_thickness, SMOOTHING =SMOOTHING):
+    global mode, draw_color, tool
+
+    labels = _selection_label_map()
+    x, y = int(x), int(y)
+    if not (0 <= y < labels.shape[0] and 0 <= x < labels.shape[1]):
+        return False
+    label = labels[y, x]
+    if label == 0:
+        return False
+    kind, name = _panel_label_names[label]
+
+    if kind == "MODE":
+        mode = name
+        print(f"Mode changed to: {mode}")
+        return True
+
+    # Color palette is only active in PAINT mode
+    if mode != "PAINT":
+        return False
+    if name == "ERASER":
+        draw_color = (0, 0, 0)
+        tool = "ERASER"
+    elif name == "LASSO":
+        tool = "LASSO"
+    else:
+        draw_color = color_palette[name][1]
+        tool = "BRUSH"
+    print(f"Color changed to: {name}")
+    return True
+
+
+
+
+def handle_mouse_mode(img, lm_list, fingers, geo=None, timestamp=None, hand=0):
+    """
+    Handle mouse functionality: the index finger moves the cursor and the
+    gesture engine for `hand` turns pinches and scrolls into mouse events.
+
+    Args:
+        geo (dict or None): frame_geometry() of lm_list, if already computed.
+        timestamp (float or None): Capture time, for the One-Euro filter and gesture timing.
+    """
+    if len(lm_list) != 0 and fingers[1] == 1:
+        x_index, y_index = htf.landmark_xy(lm_list, 8)
+        MouseFunctions.move_cursor(img, x_index, y_index, (wcam, hcam), screen_size,
+                                   timestamp=timestamp, hand=hand)
+
+    # Runs without a hand too, so a lost hand releases a held drag
+    events = gest.gesture_events(lm_list, timestamp, fingers, geo, hand)
+    MouseFunctions.handle_gesture_events(img, events)
+    return events
+
+
+
+def handle_paint_mode(img, lm_list, fingers, img_canvas, draw_color, prev_loc, wcam, hcam, screen_w, screen_h,
+                      timestamp=None, hand=0, strokes=None):
     """
     Handles painting: maps camera coords to full-screen canvas with reduced frame,
-    applies smoothing, and draws on img_canvas.
+    applies One-Euro smoothing (timestamp: capture time), and draws on img_canvas.
+    Each stroke is also recorded in `strokes` (default canvas_strokes). main.py
+    draws on the screen overlay and binds no keys for this canvas; callers undo
+    it themselves: ids = sf.undo(strokes), then
+    sf.render_strokes(strokes, img_canvas, sf.strokes_bounds(strokes, ids)) if ids.
+    As in handle_screen_drawing, the caller passes the canvas, state and frame
+    size; brush and eraser sizes are this module's current settings.
     """
+    strokes = canvas_strokes if strokes is None else strokes
+
     # Default last draw pos
     xp, yp = prev_loc.get('xp', 0), prev_loc.get('yp', 0)
 
-    if not lm_list:
+    if len(lm_list) == 0:
         return img_canvas, prev_loc, xp, yp
 
     # Raw index finger tip coords
-    x_raw, y_raw = lm_list[8][1], lm_list[8][2]
+    x_raw, y_raw = htf.landmark_xy(lm_list, 8)
 
     # If selecting panel, do nothing here
     if y_raw < FRAME_R:
@@ -311,8 +538,7 @@ def handle_paint_mode(img, lm_list, fingers, img_canvas= img_canvas, prev_loc =
     y_mapped = np.interp(y_raw, (FRAME_R, hcam - FRAME_R), (0, screen_h))
 
     # Smooth movement
-    x_smooth = prev_loc['x'] + (x_mapped - prev_loc['x']) / SMOOTHING
-    y_smooth = prev_loc['y'] + (y_mapped - prev_loc['y']) / SMOOTHING
+    x_smooth, y_smooth = filt.smooth_point(x_mapped, y_mapped, timestamp, "PAINT", hand)
     prev_loc.update({'x': x_smooth, 'y': y_smooth})
 
     # Drawing logic
@@ -323,6 +549,7 @@ def handle_paint_mode(img, lm_list, fingers, img_canvas= img_canvas, prev_loc =
                          int(np.interp(y_smooth, (0, screen_h), (0, hcam)))),
                    15, draw_color, cv2.FILLED)
         xp, yp = x_smooth, y_smooth
+        sf.end_stroke(strokes)
 
     # Drawing gesture (index up, middle down)
     elif fingers[1] == 1 and fingers[2] == 0:
@@ -335,11 +562,16 @@ def handle_paint_mode(img, lm_list, fingers, img_canvas= img_canvas, prev_loc =
 
         # Draw line on full-screen canvas
         cv2.line(img_canvas, (int(xp), int(yp)), (int(x_smooth), int(y_smooth)), draw_color, thickness)
+        if strokes['active'] is None:
+            sf.begin_stroke(strokes, draw_color, thickness)
+            sf.add_point(strokes, xp, yp)
+        sf.add_point(strokes, x_smooth, y_smooth)
         xp, yp = x_smooth, y_smooth
 
     else:
         # Reset when no drawing gesture
         xp, yp = 0, 0
+        sf.end_stroke(strokes)
 
     # Store last draw position
     prev_loc.update({'xp': xp, 'yp': yp})
@@ -0,0 +1,169 @@
+import time
+import json
+import numpy as np
+import cv2
+
+# ----------------- Configuration -----------------
+PROFILE_WINDOW = 256     # Rolling samples kept per stage
+FRAME_BUDGET_MS = 33.0   # Per-frame budget shown on the HUD (30 FPS)
+
+# Stages of the main loop, in the order they run
+STAGES = ["capture", "flip", "cvtColor", "process", "predict", "landmarks",
+          "gestures", "inject", "overlay", "display"]
+NESTED_STAGES = {"inject"}   # Timed inside "gestures", so left out of the frame total
+
+# Startup milestones are timed from this module's import (early in main.py)
+STARTUP_BUDGET_S = 2.0   # Target time to the first cursor move
+
+# Internal state
+_enabled = False
+_stages = {}    # stage name -> {'samples': ndarray, 'count': int}
+_pending = {}   # stage name -> milliseconds accumulated in the current frame
+_startup = {'t0': time.perf_counter(), 'marks': {}}  # milestone -> seconds since t0
+
+
+
+# ----------------- Timing -----------------
+def enable_profiler(enabled=True):
+    """Turns stage timing on or off. Collected samples are dropped when enabling."""
+    global _enabled
+    if enabled and not _enabled:
+        _stages.clear()
+        _pending.clear()
+    _enabled = enabled
+
+
+def profiler_enabled():
+    """Returns True while stage timing is on."""
+    return _enabled
+
+
+def tic():
+    """
+    Starts timing a stage.
+
+    Returns:
+        float: perf_counter() timestamp, or 0.0 when the profiler is disabled.
+    """
+    return time.perf_counter() if _enabled else 0.0
+
+
+def toc(stage, t0):
+    """
+    Adds the time since t0 to a stage for the current frame.
+
+    A stage timed several times in one frame (e.g. "inject") is summed, and
+    end_frame() turns the totals into samples. The return value can be passed
+    straight to the next toc(), so consecutive stages chain without extra
+    tic() calls:  t = toc("flip", t)
+
+    Args:
+        stage (str): Stage name.
+        t0 (float): Value from tic() or a previous toc().
+
+    Returns:
+        float: perf_counter() timestamp, or 0.0 when the profiler is disabled.
+    """
+    if not _enabled:
+        return 0.0
+    now = time.perf_counter()
+    if t0:  # t0 is 0.0 if the profiler was switched on mid-frame
+        _pending[stage] = _pending.get(stage, 0.0) + (now - t0) * 1000.0
+    return now
+
+
+def end_frame():
+    """Commits the current frame's stage totals to the rolling windows."""
+    if not _enabled:
+        return
+    for stage, ms in _pending.items():
+        st = _stages.get(stage)
+        if st is None:
+            st = _stages[stage] = {'samples': np.zeros(PROFILE_WINDOW, np.float32), 'count': 0}
+        st['samples'][st['count'] % PROFILE_WINDOW] = ms
+        st['count'] += 1
+    _pending.clear()
+
+
+# ----------------- Reporting -----------------
+def stage_stats():
+    """
+    Rolling per-frame latency percentiles per stage, in milliseconds.
+
+    Returns:
+        dict: stage -> {'p50', 'p95', 'p99', 'mean', 'count'} in STAGES order,
+            followed by any other stages that were timed.
+    """
+    names = [s for s in STAGES if s in _stages] + [s for s in _stages if s not in STAGES]
+    stats = {}
+    for name in names:
+        st = _stages[name]
+        samples = st['samples'][:min(st['count'], PROFILE_WINDOW)]
+        p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+        stats[name] = {
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99),
+            'mean': float(samples.mean()),
+            'count': st['count'],
+        }
+    return stats
+
+
+def dump_profile(path):
+    """Writes stage_stats() plus the frame budget to a JSON file."""
+    with open(path, "w") as f:
+        json.dump({'budget_ms': FRAME_BUDGET_MS, 'stages': stage_stats()}, f, indent=2)
+
+
+def draw_profile_hud(img, x=10, y=20):
+    """
+    Draws per-stage p50/p95/p99 and the summed p50 against FRAME_BUDGET_MS.
+    Stages in NESTED_STAGES are listed but not added to the total.
+
+    Args:
+        img (numpy.ndarray): Frame to draw on.
+        x, y (int): Top-left text position.
+    """
+    stats = stage_stats()
+    if not stats:
+        return
+    total = sum(s['p50'] for name, s in stats.items() if name not in NESTED_STAGES)
+    color = (0, 255, 0) if total <= FRAME_BUDGET_MS else (0, 0, 255)
+    cv2.putText(img, f"p50 total {total:5.1f} / {FRAME_BUDGET_MS:.0f} ms", (x, y),
+                cv2.FONT_HERSHEY_PLAIN, 1, color, 1)
+    for i, (name, s) in enumerate(stats.items(), start=1):
+        cv2.putText(img, f"{name:>9} {s['p50']:5.1f} {s['p95']:5.1f} {s['p99']:5.1f}",
+                    (x, y + 16 * i), cv2.FONT_HERSHEY_PLAIN, 1, (255, 255, 255), 1)
+
+
+# ----------------- Startup -----------------
+def startup_mark(name):
+    """
+    Records the first time a startup milestone is reached (always on, one
+    dict lookup once recorded).
+
+    Returns:
+        float or None: Seconds since startup if this call recorded it, else None.
+    """
+    if name in _startup['marks']:
+        return None
+    elapsed = time.perf_counter() - _startup['t0']
+    _startup['marks'][name] = elapsed
+    return elapsed
+
+
+def startup_marks():
+    """Recorded milestones as {name: seconds since startup}, in the order reached."""
+    return dict(_startup['marks'])
+
+
+def format_startup(final="first_cursor_move"):
+    """One-line summary of the milestones, flagging `final` against STARTUP_BUDGET_S."""
+    marks = _startup['marks']
+    parts = [f"{name} {sec:.2f}s" for name, sec in marks.items()]
+    line = "Startup: " + ", ".join(parts)
+    if final in marks:
+        status = "within" if marks[final] <= STARTUP_BUDGET_S else "OVER"
+        line += f" ({status} {STARTUP_BUDGET_S:.1f}s budget)"
+    return line
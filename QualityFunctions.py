@@ -0,0 +1,106 @@
+import HandTrackingFunctions as htf
+import ProfilerFunctions as prof
+
+# ----------------- Configuration -----------------
+QUALITY_BUDGET_MS = prof.FRAME_BUDGET_MS  # Per-frame processing budget
+QUALITY_EMA = 0.1               # Weight of the newest frame in the averaged frame time
+QUALITY_DOWN_FRAMES = 5         # Frames over budget before dropping a level
+QUALITY_UP_FRAMES = 60          # Frames with headroom before raising a level
+QUALITY_HEADROOM = 0.6          # "Headroom" = averaged frame time below this fraction of the budget
+QUALITY_SETTLE_FRAMES = 15      # Frames after a level change that are averaged but not counted
+
+# Levels from best to cheapest; optional drawing goes first, then the model, then resolution
+QUALITY_LEVELS = [
+    {'model_complexity': 1, 'scale': 1.0, 'draw': True},
+    {'model_complexity': 1, 'scale': 1.0, 'draw': False},
+    {'model_complexity': 0, 'scale': 1.0, 'draw': False},
+    {'model_complexity': 0, 'scale': 0.75, 'draw': False},
+    {'model_complexity': 0, 'scale': 0.5, 'draw': False},
+]
+
+# A close hand covers many pixels; the input is scaled so the largest hand
+# spans about this many pixels, since more do not help the landmark model
+HAND_TARGET_PX = 180
+MIN_INFERENCE_SCALE = 0.4
+
+# Internal state
+_quality = {'level': 0, 'ema': None, 'over': 0, 'under': 0, 'settle': 0, 'hand_px': 0.0}
+
+
+
+# ----------------- Controller -----------------
+def update_quality(frame_ms, lm_array=None):
+    """
+    Feeds one frame's processing time (and its hands) to the controller.
+
+    The averaged frame time is compared with QUALITY_BUDGET_MS: a sustained
+    overrun drops one level of QUALITY_LEVELS, sustained headroom raises one.
+    The Hands model is switched here when the level's model_complexity changes;
+    it is rebuilt in the background, and the average carries over a switch
+    with the first QUALITY_SETTLE_FRAMES frames after it not counted, so one
+    slow frame right after a switch cannot trigger the next one.
+
+    Args:
+        frame_ms (float): Processing time of the frame in milliseconds.
+        lm_array (numpy.ndarray or None): (n_hands, 21, 3) landmarks of the frame.
+
+    Returns:
+        dict: Settings for the next frame, see quality_settings().
+    """
+    q = _quality
+    q['ema'] = frame_ms if q['ema'] is None else q['ema'] + QUALITY_EMA * (frame_ms - q['ema'])
+
+    if q['settle']:
+        q['settle'] -= 1
+    elif q['ema'] > QUALITY_BUDGET_MS:
+        q['over'] += 1
+        q['under'] = 0
+    elif q['ema'] < QUALITY_BUDGET_MS * QUALITY_HEADROOM:
+        q['under'] += 1
+        q['over'] = 0
+    else:
+        q['over'] = q['under'] = 0
+
+    if q['over'] >= QUALITY_DOWN_FRAMES and q['level'] < len(QUALITY_LEVELS) - 1:
+        _set_level(q['level'] + 1)
+    elif q['under'] >= QUALITY_UP_FRAMES and q['level'] > 0:
+        _set_level(q['level'] - 1)
+
+    if lm_array is not None and len(lm_array):
+        extent = htf.landmarks_bbox(lm_array)
+        q['hand_px'] = float(max((extent[:, 2:] - extent[:, :2]).max(), 1.0))
+    else:
+        q['hand_px'] = 0.0
+    return quality_settings()
+
+
+def _set_level(level):
+    """Switches to a level; its model is built off the frame path while the old one keeps running."""
+    _quality.update(level=level, over=0, under=0, settle=QUALITY_SETTLE_FRAMES)
+    htf.configure_hands(background=True, model_complexity=QUALITY_LEVELS[level]['model_complexity'])
+
+
+def quality_settings():
+    """
+    Current settings.
+
+    Returns:
+        dict: 'level', 'model_complexity', 'scale' (for find_hands) and
+            'draw' (False = skip optional drawing such as landmarks).
+    """
+    level = QUALITY_LEVELS[_quality['level']]
+    scale = level['scale']
+    if _quality['hand_px'] > HAND_TARGET_PX:
+        scale = min(scale, max(HAND_TARGET_PX / _quality['hand_px'], MIN_INFERENCE_SCALE))
+    return {
+        'level': _quality['level'],
+        'model_complexity': level['model_complexity'],
+        'scale': scale,
+        'draw': level['draw'],
+    }
+
+
+def reset_quality():
+    """Returns to the best level."""
+    _quality.update(level=0, ema=None, over=0, under=0, settle=0, hand_px=0.0)
+    htf.configure_hands(model_complexity=QUALITY_LEVELS[0]['model_complexity'])
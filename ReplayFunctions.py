@@ -0,0 +1,97 @@
+import numpy as np
+import MouseFunctions
+import HandTrackingFunctions as htf
+import GestureFunctions as gest
+
+# Internal state
+_painter = None   # PainterFunctions once imported by headless_painter()
+
+
+
+# ----------------- Headless Painter -----------------
+def headless_painter():
+    """
+    Imports PainterFunctions for running without a desktop.
+
+    PainterFunctions reads the screen size from the mouse backend when it is
+    imported, so the recording backend is selected first; mouse events then
+    land in MouseFunctions.recorded_events. Call this before anything else
+    imports PainterFunctions.
+
+    Returns:
+        module: PainterFunctions.
+    """
+    global _painter
+    if _painter is None:
+        MouseFunctions.set_mouse_backend("recording")
+        import PainterFunctions
+        _painter = PainterFunctions
+    return _painter
+
+
+# ----------------- Replay -----------------
+def start_replay(frame_size, mode="MOUSE"):
+    """
+    Prepares main.py's per-frame hand pipeline for landmarks that come from a
+    trace or a detector instead of the camera: stable hand ids, fingers, hand
+    roles, gestures and then the mouse or screen painting of the cursor hand.
+
+    Args:
+        frame_size (tuple): (width, height) of the frames the landmarks belong to.
+        mode (str): "MOUSE" (cursor, clicks, scrolls) or "PAINT" (screen strokes).
+
+    Returns:
+        dict: Replay state for replay_frame(); 'frames' and 'hands' count what was replayed.
+    """
+    pf = headless_painter()
+    pf.overlay_active = True  # No window exists, so draw calls return immediately
+    w, h = (int(v) for v in frame_size)
+    pf.set_frame_size(w, h)
+    htf.reset_hand_ids()
+    gest.reset_gestures()
+    MouseFunctions.recorded_events.clear()
+    return {
+        'mode': mode,
+        'img': np.zeros((h, w, 3), np.uint8),   # Stand-in frame for the drawing calls
+        'prev_loc': {'x': 0, 'y': 0},
+        'cursor_id': None,
+        'frames': 0,
+        'hands': 0,
+    }
+
+
+def replay_frame(replay, lm_array, hand_types, timestamp, img=None):
+    """
+    Runs one frame of landmarks through the pipeline.
+
+    Args:
+        replay (dict): From start_replay().
+        lm_array (numpy.ndarray): (n_hands, 21, 3) pixel landmarks.
+        hand_types (list of str): Handedness per hand.
+        timestamp (float): Capture time, for filtering and gesture timing.
+        img (numpy.ndarray or None): Frame to draw on; a blank stand-in if None.
+    """
+    pf = _painter
+    img = replay['img'] if img is None else img
+    # Same hand ids and roles as main.py: the cursor hand drives mouse and paint
+    hand_ids = htf.track_hand_ids(lm_array, hand_types)
+    fingers_all = htf.fingers_up_batch(lm_array, hand_ids)
+    cursor = htf.assign_hand_roles(hand_types).get("CURSOR")
+    hand_id = hand_ids[cursor] if cursor is not None else None
+    if hand_id != replay['cursor_id'] and replay['cursor_id'] is not None:
+        MouseFunctions.handle_gesture_events(img, gest.reset_gestures(replay['cursor_id']))
+    replay['cursor_id'] = hand_id
+
+    if cursor is not None:
+        lm_list = lm_array[cursor]
+        fingers = fingers_all[cursor]
+        if replay['mode'] == "MOUSE":
+            pf.handle_mouse_mode(img, lm_list, fingers, htf.frame_geometry(lm_list),
+                                 timestamp=timestamp, hand=hand_id)
+        else:
+            replay['prev_loc'] = pf.handle_screen_drawing(
+                lm_list, fingers, pf.draw_color, replay['prev_loc'],
+                pf.wcam, pf.hcam, pf.screen_w, pf.screen_h, timestamp=timestamp, hand=hand_id
+            )
+    replay['frames'] += 1
+    replay['hands'] += len(lm_array)
@@ -0,0 +1,494 @@
+import numpy as np
+import cv2
+
+# ----------------- Configuration -----------------
+STROKE_EPSILON = 1.5          # Max deviation (px) of a dropped point from the kept polyline
+STROKE_MAX_PENDING = 64       # Commit a vertex after this many dropped points in a row
+STROKE_INITIAL_CAPACITY = 32  # Points allocated for a new stroke (doubles when full)
+STROKE_HISTORY_LIMIT = 200    # Undo steps kept; older removed strokes are freed
+GRID_CELL = 64                # Side (px) of a spatial-index cell
+SEGMENT_INITIAL_CAPACITY = 1024  # Rows allocated for the segment table (doubles when full)
+
+
+
+# ----------------- Stroke Store -----------------
+def create_stroke_store():
+    """
+    Creates an empty stroke store.
+
+    Each stroke keeps its decimated points in a growable (capacity, 2) float32
+    array plus its color and width. Undo and redo work on whole strokes.
+
+    Returns:
+        dict: Store for the other functions in this module.
+    """
+    return {
+        'strokes': {},      # id -> stroke dict (visible or reachable by undo/redo)
+        'visible': set(),   # ids currently shown; ids increase, so sorting gives draw order
+        'next_id': 0,
+        'active': None,     # id of the stroke being drawn
+        'history': [],      # Undo stack of ('add' | 'remove', [ids])
+        'redo': [],         # Redo stack, cleared by any new action
+        'grid': {},         # (cell_x, cell_y) -> rows of 'segments' crossing that cell
+        # Committed polyline segments of every stroke, one row each; rows of
+        # hidden strokes stay indexed and are masked out by 'visible'
+        'segments': {
+            'a': np.empty((SEGMENT_INITIAL_CAPACITY, 2), np.float32),
+            'b': np.empty((SEGMENT_INITIAL_CAPACITY, 2), np.float32),
+            'sid': np.empty(SEGMENT_INITIAL_CAPACITY, np.int32),
+            'half': np.empty(SEGMENT_INITIAL_CAPACITY, np.float32),   # Half the stroke width
+            'visible': np.zeros(SEGMENT_INITIAL_CAPACITY, bool),
+        },
+        'n_segments': 0,    # Rows in use or on the free list ('segments' rows past this are unused)
+        'free_rows': [],    # Rows of freed strokes' segments, reused before the table grows
+    }
+
+
+def _new_stroke(sid, color, width):
+    return {
+        'id': sid,
+        'color': tuple(int(c) for c in color),
+        'width': int(width),
+        'points': np.empty((STROKE_INITIAL_CAPACITY, 2), np.float32),
+        'n': 0,             # Committed vertices in points[:n]
+        'tail': None,       # Latest point, shown but not yet committed
+        'pending': [],      # Points dropped since the last vertex (re-checked as the tail moves)
+        'segments': [],     # Rows of its committed segments in store['segments']
+    }
+
+
+def _append_vertex(stroke, p):
+    """Appends a vertex, doubling the array when full."""
+    if stroke['n'] == len(stroke['points']):
+        grown = np.empty((2 * len(stroke['points']), 2), np.float32)
+        grown[:stroke['n']] = stroke['points'][:stroke['n']]
+        stroke['points'] = grown
+    stroke['points'][stroke['n']] = p
+    stroke['n'] += 1
+
+
+def _commit_vertex(store, stroke, p):
+    """Appends a vertex and indexes the segment it closes."""
+    _append_vertex(stroke, p)
+    n = stroke['n']
+    if n >= 2:
+        _add_segment(store, stroke, stroke['points'][n - 2], stroke['points'][n - 1])
+
+
+def _record(store, action):
+    """Pushes an undo step; the redo stack and steps past the limit are discarded."""
+    store['history'].append(action)
+    discarded, store['redo'] = store['redo'], []
+    if len(store['history']) > STROKE_HISTORY_LIMIT:
+        discarded.append(store['history'].pop(0))
+    _free_unreachable(store, discarded)
+
+
+def _free_unreachable(store, actions):
+    """Deletes strokes referenced only by the given (discarded) actions and not visible."""
+    reachable = {sid for _, ids in store['history'] + store['redo'] for sid in ids}
+    for _, ids in actions:
+        for sid in ids:
+            if sid not in store['visible'] and sid not in reachable:
+                stroke = store['strokes'].pop(sid, None)
+                if stroke is not None:
+                    _unindex_segments(store, stroke)
+
+
+def begin_stroke(store, color, width):
+    """
+    Starts a new stroke (ending any active one).
+
+    Returns:
+        int: Stroke id.
+    """
+    end_stroke(store)
+    sid = store['next_id']
+    store['next_id'] += 1
+    store['strokes'][sid] = _new_stroke(sid, color, width)
+    store['visible'].add(sid)
+    store['active'] = sid
+    _record(store, ('add', [sid]))
+    return sid
+
+
+def add_point(store, x, y):
+    """
+    Adds a point to the active stroke with incremental Ramer-Douglas-Peucker decimation.
+
+    The points since the last kept vertex are tested against the segment from
+    that vertex to the new point; while all lie within STROKE_EPSILON they are
+    dropped, otherwise the previous point becomes a vertex.
+
+    Returns:
+        bool: False if no stroke is active.
+    """
+    sid = store['active']
+    if sid is None:
+        return False
+    stroke = store['strokes'][sid]
+    p = np.array((x, y), np.float32)
+
+    if stroke['n'] == 0:
+        _commit_vertex(store, stroke, p)
+        return True
+    if stroke['tail'] is None:
+        stroke['tail'] = p
+        return True
+
+    candidates = stroke['pending'] + [stroke['tail']]
+    if (len(candidates) > STROKE_MAX_PENDING or
+            _max_deviation(stroke['points'][stroke['n'] - 1], p, candidates) > STROKE_EPSILON):
+        _commit_vertex(store, stroke, stroke['tail'])
+        stroke['pending'] = []
+    else:
+        stroke['pending'] = candidates
+    stroke['tail'] = p
+    return True
+
+
+def _max_deviation(a, b, points):
+    """Largest distance of points from segment a-b."""
+    pts = np.asarray(points, np.float32)
+    ab = b - a
+    denom = float(ab @ ab)
+    if denom == 0.0:
+        return float(np.sqrt(((pts - a) ** 2).sum(-1)).max())
+    t = np.clip(((pts - a) @ ab) / denom, 0.0, 1.0)
+    closest = a + t[:, None] * ab
+    return float(np.sqrt(((pts - closest) ** 2).sum(-1)).max())
+
+
+def end_stroke(store):
+    """Finishes the active stroke: commits its tail and trims its array to size."""
+    sid = store['active']
+    if sid is None:
+        return
+    stroke = store['strokes'][sid]
+    if stroke['tail'] is not None:
+        _commit_vertex(store, stroke, stroke['tail'])
+    elif stroke['n'] == 1:
+        _add_segment(store, stroke, stroke['points'][0], stroke['points'][0])   # A dot
+    stroke['tail'] = None
+    stroke['pending'] = []
+    stroke['points'] = stroke['points'][:stroke['n']].copy()
+    store['active'] = None
+
+
+def stroke_points(stroke):
+    """Visible polyline of a stroke as an (n, 2) float32 array (includes the live tail)."""
+    pts = stroke['points'][:stroke['n']]
+    if stroke['tail'] is not None:
+        pts = np.vstack((pts, stroke['tail'][None]))
+    return pts
+
+
+def visible_strokes(store):
+    """Visible strokes in draw order."""
+    return [store['strokes'][sid] for sid in sorted(store['visible'])]
+
+
+def remove_strokes(store, ids):
+    """
+    Hides strokes as one undoable step.
+
+    Returns:
+        list: The ids that were actually removed.
+    """
+    end_stroke(store)
+    ids = [sid for sid in ids if sid in store['visible']]
+    if ids:
+        _set_visible(store, ids, False)
+        _record(store, ('remove', ids))
+    return ids
+
+
+def clear_strokes(store):
+    """Removes every visible stroke (undoable)."""
+    return remove_strokes(store, sorted(store['visible']))
+
+
+def _set_visible(store, ids, visible):
+    """Shows or hides strokes, masking their segments in the spatial index."""
+    for sid in ids:
+        if visible:
+            store['visible'].add(sid)
+        else:
+            store['visible'].discard(sid)
+        store['segments']['visible'][store['strokes'][sid]['segments']] = visible
+
+
+def undo(store):
+    """
+    Undoes the last add or remove.
+
+    Returns:
+        list: Ids of the strokes shown or hidden (empty, i.e. falsy, if nothing changed).
+    """
+    end_stroke(store)
+    if not store['history']:
+        return []
+    action = store['history'].pop()
+    kind, ids = action
+    _set_visible(store, ids, kind != 'add')
+    store['redo'].append(action)
+    return list(ids)
+
+
+def redo(store):
+    """
+    Re-applies the last undone step.
+
+    Returns:
+        list: Ids of the strokes shown or hidden (empty, i.e. falsy, if nothing changed).
+    """
+    end_stroke(store)
+    if not store['redo']:
+        return []
+    action = store['redo'].pop()
+    kind, ids = action
+    _set_visible(store, ids, kind == 'add')
+    store['history'].append(action)
+    return list(ids)
+
+
+# ----------------- Spatial Index -----------------
+def _segment_cells(a, b, width):
+    """Grid cells covered by segment a-b padded by half the stroke width."""
+    pad = width / 2
+    cx0 = int((min(a[0], b[0]) - pad) // GRID_CELL)
+    cx1 = int((max(a[0], b[0]) + pad) // GRID_CELL)
+    cy0 = int((min(a[1], b[1]) - pad) // GRID_CELL)
+    cy1 = int((max(a[1], b[1]) + pad) // GRID_CELL)
+    return [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+
+
+def _add_segment(store, stroke, a, b):
+    """Adds a committed segment to the segment table and the grid."""
+    seg = store['segments']
+    if store['free_rows']:
+        row = store['free_rows'].pop()
+    else:
+        row = store['n_segments']
+        if row == len(seg['sid']):
+            for key, arr in seg.items():
+                grown = np.zeros((2 * len(arr),) + arr.shape[1:], arr.dtype)
+                grown[:row] = arr[:row]
+                seg[key] = grown
+        store['n_segments'] += 1
+    seg['a'][row] = a
+    seg['b'][row] = b
+    seg['sid'][row] = stroke['id']
+    seg['half'][row] = stroke['width'] / 2
+    seg['visible'][row] = stroke['id'] in store['visible']
+    stroke['segments'].append(row)
+    for cell in _segment_cells(a, b, stroke['width']):
+        store['grid'].setdefault(cell, set()).add(row)
+
+
+def _unindex_segments(store, stroke):
+    """Takes a freed stroke's segments out of the grid and puts their rows on the free list."""
+    seg = store['segments']
+    grid = store['grid']
+    for row in stroke['segments']:
+        seg['visible'][row] = False
+        for cell in _segment_cells(seg['a'][row], seg['b'][row], stroke['width']):
+            rows = grid.get(cell)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del grid[cell]
+    store['free_rows'].extend(stroke['segments'])
+    stroke['segments'] = []
+
+
+def _query_segments(store, x0, y0, x1, y1):
+    """
+    Visible segments in the grid cells overlapping a rectangle, plus the
+    active stroke's live segment (last vertex to tail, not indexed yet).
+
+    Returns:
+        tuple: a, b ((k, 2) endpoints), sids (k,) and half widths (k,).
+    """
+    grid = store['grid']
+    seg = store['segments']
+    cx0, cx1 = int(x0 // GRID_CELL), int(x1 // GRID_CELL)
+    cy0, cy1 = int(y0 // GRID_CELL), int(y1 // GRID_CELL)
+    if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) >= len(grid):
+        # Query as large as the drawing: the visibility mask beats merging every cell
+        rows = np.flatnonzero(seg['visible'][:store['n_segments']])
+    else:
+        found = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = grid.get((cx, cy))
+                if cell:
+                    found |= cell
+        rows = np.fromiter(found, np.int64, len(found))
+        rows = rows[seg['visible'][rows]]
+    a, b, sids, half = seg['a'][rows], seg['b'][rows], seg['sid'][rows], seg['half'][rows]
+
+    sid = store['active']
+    if sid is not None and sid in store['visible'] and store['strokes'][sid]['n']:
+        stroke = store['strokes'][sid]
+        last = stroke['points'][stroke['n'] - 1]
+        tail = stroke['tail'] if stroke['tail'] is not None else last
+        a = np.vstack((a, last[None]))
+        b = np.vstack((b, tail[None]))
+        sids = np.append(sids, np.int32(sid))
+        half = np.append(half, np.float32(stroke['width'] / 2))
+    return a, b, sids, half
+
+
+def _segment_distances(a, b, p):
+    """Distance from point p to each segment a[i]-b[i]."""
+    ab = b - a
+    denom = (ab * ab).sum(-1)
+    t = np.clip(((p - a) * ab).sum(-1) / np.where(denom == 0, 1, denom), 0.0, 1.0)
+    closest = a + t[:, None] * ab
+    return np.sqrt(((closest - p) ** 2).sum(-1))
+
+
+def hit_test(store, x, y, radius=0):
+    """
+    Finds the visible strokes under a point.
+
+    Only the segments indexed in the cells around the point are measured, all
+    in one vectorized pass.
+
+    Args:
+        store (dict): Stroke store.
+        x, y (float): Query point (e.g. the fingertip on screen).
+        radius (float): Extra tolerance in pixels (e.g. eraser size / 2).
+
+    Returns:
+        list: Ids of strokes whose drawn line lies within radius of the point.
+    """
+    a, b, sids, half = _query_segments(store, x - radius, y - radius, x + radius, y + radius)
+    if not len(sids):
+        return []
+    d = _segment_distances(a, b, np.array((x, y), np.float32))
+    return np.unique(sids[d <= radius + half]).tolist()
+
+
+def lasso_select(store, polygon):
+    """
+    Finds the visible strokes with any point inside a lasso polygon.
+
+    Args:
+        store (dict): Stroke store.
+        polygon (array-like): (m, 2) lasso outline; it is closed implicitly.
+
+    Returns:
+        list: Ids of the selected strokes.
+    """
+    poly = np.asarray(polygon, np.float32)
+    if len(poly) < 3:
+        return []
+    lo, hi = np.floor(poly.min(axis=0)), np.ceil(poly.max(axis=0))
+    a, b, sids, _ = _query_segments(store, lo[0], lo[1], hi[0], hi[1])
+    # Stroke vertices are the segment endpoints; only those in the lasso's box can be inside
+    pts = np.concatenate((a, b))
+    owners = np.concatenate((sids, sids))
+    in_box = ((pts >= lo) & (pts <= hi)).all(axis=1)
+    pts, owners = pts[in_box], owners[in_box]
+    if not len(pts):
+        return []
+    # Rasterize the lasso over its box and look the points up: box area plus
+    # points, instead of points times polygon edges
+    w, h = (hi - lo).astype(int) + 1
+    mask = np.zeros((h, w), np.uint8)
+    cv2.fillPoly(mask, [(poly - lo).round().astype(np.int32)], 1)
+    ij = (pts - lo).round().astype(np.intp)
+    return np.unique(owners[mask[ij[:, 1], ij[:, 0]] > 0]).tolist()
+
+
+# ----------------- Rendering -----------------
+def strokes_bounds(store, ids):
+    """
+    Pixel box covered by the given strokes (visible or not), e.g. the region
+    an undo or redo changed.
+
+    Returns:
+        tuple or None: (x0, y0, x1, y1), or None if none of the strokes has points.
+    """
+    boxes = []
+    for sid in ids:
+        stroke = store['strokes'].get(sid)
+        pts = stroke_points(stroke) if stroke is not None else ()
+        if len(pts):
+            r = stroke['width'] / 2 + 1
+            boxes.append(np.concatenate((pts.min(axis=0) - r, pts.max(axis=0) + r)))
+    if not boxes:
+        return None
+    boxes = np.array(boxes)
+    return (float(boxes[:, 0].min()), float(boxes[:, 1].min()),
+            float(boxes[:, 2].max()), float(boxes[:, 3].max()))
+
+
+def clip_region(region, width, height):
+    """
+    Rounds a region outwards to whole pixels and clips it to an image.
+
+    Returns:
+        tuple or None: Integer (x0, y0, x1, y1) with x1, y1 exclusive, or None if nothing is left.
+    """
+    x0, y0 = max(0, int(np.floor(region[0]))), max(0, int(np.floor(region[1])))
+    x1, y1 = min(width, int(np.ceil(region[2])) + 1), min(height, int(np.ceil(region[3])) + 1)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1, y1
+
+
+def strokes_in_region(store, region):
+    """Visible strokes with a segment in (x0, y0, x1, y1), in draw order (via the spatial index)."""
+    _, _, sids, _ = _query_segments(store, *region)
+    return [store['strokes'][sid] for sid in np.unique(sids).tolist()]
+
+
+def render_strokes(store, canvas, region=None, colors=None):
+    """
+    Re-renders visible strokes onto a BGR image (cleared first).
+
+    Args:
+        store (dict): Stroke store.
+        canvas (numpy.ndarray): Destination image, e.g. the overlay raster.
+        region (tuple or None): (x0, y0, x1, y1) to re-render, e.g. from
+            strokes_bounds(); only that area is cleared, and only the strokes
+            the spatial index finds there are drawn. None re-renders everything.
+        colors (dict or None): Stroke id -> color drawn instead of the stroke's own
+            (e.g. a selection highlight).
+    """
+    h, w = canvas.shape[:2]
+    if region is None:
+        x0, y0, x1, y1 = 0, 0, w, h
+        strokes = visible_strokes(store)
+    else:
+        region = clip_region(region, w, h)
+        if region is None:
+            return
+        x0, y0, x1, y1 = region
+        strokes = strokes_in_region(store, region)
+    colors = colors or {}
+    draw_polylines(canvas[y0:y1, x0:x1],
+                   [(stroke_points(st), colors.get(st['id'], st['color']), st['width']) for st in strokes],
+                   (x0, y0))
+
+
+def draw_polylines(view, polylines, origin=(0, 0)):
+    """
+    Clears an image (or a view of one) and draws polylines into it.
+
+    Args:
+        view (numpy.ndarray): BGR destination.
+        polylines (list): (points, color, width) in the coordinates of the full image.
+        origin (tuple): Full-image position of view's top-left pixel.
+    """
+    view[:] = 0
+    offset = np.array(origin, np.float32)
+    for pts, color, width in polylines:
+        if len(pts) == 0:
+            continue
+        if len(pts) == 1:
+            pts = np.vstack((pts, pts))
+        cv2.polylines(view, [(pts - offset).round().astype(np.int32)], False, color, width)
@@ -0,0 +1,156 @@
+import os
+import numpy as np
+
+# ----------------- Configuration -----------------
+TEMPLATE_FILE = "gesture_templates.npz"  # Default library location (see save_templates)
+TEMPLATE_MAX_DISTANCE = 0.2   # Max RMS landmark distance (in hand units) for a template match
+_axis_ids = (0, 9)            # Wrist -> middle finger MCP: origin, scale and "up" of a normalized hand
+
+
+
+# ----------------- Normalization -----------------
+def normalize_landmarks(lm_array, hand_types=None):
+    """
+    Puts hands into a common frame so the same pose gives the same vector
+    wherever it is, however large and however tilted.
+
+    The wrist moves to the origin, the wrist -> middle MCP bone is rotated to
+    point straight up and scaled to length 1, and left hands are mirrored onto
+    right hands so one template serves both. Only x and y are used; MediaPipe's
+    z is too noisy to compare poses with.
+
+    Args:
+        lm_array (numpy.ndarray): (21, 3) or (n_hands, 21, 3) pixel landmarks.
+        hand_types (list of str or None): Handedness per hand; None treats all as right hands.
+
+    Returns:
+        numpy.ndarray: (n_hands, 42) float32 normalized x, y of all 21 landmarks.
+    """
+    lm = np.asarray(lm_array, np.float32).reshape(-1, 21, 3)[..., :2]
+    origin, tip = _axis_ids
+    pts = lm - lm[:, origin:origin + 1]
+    axis = pts[:, tip]
+    length = np.linalg.norm(axis, axis=-1) + 1e-6
+    ux, uy = (axis / length[:, None]).T
+    # Rotation taking the unit axis (ux, uy) to (0, -1), i.e. up in image coordinates
+    x = (-uy[:, None] * pts[..., 0] + ux[:, None] * pts[..., 1]) / length[:, None]
+    y = (-ux[:, None] * pts[..., 0] - uy[:, None] * pts[..., 1]) / length[:, None]
+    if hand_types is not None:
+        x[np.array([t == "Left" for t in hand_types], bool)] *= -1
+    return np.stack([x, y], axis=-1).reshape(len(lm), 42)
+
+
+# ----------------- Template Library -----------------
+def create_template_library():
+    """
+    Returns an empty template library for add_template() and match_templates().
+
+    Templates are kept as one (n_templates, 42) matrix plus their squared
+    norms, so matching every hand against every template is a single matrix
+    product.
+    """
+    return {
+        'vectors': np.zeros((0, 42), np.float32),
+        'labels': np.zeros(0, dtype='<U32'),
+        'sq_norms': np.zeros(0, np.float32),
+    }
+
+
+def _index_library(library):
+    """Recomputes the squared template norms used by match_templates()."""
+    library['sq_norms'] = np.einsum('ij,ij->i', library['vectors'], library['vectors'])
+
+
+def add_template(library, name, lm_array, hand_types=None):
+    """
+    Records the current pose of one or more hands as templates named name.
+
+    Several samples of the same gesture (different angles, distances or
+    people) can share a name; the nearest one decides.
+
+    Args:
+        library (dict): From create_template_library() or load_templates().
+        name (str): Gesture name returned on a match.
+        lm_array (numpy.ndarray): (21, 3) or (n_hands, 21, 3) pixel landmarks.
+        hand_types (list of str or None): Handedness per hand.
+    """
+    vectors = normalize_landmarks(lm_array, hand_types)
+    library['vectors'] = np.concatenate([library['vectors'], vectors])
+    library['labels'] = np.concatenate([library['labels'], np.full(len(vectors), name, dtype='<U32')])
+    _index_library(library)
+
+
+def remove_template(library, name):
+    """Deletes every template named name."""
+    keep = library['labels'] != name
+    library['vectors'] = library['vectors'][keep]
+    library['labels'] = library['labels'][keep]
+    _index_library(library)
+
+
+def template_names(library):
+    """Distinct gesture names in the library, sorted."""
+    return sorted(set(library['labels'].tolist()))
+
+
+def save_templates(library, path=TEMPLATE_FILE):
+    """Writes a library to a compressed .npz file."""
+    np.savez_compressed(path, vectors=library['vectors'], labels=library['labels'])
+
+
+def load_templates(path=TEMPLATE_FILE):
+    """
+    Loads a library written by save_templates().
+
+    Returns:
+        dict: The library, or an empty one if path does not exist.
+    """
+    library = create_template_library()
+    if not os.path.exists(path):
+        return library
+    with np.load(path) as data:
+        library['vectors'] = data['vectors'].astype(np.float32)
+        library['labels'] = data['labels'].astype('<U32')
+    _index_library(library)
+    return library
+
+
+# ----------------- Matching -----------------
+def match_templates(library, lm_array, hand_types=None):
+    """
+    Finds the nearest template for every hand.
+
+    Squared distances come from |q|^2 - 2 q.t + |t|^2 with the template norms
+    precomputed, so all hands are matched against hundreds of templates in one
+    small matrix product (microseconds).
+
+    Args:
+        library (dict): Template library.
+        lm_array (numpy.ndarray): (21, 3) or (n_hands, 21, 3) pixel landmarks.
+        hand_types (list of str or None): Handedness per hand.
+
+    Returns:
+        tuple:
+            names (list of str or None): Nearest template per hand (None if the library is empty).
+            distances (numpy.ndarray): (n_hands,) RMS landmark distance in hand units.
+    """
+    queries = normalize_landmarks(lm_array, hand_types)
+    if not len(library['labels']) or not len(queries):
+        return [None] * len(queries), np.full(len(queries), np.inf, np.float32)
+    sq = (np.einsum('ij,ij->i', queries, queries)[:, None]
+          - 2.0 * queries @ library['vectors'].T
+          + library['sq_norms'][None, :])
+    nearest = sq.argmin(axis=1)
+    best = np.maximum(sq[np.arange(len(queries)), nearest], 0.0)
+    return library['labels'][nearest].tolist(), np.sqrt(best / 21.0)
+
+
+def classify_templates(library, lm_array, hand_types=None, max_distance=TEMPLATE_MAX_DISTANCE):
+    """
+    Template gesture per hand, or None where no template is close enough.
+
+    Returns:
+        list of str or None: One entry per hand.
+    """
+    names, distances = match_templates(library, lm_array, hand_types)
+    return [name if d <= max_distance else None for name, d in zip(names, distances)]
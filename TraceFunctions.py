@@ -0,0 +1,125 @@
+import time
+import numpy as np
+
+# ----------------- Configuration -----------------
+HAND_CODES = {"Left": 0, "Right": 1}   # Handedness stored as one byte per hand
+HAND_NAMES = {v: k for k, v in HAND_CODES.items()}
+
+
+
+# ----------------- Recording -----------------
+def start_trace(frame_size):
+    """
+    Starts an in-memory landmark trace.
+
+    Args:
+        frame_size (tuple): (width, height) of the camera frames being recorded.
+
+    Returns:
+        dict: Trace recorder to pass to record_frame() and save_trace().
+    """
+    return {
+        'frame_size': tuple(int(v) for v in frame_size),
+        'landmarks': [],     # One (n_hands, 21, 3) float32 array per frame
+        'handedness': [],    # One list of hand codes per frame
+        'timestamps': [],    # Monotonic capture time per frame
+    }
+
+
+def record_frame(trace, lm_array, hand_types, timestamp=None):
+    """
+    Appends one frame of landmarks to a trace.
+
+    Args:
+        trace (dict): Recorder from start_trace().
+        lm_array (numpy.ndarray): (n_hands, 21, 3) output from find_landmarks().
+        hand_types (list of str): Output from get_hand_types().
+        timestamp (float or None): Capture time; defaults to time.monotonic().
+    """
+    if timestamp is None:
+        timestamp = time.monotonic()
+    codes = [HAND_CODES.get(t, 1) for t in hand_types[:len(lm_array)]]
+    codes += [1] * (len(lm_array) - len(codes))
+    trace['landmarks'].append(np.asarray(lm_array, np.float32).copy())
+    trace['handedness'].append(codes)
+    trace['timestamps'].append(float(timestamp))
+
+
+def save_trace(trace, path):
+    """
+    Writes a trace to a compressed .npz file.
+
+    The file holds all hands back to back in 'landmarks' (N, 21, 3), with
+    'counts' giving the number of hands in each frame.
+    """
+    counts = np.array([len(lm) for lm in trace['landmarks']], np.uint8)
+    if counts.sum():
+        landmarks = np.concatenate([lm for lm in trace['landmarks'] if len(lm)])
+    else:
+        landmarks = np.zeros((0, 21, 3), np.float32)
+    handedness = np.array([c for codes in trace['handedness'] for c in codes], np.uint8)
+    np.savez_compressed(
+        path,
+        landmarks=landmarks,
+        counts=counts,
+        handedness=handedness,
+        timestamps=np.array(trace['timestamps'], np.float64),
+        frame_size=np.array(trace['frame_size'], np.int32),
+    )
+
+
+# ----------------- Replay -----------------
+def load_trace(path):
+    """
+    Loads a trace written by save_trace().
+
+    Returns:
+        dict: Arrays from the file plus 'offsets', the index of each frame's first hand.
+    """
+    with np.load(path) as data:
+        trace = {key: data[key] for key in data.files}
+    trace['offsets'] = np.concatenate(([0], np.cumsum(trace['counts'], dtype=np.int64)))
+    return trace
+
+
+def trace_length(trace):
+    """Number of frames in a loaded trace."""
+    return len(trace['counts'])
+
+
+def trace_frame(trace, i):
+    """
+    Returns one frame of a loaded trace.
+
+    Returns:
+        tuple:
+            timestamp (float): Recorded capture time.
+            lm_array (numpy.ndarray): (n_hands, 21, 3) landmark view (not a copy).
+            hand_types (list of str): Handedness per hand.
+    """
+    start, end = trace['offsets'][i], trace['offsets'][i + 1]
+    hand_types = [HAND_NAMES[int(c)] for c in trace['handedness'][start:end]]
+    return float(trace['timestamps'][i]), trace['landmarks'][start:end], hand_types
+
+
+def iter_trace(trace, realtime=False):
+    """
+    Yields (timestamp, lm_array, hand_types) for every frame of a loaded trace.
+
+    Args:
+        trace (dict): Output from load_trace().
+        realtime (bool): If True, sleep so frames come out at the recorded speed;
+            otherwise replay as fast as the consumer allows.
+    """
+    n = trace_length(trace)
+    if n == 0:
+        return
+    t0_trace = float(trace['timestamps'][0])
+    t0_wall = time.monotonic()
+    for i in range(n):
+        timestamp, lm_array, hand_types = trace_frame(trace, i)
+        if realtime:
+            delay = (timestamp - t0_trace) - (time.monotonic() - t0_wall)
+            if delay > 0:
+                time.sleep(delay)
+        yield timestamp, lm_array, hand_types
@@ -0,0 +1,35 @@
+import argparse
+import time
+import numpy as np
+import MouseFunctions
+import TraceFunctions as tracef
+import ReplayFunctions as replay_f
+
+parser = argparse.ArgumentParser(description="Replay a landmark trace through the mouse or paint logic.")
+parser.add_argument("trace", help="Trace file saved with the 'r' key in main.py")
+parser.add_argument("--mode", choices=["mouse", "paint"], default="mouse")
+parser.add_argument("--realtime", action="store_true", help="Replay at recorded speed instead of flat-out (gesture timing uses the recorded timestamps either way)")
+args = parser.parse_args()
+
+trace = tracef.load_trace(args.trace)
+replay = replay_f.start_replay(trace['frame_size'], args.mode.upper())
+
+t_start = time.perf_counter()
+for timestamp, lm_array, hand_types in tracef.iter_trace(trace, realtime=args.realtime):
+    replay_f.replay_frame(replay, lm_array, hand_types, timestamp)
+
+elapsed = time.perf_counter() - t_start
+frames, hands = replay['frames'], replay['hands']
+recorded = float(trace['timestamps'][-1] - trace['timestamps'][0]) if frames > 1 else 0.0
+
+print(f"Frames:   {frames} ({hands} hands) from {args.trace}")
+print(f"Recorded: {recorded:.2f} s")
+print(f"Replayed: {elapsed:.3f} s ({frames / elapsed if elapsed > 0 else 0:.0f} frames/s)")
+events = MouseFunctions.recorded_events
+counts = {}
+for _, op, _ in events:
+    counts[op] = counts.get(op, 0) + 1
+print(f"Events:   {counts}")
+if len(events) > 1:
+    gaps = np.diff([t for t, _, _ in events]) * 1000
+    print(f"Event gap: p50 {np.percentile(gaps, 50):.2f} ms, p95 {np.percentile(gaps, 95):.2f} ms")
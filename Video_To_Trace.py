@@ -0,0 +1,79 @@
+import argparse
+import time
+import cv2
+import numpy as np
+import TraceFunctions as tracef
+import InferenceFunctions as inf
+import FrameRingFunctions as ring_f
+
+# Worker processes re-import this file, so everything runs under the main guard
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract a landmark trace from a video using parallel hand inference.")
+    parser.add_argument("video", help="Video file to process")
+    parser.add_argument("trace", help="Output trace (.npz), replayable with Trace_Replay.py")
+    parser.add_argument("--workers", type=int, default=inf.INFERENCE_WORKERS, help="Inference processes")
+    parser.add_argument("--mirror", action="store_true", help="Mirror landmarks, as main.py does with the camera (frames are not flipped)")
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    success, first = cap.read()
+    if not success:
+        raise SystemExit(f"No frames read from {args.video}")
+
+    # Frames are decoded straight into shared-memory slots and only slot
+    # indices travel to the workers; enough slots for every queued job
+    slots = args.workers * (inf.INFERENCE_QUEUE_SIZE + 1) + 1
+    ring = ring_f.create_frame_ring(slots, first.shape, first.dtype)
+    pool = inf.start_inference_pool(args.workers, ring=ring, mirror=args.mirror)
+    trace = tracef.start_trace(first.shape[1::-1])
+    seq = 0
+    t_start = time.perf_counter()
+
+    def record(results):
+        for _, timestamp, lm_array, hand_types in results:
+            tracef.record_frame(trace, lm_array, hand_types, timestamp)
+
+    while True:
+        slot = ring_f.acquire_slot(ring)
+        while slot is None:
+            done = inf.get_results(pool, wait=True)   # Every slot in flight: wait for one
+            record(done)
+            slot = ring_f.acquire_slot(ring)
+            if slot is None and not done and not inf.pool_in_flight(pool):
+                break   # Workers stopped answering and still hold every slot
+        if slot is None:
+            print("Inference workers stopped answering; stopping early")
+            break
+
+        dst = ring['frames'][slot]
+        if seq == 0:
+            dst[:] = first
+        else:
+            success, src = cap.read(dst)
+            if not success:
+                ring_f.release_slot(ring, slot)
+                break
+            if not np.shares_memory(src, dst):
+                dst[:] = src   # Decoder ignored the buffer
+
+        # Timestamps follow the video clock, so replay timing matches the recording
+        if not inf.submit_frame(pool, seq, seq / fps, slot=slot):
+            ring_f.release_slot(ring, slot)
+            print("No inference worker is taking frames; stopping early")
+            break
+        seq += 1
+        record(inf.get_results(pool))
+
+    while inf.pool_in_flight(pool):
+        record(inf.get_results(pool, wait=True))
+
+    elapsed = time.perf_counter() - t_start
+    inf.stop_inference_pool(pool)
+    ring_f.close_frame_ring(ring)
+    cap.release()
+
+    tracef.save_trace(trace, args.trace)
+    print(f"Frames:   {seq} with {args.workers} workers ({pool['errors']} errors)")
+    print(f"Elapsed:  {elapsed:.2f} s ({seq / elapsed if elapsed > 0 else 0:.1f} frames/s)")
+    print(f"Trace saved to {args.trace}")
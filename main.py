@@ -1,21 +1,27 @@
-import cv2
 import time
-
-from seaborn import color_palette
+import ProfilerFunctions as prof   # First, so startup milestones include the other imports
+import cv2
 import HandTrackingFunctions as htf
-import autopy
+import CaptureFunctions as capf
+import TraceFunctions as tracef
 import PainterFunctions as pf
 import MouseFunctions
+import GestureFunctions as gest
+import FilterFunctions as filt
+import QualityFunctions as qual
 import numpy as np
 
 # ----------------- Configuration -----------------
 wcam, hcam = 648, 488
-screen_size = MouseFunctions.autopy.screen.size()
+screen_size = MouseFunctions.screen_size()
 screen_w, screen_h = int(screen_size[0]), int(screen_size[1])
 
-cap = cv2.VideoCapture(0)
-cap.set(3, wcam)
-cap.set(4, hcam)
+# Load the hand model on a background thread while the camera opens
+htf.warm_up_hands((hcam, wcam, 3))
+
+# Frames are read in place into a preallocated shared-memory ring
+capture = capf.open_capture(0, wcam, hcam, ring_slots=3)
+prof.startup_mark("camera_open")
 
 # From helpers
 mode = "MOUSE"
@@ -25,10 +31,21 @@ eraser_thickness = 50
 img_canvas = np.zeros((screen_h, screen_w, 3), np.uint8)
 header_height = 150
 prev_loc = {'x': 0, 'y': 0}
+trace = None  # Landmark trace while recording ('r' key)
+
+# With two hands the right one moves/clicks/paints and the left one picks
+# modes and colors (htf.HAND_ROLES); a single hand does both
+cursor_id = None  # Stable id of the hand driving the cursor
+SKIP_INTERVAL = htf.SKIP_INTERVAL  # Detector runs at least every N frames (1 = every frame)
+MIRROR_LANDMARKS = True  # Mirror landmark x instead of flipping the frame before detection
 
 # Initialize screen overlay
 pf.setup_screen_overlay(screen_w, screen_h)
 
+# Inject mouse events off the vision loop
+MouseFunctions.start_injection_worker()
+startup_reported = False  # Startup milestones are printed once the cursor first moves
+
 
 # Setup camera window
 cv2.namedWindow("Hand Control", cv2.WINDOW_NORMAL)
@@ -37,30 +54,67 @@ cv2.resizeWindow("Hand Control", 640, 480)
 
 # ----------------- Main Loop -----------------
 while True:
-    success, img = cap.read()
+    t = prof.tic()
+    success, frame, frame_time, frame_seq = capf.read_frame(capture)
     if not success:
         break
-
-    img = cv2.flip(img, 1)
-
-    # Hand detection
-    img, results = htf.find_hands(img)
-    lm_list, bbox = htf.find_positions(img, results, drawBBox=False)
-    hand_types = htf.get_hand_types(results)
-    fingers = htf.fingers_up([lm_list], hand_types)
-    click_length, click_line = htf.find_distance(lm_list, 4, 6, img, draw=False)
-    drag_length, drag_line = htf.find_distance(lm_list, 4, 12, img, draw=False)
+    t = prof.toc("capture", t)
+    prof.startup_mark("first_frame")
+    frame_start = time.perf_counter()
+    quality = qual.quality_settings()
+    pf.set_frame_size(frame.shape[1], frame.shape[0])
+
+    if MIRROR_LANDMARKS:
+        # Detect on the camera frame and mirror the landmarks; only the preview is flipped
+        lm_array, hand_types, _ = htf.track_landmarks(
+            frame, frame_time, SKIP_INTERVAL, track_roi=True, scale=quality['scale'], mirror=True)
+        t = prof.tic()
+        img = htf.mirror_frame(frame)
+        if quality['draw']:
+            htf.draw_hand_landmarks(img, lm_array)
+        t = prof.toc("flip", t)
+    else:
+        img = htf.mirror_frame(frame)
+        prof.toc("flip", t)
+        # Hand detection every SKIP_INTERVAL frames, extrapolated landmarks in between
+        # (times its own cvtColor, process, landmarks and predict stages)
+        lm_array, hand_types, _ = htf.track_landmarks(
+            img, frame_time, SKIP_INTERVAL, draw=quality['draw'], track_roi=True, scale=quality['scale'])
+        t = prof.tic()
+    if trace is not None:
+        tracef.record_frame(trace, lm_array, hand_types, frame_time)
+    t = prof.toc("landmarks", t)
+
+    # Stable ids keep per-hand state (finger hysteresis, filters, gestures) with its hand
+    hand_ids = htf.track_hand_ids(lm_array, hand_types)
+    fingers_all = htf.fingers_up_batch(lm_array, hand_ids)
+    roles = htf.assign_hand_roles(hand_types)
+    cursor, palette = roles.get("CURSOR"), roles.get("PALETTE")
+    hand_id = hand_ids[cursor] if cursor is not None else None
+    if hand_id != cursor_id:
+        # The cursor hand changed or left: release its drag, stroke and filters
+        if cursor_id is not None:
+            MouseFunctions.handle_gesture_events(img, gest.reset_gestures(cursor_id))
+            filt.reset_filters(hand=cursor_id)
+            prev_loc = pf.release_screen_drawing(prev_loc)
+        cursor_id = hand_id
+
+    lm_list = lm_array[cursor] if cursor is not None else []
+    fingers = fingers_all[cursor] if cursor is not None else [0, 0, 0, 0, 0]
+    geo = htf.frame_geometry(lm_list)
+    t = prof.toc("gestures", t)
 
     # ---------------- Selection Panel ----------------
     # Draw selection panel
     pf.draw_selection_panel(img)
+    t = prof.toc("overlay", t)
+
+    if palette is not None:
+        x_index, y_index = htf.landmark_xy(lm_array[palette], 8)
+        palette_fingers = fingers_all[palette]
 
-    if len(lm_list) != 0:
-        x_index, y_index = lm_list[8][1:]
-        x_middle, y_middle = lm_list[12][1:]
-        
         # Selection gesture (index up + middle up)
-        if fingers[1] == 1 and fingers[2] == 1:
+        if palette_fingers[1] == 1 and palette_fingers[2] == 1:
             if pf.check_selection_click(x_index, y_index):
 
                 # Get selected mode and color
@@ -69,6 +123,8 @@ while True:
 
                 # Show/hide overlay based on mode
                 if mode == "PAINT":
+                    # Release anything the mouse gestures still hold
+                    MouseFunctions.handle_gesture_events(img, gest.reset_gestures())
                     pf.show_screen_overlay()
                     print("🎨 PAINT MODE - Screen drawing ENABLED")
                 else:
@@ -76,17 +132,20 @@ while True:
                     print("🖱️  MOUSE MODE - Screen drawing DISABLED")
 
 
-        # ---------------- Mode Logic ----------------
-        if mode == "MOUSE":
-            pf.handle_mouse_mode(img, lm_list, fingers, click_length, click_line, drag_length, drag_line)
-
-
-        elif mode == "PAINT":
+    # ---------------- Mode Logic ----------------
+    if cursor is not None:
+        if mode == "PAINT":
             prev_loc = pf.handle_screen_drawing(
                 lm_list, fingers, draw_color, prev_loc,
-                wcam, hcam, screen_w, screen_h
+                pf.wcam, pf.hcam, screen_w, screen_h, timestamp=frame_time, hand=cursor_id
             )
+        elif mode == "MOUSE":
+            pf.handle_mouse_mode(img, lm_list, fingers, geo, timestamp=frame_time, hand=cursor_id)
+            if not startup_reported and "first_cursor_move" in prof.startup_marks():
+                print(prof.format_startup())
+                startup_reported = True
 
+    t = prof.toc("gestures", t)
 
     # Add visual indicators
     mode_color = (0, 255, 0) if mode == "PAINT" else (255, 255, 0)
@@ -97,29 +156,72 @@ while True:
         status = "DRAWING ON SCREEN" if pf.overlay_active else "SCREEN OVERLAY HIDDEN"
         cv2.putText(img, status, (10, 430), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
 
+    if prof.profiler_enabled():
+        prof.draw_profile_hud(img, 330, 170)
+        inj = MouseFunctions.injection_stats()
+        if inj and 'p95_ms' in inj:
+            cv2.putText(img, f"inject q={inj['depth']} p95 {inj['p95_ms']:.1f} ms",
+                        (330, 350), cv2.FONT_HERSHEY_PLAIN, 1, (255, 255, 255), 1)
+        cv2.putText(img, f"quality L{quality['level']} model {quality['model_complexity']} scale {quality['scale']:.2f}",
+                    (330, 366), cv2.FONT_HERSHEY_PLAIN, 1, (255, 255, 255), 1)
+    t = prof.toc("overlay", t)
+
     # Show the camera feed
     cv2.imshow("Hand Control", img)
 
+    # Keep processing inside the frame budget (drawing, model, then input size)
+    qual.update_quality((time.perf_counter() - frame_start) * 1000.0, lm_array)
+
     # Keyboard controls
     key = cv2.waitKey(1) & 0xFF
+    prof.toc("display", t)
+    prof.end_frame()
     if key == ord('q'):
         print("Quitting...")
         break
     elif key == ord('c'):
         pf.clear_screen_drawings()
         print("🧹 Screen cleared!")
+    elif key == ord('z'):  # Undo last stroke
+        if pf.undo_screen_drawing():
+            print("↩️  Undo")
+    elif key == ord('y'):  # Redo
+        if pf.redo_screen_drawing():
+            print("↪️  Redo")
+    elif key == ord('x'):  # Delete lasso selection
+        if pf.delete_selected_strokes():
+            print("✂️  Selection deleted")
+    elif key == ord('r'):  # Start/stop landmark trace recording
+        if trace is None:
+            trace = tracef.start_trace(img.shape[1::-1])
+            print("⏺️  Recording landmark trace...")
+        else:
+            trace_path = f"trace_{int(time.time())}.npz"
+            tracef.save_trace(trace, trace_path)
+            trace = None
+            print(f"💾 Trace saved to {trace_path}")
+    elif key == ord('p'):  # Toggle stage profiler and HUD
+        if prof.profiler_enabled():
+            profile_path = f"profile_{int(time.time())}.json"
+            prof.dump_profile(profile_path)
+            prof.enable_profiler(False)
+            print(f"⏱️  Profile saved to {profile_path}")
+        else:
+            prof.enable_profiler()
+            print("⏱️  Profiling stages...")
     elif key == ord('s'):  # Save screenshot
-        import pyautogui
         try:
-            screenshot = pyautogui.screenshot()
-            screenshot.save(f"screen_drawing_{int(time.time())}.png")
+            MouseFunctions.save_screenshot(f"screen_drawing_{int(time.time())}.png")
             print("📷 Screen saved!")
-        except:
-            print("❌ Could not save screenshot")
+        except Exception as e:
+            print(f"❌ Could not save screenshot: {e}")
 
 # Cleanup
 print("Cleaning up...")
+if trace is not None:
+    tracef.save_trace(trace, f"trace_{int(time.time())}.npz")
 pf.close_screen_overlay()
-cap.release()
+MouseFunctions.stop_injection_worker()
+capf.release_capture(capture)
 cv2.destroyAllWindows()
 print("Done!")
\ No newline at end of file
@@ -0,0 +1,69 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+import FilterFunctions as filt
+
+FPS = 30.0
+
+
+def filtered(f, xs, fps=FPS):
+    return np.array([filt.filter_point(f, x, 0.0, i / fps)[0] for i, x in enumerate(xs)])
+
+
+def test_first_sample_passes_through_and_repeated_timestamps_hold():
+    f = filt.create_filter()
+    assert filt.filter_point(f, 10.0, 20.0, 0.0) == (10.0, 20.0)
+    out = filt.filter_point(f, 30.0, 20.0, 0.1)
+    assert filt.filter_point(f, 500.0, 500.0, 0.1) == out   # Same frame delivered twice
+
+
+def test_jitter_on_a_still_hand_is_smoothed():
+    rng = np.random.default_rng(0)
+    raw = 500 + rng.normal(0.0, 3.0, 300)
+    out = filtered(filt.create_filter(**filt.FILTER_PARAMS["MOUSE"]), raw)
+    assert np.std(np.diff(out[30:])) < 0.5 * np.std(np.diff(raw[30:]))
+    assert abs(out[-30:].mean() - 500) < 2
+
+
+def test_speed_raises_the_cutoff_so_fast_moves_lag_less():
+    ramp = np.arange(60) * 40.0    # 1200 px/s
+    still = filt.create_filter(min_cutoff=1.0, beta=0.0)
+    adaptive = filt.create_filter(min_cutoff=1.0, beta=0.015)
+    lag_still = ramp[-1] - filtered(still, ramp)[-1]
+    lag_adaptive = ramp[-1] - filtered(adaptive, ramp)[-1]
+    assert lag_adaptive < 0.3 * lag_still
+
+
+def test_lead_extrapolates_along_the_velocity():
+    ramp = np.arange(60) * 10.0
+    plain = filtered(filt.create_filter(lead=0.0), ramp)[-1]
+    ahead = filtered(filt.create_filter(lead=0.05), ramp)[-1]
+    assert ahead > plain
+
+
+def test_output_depends_on_timestamps_not_call_count():
+    xs = np.arange(30) * 20.0
+    a = filtered(filt.create_filter(), xs)
+    b = filtered(filt.create_filter(), xs)
+    np.testing.assert_array_equal(a, b)
+
+    # Every other frame dropped: the filter takes the larger step per sample,
+    # so it ends up about as close as when it saw every frame
+    every = filtered(filt.create_filter(), xs)[-1]
+    f = filt.create_filter()
+    for i in range(0, 30, 2):
+        half = filt.filter_point(f, xs[i], 0.0, i / FPS)[0]
+    assert abs(half - every) < 0.1 * xs[-2]
+
+
+def test_smooth_point_keeps_state_per_mode_and_hand():
+    filt.reset_filters()
+    filt.smooth_point(0.0, 0.0, 0.0, "MOUSE", hand="a")
+    filt.smooth_point(1000.0, 1000.0, 0.0, "MOUSE", hand="b")
+    xa, _ = filt.smooth_point(10.0, 0.0, 1 / FPS, "MOUSE", hand="a")
+    xb, _ = filt.smooth_point(1010.0, 1000.0, 1 / FPS, "MOUSE", hand="b")
+    assert 0.0 < xa < 20.0 and 1000.0 < xb < 1020.0
+
+    filt.reset_filters(hand="a")
+    assert filt.smooth_point(300.0, 300.0, 1.0, "MOUSE", hand="a") == (300.0, 300.0)
+    filt.reset_filters()
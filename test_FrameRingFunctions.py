@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip("numpy")
+import FrameRingFunctions as ring_f
+
+
+def test_slots_are_handed_out_and_released():
+    ring = ring_f.create_frame_ring(2, (4, 4, 3))
+    try:
+        a, b = ring_f.acquire_slot(ring), ring_f.acquire_slot(ring)
+        assert {a, b} == {0, 1}
+        assert ring_f.acquire_slot(ring) is None
+        ring_f.release_slot(ring, a)
+        assert ring_f.free_slots(ring) == 1
+    finally:
+        ring_f.close_frame_ring(ring)
+
+
+def test_spawned_workers_leave_the_owner_registration_alone(tmp_path):
+    script = tmp_path / "ring_workers.py"
+    script.write_text(textwrap.dedent("""
+        import multiprocessing
+        import FrameRingFunctions as ring_f
+
+        def worker(spec):
+            ring = ring_f.attach_frame_ring(spec)
+            ring['frames'][0, 0, 0, 0] = 7
+            ring_f.close_frame_ring(ring)
+
+        if __name__ == "__main__":
+            ctx = multiprocessing.get_context("spawn")
+            ring = ring_f.create_frame_ring(2, (4, 4, 3))
+            procs = [ctx.Process(target=worker, args=(ring['spec'],)) for _ in range(2)]
+            for p in procs:
+                p.start()
+            for p in procs:
+                p.join()
+            print(int(ring['frames'][0, 0, 0, 0]))
+            ring_f.close_frame_ring(ring)
+    """))
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(ring_f.__file__)))
+    out = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=60, env=env)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == "7"
+    assert "KeyError" not in out.stderr
+    assert "leaked" not in out.stderr
@@ -0,0 +1,117 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+import GestureFunctions as gest
+
+FPS = 30.0
+POINT = [0, 1, 0, 0, 0]       # Index up: cursor pose, pinches click and drag
+TWO_UP = [0, 1, 1, 0, 0]      # Index + middle up, thumb down: scroll pose (second pinch double-clicks)
+
+
+def hand(pinch=None, y=300.0):
+    """(21, 3) landmarks with the thumb on the index PIP ('click'), the middle tip ('drag') or neither."""
+    lm = np.zeros((21, 3), np.float32)
+    lm[6] = (100, 100, 0)          # Index PIP
+    lm[8] = (100, y - 100, 0)      # Index tip
+    lm[12] = (400, y, 0)           # Middle tip
+    lm[4] = {'click': (105, 100, 0), 'drag': (405, y, 0)}.get(pinch, (250, 250, 0))
+    return lm
+
+
+def run(frames, engine=None):
+    """Feeds (t, lm, fingers) frames to one engine; returns [(type, t)] of the events."""
+    engine = engine or gest.create_gesture_engine("test")
+    events = []
+    for t, lm, fingers in frames:
+        events += [(e['type'], e['t']) for e in gest.update_gestures(engine, lm, t, fingers)]
+    return events
+
+
+def pinch(start, seconds, kind='click', fingers=POINT, fps=FPS):
+    """Frames of a pinch held for `seconds` starting at `start`, then one open frame."""
+    n = int(round(seconds * fps))
+    frames = [(start + i / fps, hand(kind), fingers) for i in range(n)]
+    return frames + [(start + n / fps, hand(), fingers)]
+
+
+def test_click_fires_once_after_the_hold_time():
+    events = run(pinch(0.0, 0.5))
+    assert events == [(gest.CLICK, pytest.approx(gest.CLICK_HOLD_TIME, abs=1 / FPS))]
+    assert events[0][1] >= gest.CLICK_HOLD_TIME
+
+
+def test_pinch_shorter_than_the_hold_time_does_not_click():
+    assert run(pinch(0.0, gest.CLICK_HOLD_TIME - 1 / FPS)) == []
+
+
+def test_click_time_follows_timestamps_not_frame_count():
+    fast = run(pinch(0.0, 0.5, fps=60.0))
+    slow = run(pinch(0.0, 0.5, fps=10.0))
+    assert [kind for kind, _ in fast] == [kind for kind, _ in slow] == [gest.CLICK]
+    assert fast[0][1] >= gest.CLICK_HOLD_TIME and slow[0][1] >= gest.CLICK_HOLD_TIME
+    assert run(pinch(0.0, 0.5)) == run(pinch(0.0, 0.5))   # Same frames, same events
+
+
+def test_second_pinch_with_middle_up_double_clicks():
+    frames = pinch(0.0, 0.2, fingers=TWO_UP) + pinch(0.3, 0.2, fingers=TWO_UP)
+    assert [kind for kind, _ in run(frames)] == [gest.CLICK, gest.DOUBLE_CLICK]
+
+
+def test_double_click_needs_the_middle_finger_and_the_interval():
+    middle_down = pinch(0.0, 0.2) + pinch(0.3, 0.2)
+    assert [kind for kind, _ in run(middle_down)] == [gest.CLICK, gest.CLICK]
+
+    late = 0.2 + gest.DOUBLE_CLICK_MAX_INTERVAL + 0.2
+    too_slow = pinch(0.0, 0.2, fingers=TWO_UP) + pinch(late, 0.2, fingers=TWO_UP)
+    assert [kind for kind, _ in run(too_slow)] == [gest.CLICK, gest.CLICK]
+
+
+def test_no_triple_click():
+    frames = sum((pinch(0.3 * k, 0.2, fingers=TWO_UP) for k in range(3)), [])
+    assert [kind for kind, _ in run(frames)] == [gest.CLICK, gest.DOUBLE_CLICK, gest.CLICK]
+
+
+def test_drag_starts_after_its_hold_time_and_ends_on_release():
+    events = run(pinch(0.0, 1.0, kind='drag'))
+    assert [kind for kind, _ in events] == [gest.DRAG_START, gest.DRAG_END]
+    assert events[0][1] >= gest.DRAG_HOLD_TIME
+    assert run(pinch(0.0, gest.DRAG_HOLD_TIME - 2 / FPS, kind='drag')) == []
+
+
+def test_lowering_the_index_finger_or_losing_the_hand_ends_a_drag():
+    engine = gest.create_gesture_engine("test")
+    frames = pinch(0.0, 1.0, kind='drag')[:-1]
+    assert [kind for kind, _ in run(frames, engine)] == [gest.DRAG_START]
+    assert [kind for kind, _ in run([(1.0, hand('drag'), [0, 0, 0, 0, 0])], engine)] == [gest.DRAG_END]
+
+    engine = gest.create_gesture_engine("test")
+    run(frames, engine)
+    assert [kind for kind, _ in run([(1.0, [], POINT)], engine)] == [gest.DRAG_END]
+
+
+def test_reset_releases_a_held_drag():
+    gest.reset_gestures()
+    for t, lm, fingers in pinch(0.0, 1.0, kind='drag')[:-1]:
+        gest.gesture_events(lm, t, fingers, hand="held")
+    assert [e['type'] for e in gest.reset_gestures("held")] == [gest.DRAG_END]
+    assert gest.reset_gestures("held") == []
+
+
+def test_scroll_follows_vertical_movement_above_the_threshold():
+    step = 8.0
+    frames = [(i / FPS, hand(y=300 - step * i), TWO_UP) for i in range(5)]
+    engine = gest.create_gesture_engine("test")
+    events = [e for t, lm, f in frames for e in gest.update_gestures(engine, lm, t, f)]
+    assert [e['type'] for e in events] == [gest.SCROLL] * 4
+    assert all(e['amount'] == int(step / gest.SCROLL_SMOOTHING * gest.SCROLL_SPEED) for e in events)
+
+    slow = [(i / FPS, hand(y=300 - 1.0 * i), TWO_UP) for i in range(5)]
+    assert run(slow) == []
+
+
+def test_time_never_runs_backwards():
+    engine = gest.create_gesture_engine("test")
+    run(pinch(0.0, 0.05), engine)
+    # A stale frame from before the pinch cannot count towards the hold
+    assert run([(0.2, hand('click'), POINT), (0.1, hand('click'), POINT)], engine) == []
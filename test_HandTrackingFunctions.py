@@ -0,0 +1,129 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+import HandTrackingFunctions as htf
+
+
+@pytest.fixture
+def synthetic():
+    yield htf.set_detector("synthetic", frame_size=(640, 480), hands=2, jitter=1.0)
+    htf.set_detector("synthetic")
+
+
+def landmarks_at(frame):
+    img = np.zeros((480, 640, 3), np.uint8)
+    _, results = htf.find_hands(img, draw=False, timestamp=frame / htf.SYNTHETIC_FPS)
+    return htf.find_landmarks(img, results)[0]
+
+
+def test_synthetic_hands_follow_the_timestamp_not_the_call_count(synthetic):
+    in_order = [landmarks_at(i) for i in range(6)]
+    htf.set_detector("synthetic", frame_size=(640, 480), hands=2, jitter=1.0)
+    skipping = [landmarks_at(i) for i in (0, 2, 4, 5)]
+    for i, lm in zip((0, 2, 4, 5), skipping):
+        np.testing.assert_allclose(lm, in_order[i], atol=1e-3)
+
+
+def test_synthetic_cycle_shows_the_mouse_poses(synthetic):
+    htf.set_detector("synthetic", frame_size=(640, 480))
+    seen = set()
+    for i in range(htf.SYNTHETIC_PERIOD):
+        lm = landmarks_at(i)
+        seen.add(tuple(htf.fingers_up_batch(lm, ["synthetic"])[0]))
+    assert (0, 1, 0, 0, 0) in seen or (1, 1, 0, 0, 0) in seen   # Pointing
+    assert (0, 1, 1, 0, 0) in seen                              # Scroll pose
+    assert (1, 1, 1, 1, 1) in seen                              # Open hand
+
+
+def test_draw_hand_landmarks_needs_no_mediapipe(synthetic):
+    img = np.zeros((480, 640, 3), np.uint8)
+    htf.draw_hand_landmarks(img, landmarks_at(0))
+    assert img.any()
+
+
+def test_trace_detector_skips_frames_with_the_caller(tmp_path):
+    import TraceFunctions as tracef
+    trace = tracef.start_trace((640, 480))
+    for i in range(10):
+        lm = np.full((1, 21, 3), i, np.float32)
+        tracef.record_frame(trace, lm, ["Right"], 100.0 + i / htf.SYNTHETIC_FPS)
+    path = str(tmp_path / "trace.npz")
+    tracef.save_trace(trace, path)
+
+    htf.set_detector("trace", trace=path)
+    try:
+        xs = [landmarks_at(i)[0, 0, 0] for i in (0, 3, 4, 9, 10)]
+    finally:
+        htf.set_detector("synthetic")
+    np.testing.assert_allclose(xs, [0, 3, 4, 9, 0], atol=1e-3)
+
+
+def test_background_rebuild_keeps_the_old_model_until_the_new_one_is_ready(monkeypatch):
+    import threading
+    built, closed = threading.Event(), []
+
+    def fake_mediapipe(**settings):
+        config = dict(htf.hands_config(), **settings)
+        built.wait(5.0)
+        return {'name': 'mediapipe', 'image': True, 'config': config,
+                'process': None, 'close': lambda: closed.append(config['model_complexity'])}
+
+    monkeypatch.setattr(htf, "_mediapipe_detector", fake_mediapipe)
+    monkeypatch.setattr(htf, "_hands_overrides", {})
+    old = {'name': 'mediapipe', 'image': True, 'config': dict(htf.HANDS_CONFIG, model_complexity=1),
+           'process': None, 'close': lambda: closed.append(1)}
+    monkeypatch.setattr(htf, "_detector", old)
+
+    assert htf.configure_hands(background=True, model_complexity=0)
+    assert not htf.configure_hands(background=True, model_complexity=0)   # Already being built
+    assert htf._detector is old
+    built.set()
+    for _ in range(500):
+        if htf._detector is not old:
+            break
+        threading.Event().wait(0.01)
+    assert htf._detector['config']['model_complexity'] == 0
+    assert closed == [1]
+
+
+def test_configure_hands_leaves_hands_config_alone(monkeypatch):
+    monkeypatch.setattr(htf, "_hands_overrides", {})
+    before = dict(htf.HANDS_CONFIG)
+    htf.set_detector("synthetic")
+    assert not htf.configure_hands(model_complexity=0, max_num_hands=1)
+    assert htf.HANDS_CONFIG == before
+    assert htf.hands_config() == dict(before, model_complexity=0, max_num_hands=1)
+
+
+def hand_with_index_bend(bend_deg):
+    """(1, 21, 3) landmarks: straight fingers, the index bent by bend_deg split over PIP and DIP."""
+    lm = np.zeros((1, 21, 3), np.float32)
+    for finger, joints in enumerate(htf._finger_joints):
+        step = np.radians(bend_deg / 2) if finger == 1 else 0.0
+        p, angle = np.array((100.0 + 40 * finger, 300.0)), 0.0
+        lm[0, joints[0], :2] = p
+        for k, joint in enumerate(joints[1:]):
+            if k:
+                angle += step
+            p = p + 30 * np.array((np.sin(angle), -np.cos(angle)))
+            lm[0, joint, :2] = p
+    return lm
+
+
+def test_finger_hysteresis_keeps_the_state_between_thresholds():
+    up, down = htf.FINGER_BEND_UP[1], htf.FINGER_BEND_DOWN[1]
+    between = (up + down) / 2
+    state = {}
+    index_states = [htf.fingers_up_batch(hand_with_index_bend(b), ["h"], state)[0][1]
+                    for b in (up - 20, between, down + 5, between, up - 5)]
+    assert index_states == [1, 1, 0, 0, 1]
+    np.testing.assert_allclose(htf.finger_bend_angles(hand_with_index_bend(between))[0, 1], between, atol=0.1)
+
+
+def test_finger_hysteresis_state_is_per_hand():
+    between = (htf.FINGER_BEND_UP[1] + htf.FINGER_BEND_DOWN[1]) / 2
+    state = {}
+    htf.fingers_up_batch(np.concatenate([hand_with_index_bend(0), hand_with_index_bend(120)]), ["a", "b"], state)
+    both_between = np.concatenate([hand_with_index_bend(between)] * 2)
+    assert [f[1] for f in htf.fingers_up_batch(both_between, ["a", "b"], state)] == [1, 0]
@@ -0,0 +1,113 @@
+import queue
+from collections import deque
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+import FrameRingFunctions as ring_f
+import InferenceFunctions as inf
+
+
+@pytest.fixture
+def ring():
+    ring = ring_f.create_frame_ring(3, (4, 4, 3))
+    yield ring
+    ring_f.close_frame_ring(ring)
+
+
+class FakeWorker:
+    def __init__(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def join(self, timeout=None):
+        self.alive = False
+
+    def terminate(self):
+        self.alive = False
+
+
+def local_pool(ring, workers=1, queue_size=0):
+    """Pool state without worker processes; the test plays the workers via 'jobs' and 'results'."""
+    return {
+        'procs': [FakeWorker() for _ in range(workers)],
+        'jobs': [queue.Queue(queue_size) for _ in range(workers)],
+        'results': queue.Queue(),
+        'next_worker': 0,
+        'dead': set(),
+        'assigned': {},
+        'ring': ring,
+        'slots': {},
+        'order': deque(),
+        'pending': {},
+        'completed': 0,
+        'errors': 0,
+    }
+
+
+def result(seq):
+    return (seq, float(seq), np.empty((0, 21, 3), np.float32), [], None)
+
+
+def test_lost_frame_keeps_its_slot_until_the_late_result(ring):
+    pool = local_pool(ring)
+    inf.submit_frame(pool, 0, 0.0, slot=ring_f.acquire_slot(ring))
+
+    assert inf.get_results(pool, wait=True, timeout=0.01) == []
+    assert pool['errors'] == 1
+    assert ring_f.free_slots(ring) == 2   # A worker may still be reading the frame
+
+    pool['results'].put(result(0))
+    assert inf.get_results(pool, wait=True, timeout=1.0) == []
+    assert ring_f.free_slots(ring) == 3
+
+
+def test_results_come_back_in_order_and_free_their_slots(ring):
+    pool = local_pool(ring)
+    for seq in range(2):
+        inf.submit_frame(pool, seq, float(seq), slot=ring_f.acquire_slot(ring))
+    pool['results'].put(result(1))
+    assert inf.get_results(pool) == []
+    pool['results'].put(result(0))
+
+    assert [r[0] for r in inf.get_results(pool, wait=True)] == [0, 1]
+    assert ring_f.free_slots(ring) == 3
+
+
+def test_stop_releases_reserved_slots(ring):
+    pool = local_pool(ring)
+    inf.submit_frame(pool, 0, 0.0, slot=ring_f.acquire_slot(ring))
+    inf.get_results(pool, wait=True, timeout=0.01)
+    inf.stop_inference_pool(pool)
+    assert ring_f.free_slots(ring) == 3
+
+
+def test_dead_worker_is_skipped_and_its_frames_are_dropped(ring):
+    pool = local_pool(ring, workers=2, queue_size=1)
+    assert inf.submit_frame(pool, 0, 0.0, slot=ring_f.acquire_slot(ring))   # Worker 0
+    assert inf.submit_frame(pool, 1, 1.0, slot=ring_f.acquire_slot(ring))   # Worker 1
+    pool['procs'][0].alive = False
+
+    # Worker 0's queue is full and it died: the frame goes to worker 1 once that has room
+    pool['jobs'][1].get_nowait()
+    assert inf.submit_frame(pool, 2, 2.0, slot=ring_f.acquire_slot(ring), timeout=1.0)
+    assert pool['dead'] == {0}
+    assert list(pool['order']) == [1, 2]
+    assert ring_f.free_slots(ring) == 1   # Frame 0's slot: no process reads it any more
+
+    pool['results'].put(result(1))
+    pool['results'].put(result(2))
+    assert [r[0] for r in inf.get_results(pool, wait=True)] == [1, 2]
+    assert ring_f.free_slots(ring) == 3
+
+
+def test_submit_gives_up_when_every_worker_is_stuck(ring):
+    pool = local_pool(ring, workers=2, queue_size=1)
+    for seq in range(2):
+        inf.submit_frame(pool, seq, float(seq), slot=ring_f.acquire_slot(ring))
+    slot = ring_f.acquire_slot(ring)
+    assert not inf.submit_frame(pool, 2, 2.0, slot=slot, timeout=0.05)
+    assert list(pool['order']) == [0, 1]
+    assert 2 not in pool['slots']
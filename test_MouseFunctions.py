@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+MouseFunctions = pytest.importorskip("MouseFunctions")
+
+
+@pytest.fixture
+def recording_backend():
+    MouseFunctions.set_mouse_backend("recording")
+    MouseFunctions.recorded_events.clear()
+    yield
+    MouseFunctions.stop_injection_worker()
+    MouseFunctions.set_mouse_backend("null")
+
+
+def test_injection_worker_starts_and_stops(recording_backend):
+    MouseFunctions.start_injection_worker()
+    assert MouseFunctions.injection_stats() is not None
+    MouseFunctions._inject('move', 10, 20)
+    MouseFunctions._inject('scroll', 120)
+    MouseFunctions.stop_injection_worker()
+
+    assert MouseFunctions.injection_stats() is None
+    ops = [op for _, op, _ in MouseFunctions.recorded_events]
+    assert ops == ['move', 'scroll']
+
+
+def test_full_queue_keeps_newest_move_and_every_scroll(recording_backend, monkeypatch):
+    import time
+    record = MouseFunctions._backend['move']
+
+    def slow_move(*args):
+        time.sleep(0.002)
+        record(*args)
+
+    monkeypatch.setitem(MouseFunctions._backend, 'move', slow_move)
+    MouseFunctions.start_injection_worker(maxsize=4)
+    for i in range(50):
+        MouseFunctions._inject('move', i, i)
+        MouseFunctions._inject('scroll', i)
+    MouseFunctions.stop_injection_worker(timeout=5.0)
+
+    moves = [args for _, op, args in MouseFunctions.recorded_events if op == 'move']
+    scrolls = [args[0] for _, op, args in MouseFunctions.recorded_events if op == 'scroll']
+    assert moves[-1] == (49, 49)
+    assert scrolls == list(range(50))
+
+
+def test_scroll_sends_whole_notches_and_keeps_the_rest(recording_backend, monkeypatch):
+    monkeypatch.setattr(MouseFunctions, "_scroll_remainder", 0.0)
+    delta = MouseFunctions.WHEEL_DELTA
+    sent = [MouseFunctions.scroll(amount) for amount in (delta // 2, delta // 2, 3 * delta, -delta // 4, -2 * delta)]
+    assert sent == [0, 1, 3, 0, -2]
+    assert [args for _, op, args in MouseFunctions.recorded_events if op == 'scroll'] == [(1,), (3,), (-2,)]
@@ -0,0 +1,83 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("tkinter")
+import ReplayFunctions as replay_f
+import StrokeFunctions as sf
+
+pf = replay_f.headless_painter()
+
+
+@pytest.fixture
+def screen(monkeypatch):
+    posted = []
+    monkeypatch.setattr(pf, "screen_strokes", sf.create_stroke_store())
+    monkeypatch.setattr(pf, "overlay_raster", np.zeros((400, 600, 3), np.uint8))
+    monkeypatch.setattr(pf, "_post_overlay", lambda *command: posted.append(command))
+    pf.selected_strokes.clear()
+    for y, color in ((50, (0, 0, 255)), (200, (0, 255, 0)), (350, (255, 0, 0))):
+        sf.begin_stroke(pf.screen_strokes, color, 7)
+        for x in range(20, 580, 10):
+            sf.add_point(pf.screen_strokes, x, y)
+        sf.end_stroke(pf.screen_strokes)
+    sf.render_strokes(pf.screen_strokes, pf.overlay_raster)
+    yield posted
+    pf.selected_strokes.clear()
+
+
+def apply_regions(posted):
+    for kind, (x0, y0, x1, y1), polylines in posted:
+        assert kind == 'region'
+        sf.draw_polylines(pf.overlay_raster[y0:y1, x0:x1], polylines, (x0, y0))
+
+
+def test_erasing_rerenders_only_the_erased_strokes_area(screen):
+    assert pf.erase_strokes_at(300, 205) == [1]
+    (_, (x0, y0, x1, y1), polylines), = screen
+    assert 150 < y0 and y1 < 250          # Neither neighbour is inside the region
+    assert polylines == []
+    apply_regions(screen)
+
+    expected = np.zeros_like(pf.overlay_raster)
+    sf.render_strokes(pf.screen_strokes, expected)
+    np.testing.assert_array_equal(pf.overlay_raster, expected)
+    assert not pf.overlay_raster[200, 300].any() and pf.overlay_raster[50, 300].any()
+
+
+def test_eraser_radius_follows_eraser_thickness(screen, monkeypatch):
+    monkeypatch.setattr(pf, "eraser_thickness", 4)
+    assert pf.erase_strokes_at(300, 215) == []
+    monkeypatch.setattr(pf, "eraser_thickness", 40)
+    assert pf.erase_strokes_at(300, 215) == [1]
+
+
+def test_screen_undo_and_redo_rerender_their_region(screen):
+    pf.erase_strokes_at(300, 200)
+    assert pf.undo_screen_drawing()
+    assert pf.redo_screen_drawing()
+    assert pf.undo_screen_drawing()
+    apply_regions(screen)
+
+    expected = np.zeros_like(pf.overlay_raster)
+    sf.render_strokes(pf.screen_strokes, expected)
+    np.testing.assert_array_equal(pf.overlay_raster, expected)
+    assert pf.overlay_raster[200, 300].any()
+
+
+def test_paint_mode_draws_on_the_given_canvas_with_the_current_brush(monkeypatch):
+    monkeypatch.setattr(pf, "brush_thickness", 21)
+    canvas = np.zeros((300, 400, 3), np.uint8)
+    strokes = sf.create_stroke_store()
+    state = {}
+    lm = np.zeros((21, 3), np.float32)
+    for i, x in enumerate((300, 340)):
+        lm[8] = (x, 320, 0)
+        canvas, state, _, _ = pf.handle_paint_mode(
+            None, lm, [0, 1, 0, 0, 0], canvas, (0, 0, 255), state, 640, 480, 400, 300,
+            timestamp=i / 30.0, hand="paint-test", strokes=strokes)
+    sf.end_stroke(strokes)
+
+    assert canvas.any() and not pf.img_canvas.any()
+    (stroke,) = sf.visible_strokes(strokes)
+    assert stroke['width'] == 21 and stroke['color'] == (0, 0, 255)
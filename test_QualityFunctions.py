@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+import QualityFunctions as qual
+
+
+@pytest.fixture(autouse=True)
+def fresh_quality():
+    qual.reset_quality()
+    yield
+    qual.reset_quality()
+
+
+def feed(frame_ms, frames):
+    for _ in range(frames):
+        settings = qual.update_quality(frame_ms)
+    return settings['level']
+
+
+def test_sustained_overrun_drops_one_level_at_a_time():
+    budget = qual.QUALITY_BUDGET_MS
+    assert feed(budget * 0.8, 30) == 0
+    assert feed(budget * 1.5, 10) == 1
+    assert feed(budget * 1.5, qual.QUALITY_SETTLE_FRAMES - 1) == 1
+
+
+def test_slow_frame_after_a_switch_does_not_walk_the_quality_down():
+    budget = qual.QUALITY_BUDGET_MS
+    feed(budget * 0.8, 30)
+    assert feed(budget * 1.5, 10) == 1
+    qual.update_quality(100.0)             # E.g. the first frame on the new model
+    assert feed(budget * 0.7, 200) == 1
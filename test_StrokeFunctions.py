@@ -0,0 +1,84 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+import StrokeFunctions as sf
+
+
+def draw(store, points, color=(0, 0, 255), width=4):
+    sid = sf.begin_stroke(store, color, width)
+    for x, y in points:
+        sf.add_point(store, x, y)
+    sf.end_stroke(store)
+    return sid
+
+
+def test_hit_test_finds_only_strokes_under_the_point():
+    store = sf.create_stroke_store()
+    horizontal = draw(store, [(x, 100) for x in range(0, 500, 5)])
+    vertical = draw(store, [(300, y) for y in range(200, 600, 5)])
+    dot = draw(store, [(50, 400)])
+
+    assert sf.hit_test(store, 250, 101) == [horizontal]
+    assert sf.hit_test(store, 301, 450) == [vertical]
+    assert sf.hit_test(store, 52, 401, radius=3) == [dot]
+    assert sf.hit_test(store, 150, 300) == []
+
+
+def test_hit_test_sees_the_live_segment_and_respects_undo():
+    store = sf.create_stroke_store()
+    sid = sf.begin_stroke(store, (0, 0, 255), 4)
+    sf.add_point(store, 10, 10)
+    sf.add_point(store, 200, 10)
+    assert sf.hit_test(store, 100, 10) == [sid]
+
+    sf.undo(store)
+    assert sf.hit_test(store, 100, 10) == []
+    sf.redo(store)
+    assert sf.hit_test(store, 100, 10) == [sid]
+
+
+def test_lasso_selects_strokes_with_a_vertex_inside():
+    store = sf.create_stroke_store()
+    inside = draw(store, [(100, 100), (150, 120)])
+    outside = draw(store, [(400, 400), (450, 420)])
+    many = [draw(store, [(x, 600), (x + 3, 603)]) for x in range(0, 1000, 10)]
+
+    assert sf.lasso_select(store, [(50, 50), (200, 50), (200, 200), (50, 200)]) == [inside]
+    assert {inside, outside} <= set(sf.lasso_select(store, [(0, 0), (1000, 0), (1000, 1000), (0, 1000)]))
+    assert len(sf.lasso_select(store, [(0, 550), (1100, 550), (1100, 650), (0, 650)])) == len(many)
+
+
+def test_region_render_after_undo_matches_a_full_render():
+    store = sf.create_stroke_store()
+    draw(store, [(x, 100 + x // 4) for x in range(50, 400, 7)], color=(0, 0, 255), width=7)
+    draw(store, [(200, y) for y in range(20, 300, 9)], color=(0, 255, 0), width=9)
+    draw(store, [(600, 400), (700, 450)], color=(255, 0, 0), width=5)
+    canvas = np.zeros((480, 800, 3), np.uint8)
+    sf.render_strokes(store, canvas)
+
+    changed = sf.undo(store)
+    sf.render_strokes(store, canvas, sf.strokes_bounds(store, changed))
+    expected = np.zeros_like(canvas)
+    sf.render_strokes(store, expected)
+    np.testing.assert_array_equal(canvas, expected)
+
+    changed = sf.redo(store)
+    sf.render_strokes(store, canvas, sf.strokes_bounds(store, changed))
+    sf.render_strokes(store, expected)
+    np.testing.assert_array_equal(canvas, expected)
+
+
+def test_segment_rows_of_freed_strokes_are_reused():
+    store = sf.create_stroke_store()
+    zigzag = [(x, 100 + 40 * (x // 10 % 2)) for x in range(0, 400, 10)]
+    for _ in range(5 * sf.STROKE_HISTORY_LIMIT):
+        sid = draw(store, zigzag)
+        sf.remove_strokes(store, [sid])
+    per_stroke = len(store['strokes'][sid]['segments'])
+    # Only strokes still reachable by undo hold rows
+    assert store['n_segments'] <= (sf.STROKE_HISTORY_LIMIT + 1) * per_stroke
+
+    kept = draw(store, [(x, 300) for x in range(0, 400, 5)])
+    assert sf.hit_test(store, 200, 301) == [kept]
+    assert sf.hit_test(store, 200, 100, radius=3) == []
@@ -0,0 +1,89 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+import TemplateFunctions as tmpl
+
+
+def pose(seed):
+    """(21, 3) pixel landmarks of a made-up hand pose, wrist at (320, 400), middle MCP 100 px above it."""
+    lm = np.random.default_rng(seed).uniform(-100, 100, (21, 3)).astype(np.float32)
+    lm[0] = (0, 0, 0)
+    lm[9] = (0, -100, 0)
+    lm[:, :2] += (320, 400)
+    return lm
+
+
+def moved(lm, dx=0.0, dy=0.0, scale=1.0, angle_deg=0.0):
+    """The same pose shifted, scaled and rotated about the wrist."""
+    a = np.radians(angle_deg)
+    rot = np.array([[np.cos(a), -np.sin(a)], [np.sin(a), np.cos(a)]], np.float32)
+    out = lm.copy()
+    out[:, :2] = (lm[:, :2] - lm[0, :2]) @ rot.T * scale + lm[0, :2] + (dx, dy)
+    return out
+
+
+def test_normalization_ignores_position_size_and_tilt():
+    lm = pose(0)
+    base = tmpl.normalize_landmarks(lm)
+    assert base.shape == (1, 42)
+    other = tmpl.normalize_landmarks(moved(lm, dx=-150, dy=60, scale=0.4, angle_deg=35))
+    np.testing.assert_allclose(other, base, atol=1e-4)
+
+
+def test_left_hands_are_mirrored_onto_right_hands():
+    lm = pose(1)
+    mirror = lm.copy()
+    mirror[:, 0] = 2 * lm[0, 0] - lm[:, 0]
+    np.testing.assert_allclose(tmpl.normalize_landmarks(mirror, ["Left"]),
+                               tmpl.normalize_landmarks(lm, ["Right"]), atol=1e-4)
+
+
+def test_nearest_template_wins_and_far_poses_are_rejected():
+    library = tmpl.create_template_library()
+    tmpl.add_template(library, "peace", pose(2))
+    tmpl.add_template(library, "rock", pose(3))
+    names, distances = tmpl.match_templates(library, np.stack([moved(pose(3), scale=2.0), pose(2)]))
+    assert names == ["rock", "peace"]
+    assert np.all(distances < 1e-3)
+
+    assert tmpl.classify_templates(library, pose(4)) == [None]
+    assert tmpl.classify_templates(library, pose(4), max_distance=np.inf) in (["peace"], ["rock"])
+
+
+def test_empty_library_matches_nothing():
+    library = tmpl.create_template_library()
+    names, distances = tmpl.match_templates(library, pose(0))
+    assert names == [None] and np.isinf(distances[0])
+    assert tmpl.classify_templates(library, pose(0)) == [None]
+
+
+def test_remove_template_drops_every_sample_of_a_name():
+    library = tmpl.create_template_library()
+    tmpl.add_template(library, "peace", np.stack([pose(2), pose(5)]))
+    tmpl.add_template(library, "rock", pose(3))
+    tmpl.remove_template(library, "peace")
+    assert tmpl.template_names(library) == ["rock"]
+    assert tmpl.match_templates(library, pose(2))[0] == ["rock"]
+
+
+def test_library_round_trips_through_a_file(tmp_path):
+    path = str(tmp_path / "templates.npz")
+    assert tmpl.template_names(tmpl.load_templates(path)) == []
+    library = tmpl.create_template_library()
+    tmpl.add_template(library, "peace", pose(2))
+    tmpl.add_template(library, "rock", pose(3))
+    tmpl.save_templates(library, path)
+    loaded = tmpl.load_templates(path)
+    assert tmpl.template_names(loaded) == ["peace", "rock"]
+    assert tmpl.classify_templates(loaded, pose(3)) == ["rock"]
+
+
+def test_templates_take_precedence_over_finger_patterns():
+    pytest.importorskip("cv2")
+    import HandTrackingFunctions as htf
+    library = tmpl.create_template_library()
+    tmpl.add_template(library, "OK", pose(2))
+    assert htf.classify_gesture([0, 1, 1, 0, 0], pose(2), "Right", library) == "OK"
+    assert htf.classify_gesture([0, 1, 1, 0, 0], pose(4), "Right", library) == "Peace"
+    assert htf.classify_gestures(np.stack([pose(2), pose(4)]), [[1, 1, 1, 1, 1]] * 2,
+                                 ["Right", "Right"], library) == ["OK", "Open Hand"]